@@ -4,6 +4,14 @@ cd src
 
 # python manage.py flush --no-input
 # python manage.py makemigrations
-python manage.py migrate
+# default и базы всех шардов заказов (ORDER_SHARDS)
+for alias in $(python manage.py shell -c "from django.conf import settings; print(*settings.SHARDING['ALIASES'])"); do
+    python manage.py migrate --database "$alias"
+done
 
-python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+if [ "$DEBUG" = "True" ]; then
+    python manage.py runserver 0.0.0.0:8000
+else
+    # gunicorn: число процессов задает WEB_CONCURRENCY (по умолчанию - по числу ядер)
+    exec python manage.py serve --bind 0.0.0.0:8000
+fi
@@ -1,26 +1,60 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.translation import gettext_lazy as _
 
+from base.admin import LargeTableAdmin, ShardedAdminMixin
 from .models import CartItem, Order, OrderItem
 
 
 @admin.register(CartItem)
-class CartItem(admin.ModelAdmin):
+class CartItem(ShardedAdminMixin, LargeTableAdmin):
     list_display = ('product', 'quantity', 'user', 'added_at', )
     list_editable = ('quantity',)
+    list_select_related = ('product__shop', 'user',)
     search_fields = ('user__email',)
+    autocomplete_fields = ('product', 'user',)
+
+
+def make_transition_action(status: str):
+    """
+    Создает действие админки, переводящее выбранные заказы в статус `status` одним UPDATE.
+
+    :param status: Новый статус.
+    :type status: str
+    """
+    label = dict(Order.STATUSES)[status]
+
+    @admin.action(description=_('Перевести в статус "%s"') % label, permissions=('change',))
+    def transition(model_admin, request, queryset):
+        updated = queryset.transition(status)
+        model_admin.message_user(request, _('Статус "%(status)s" установлен у заказов: %(count)d. '
+                                            'Заказы в других статусах не изменены.') % {
+            'status': label, 'count': updated,
+        }, messages.SUCCESS if updated else messages.WARNING)
+
+    transition.__name__ = f'transition_to_{status}'
+    return transition
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(ShardedAdminMixin, LargeTableAdmin):
     list_display = ('id', 'customer', 'total_amount', 'status', 'dispatch_date', 'arrival_date',)
     list_display_links = ('id', 'customer',)
-    list_editable = ('status', 'arrival_date',)
+    # статус меняется только действиями, которые проверяют Order.TRANSITIONS
+    list_editable = ('arrival_date',)
+    list_select_related = ('customer',)
     ordering = ('status', 'dispatch_date',)
     list_filter = ('status',)
+    search_fields = ('=id', 'customer__email',)
+    autocomplete_fields = ('customer',)
+    actions = [make_transition_action(status) for status in Order.TRANSITIONS]
 
     readonly_fields = ('dispatch_date', 'total_amount',)
 
+    def get_readonly_fields(self, request, obj=None):
+        if obj is not None:
+            return (*self.readonly_fields, 'status')
+        return self.readonly_fields
+
     fieldsets = (
         (
             None,
@@ -38,9 +72,12 @@ class OrderAdmin(admin.ModelAdmin):
 
 
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
-    list_display = ('id', 'order', 'total_amount')
+class OrderItemAdmin(ShardedAdminMixin, LargeTableAdmin):
+    list_display = ('id', 'order', 'product_name', 'shop_name', 'total_amount', 'fulfilment_status')
+    list_select_related = ('order',)
     ordering = ('total_amount',)
+    autocomplete_fields = ('order', 'product',)
 
-    readonly_fields = ('total_amount',)
+    readonly_fields = ('product_name', 'unit_price', 'discount', 'shop', 'shop_name', 'total_amount',
+                       'claimed_by', 'claimed_at')
 
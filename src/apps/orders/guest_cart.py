@@ -0,0 +1,97 @@
+import hashlib
+from typing import Dict
+
+from django.conf import settings
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Case, F, When
+from django.db.models.functions import Least
+
+from apps.products.models import Product
+from .models import CartItem, GuestCartMerge
+
+
+SALT = 'orders.guest-cart'
+# ограничение размера токена и стоимости слияния
+MAX_ITEMS = 50
+MAX_QUANTITY = 32_767  # PositiveSmallIntegerField
+
+
+def dump(items: Dict[int, int]) -> str:
+    """
+    Упаковывает корзину гостя в подписанный токен.
+
+    :param items: Словарь {id продукта: количество}.
+    :type items: Dict[int, int]
+
+    :return: Токен для клиента.
+    :rtype: str
+    """
+    return signing.dumps(sorted(items.items()), salt=SALT, compress=True)
+
+
+def load(token: str) -> Dict[int, int]:
+    """
+    Распаковывает корзину гостя из токена.
+
+    Токен действует `CART_RETENTION['DAYS']` дней с последнего изменения корзины,
+    как и брошенная корзина пользователя.
+
+    :param token: Токен из `dump`.
+    :type token: str
+
+    :return: Словарь {id продукта: количество}.
+    :rtype: Dict[int, int]
+    :raises signing.BadSignature: Если токен поврежден, подделан или истек.
+    """
+    pairs = signing.loads(token, salt=SALT, max_age=settings.CART_RETENTION['DAYS'] * 24 * 60 * 60)
+    try:
+        items = {int(product): int(quantity) for product, quantity in pairs}
+    except (TypeError, ValueError):
+        raise signing.BadSignature('Некорректное содержимое корзины')
+    if len(items) > MAX_ITEMS or any(quantity <= 0 for quantity in items.values()):
+        raise signing.BadSignature('Некорректное содержимое корзины')
+    return items
+
+
+def merge(user, items: Dict[int, int], token: str) -> int:
+    """
+    Добавляет корзину гостя в корзину пользователя.
+
+    Токен переносится один раз: его хэш сохраняется в `GuestCartMerge` в той же
+    транзакции, повтор того же токена (в том числе другим пользователем) ничего не меняет.
+    Количество складывается с уже лежащим в корзине на стороне СУБД, удаленные
+    из каталога продукты пропускаются. Запись - два запроса в шарде пользователя:
+    INSERT новых элементов с нулевым количеством, пропускающий уже лежащие в корзине,
+    и один UPDATE, прибавляющий количество ко всем элементам, поэтому параллельные
+    изменения корзины не теряются.
+
+    :param user: Пользователь, вошедший в систему.
+    :param items: Словарь {id продукта: количество} из `load`.
+    :type items: Dict[int, int]
+    :param token: Токен корзины, из которого получены `items`.
+    :type token: str
+
+    :return: Количество добавленных или измененных элементов корзины.
+    :rtype: int
+    """
+    if not items:
+        return 0
+    cart = CartItem.objects.for_customer(user.pk)
+    products = list(Product.objects.filter(pk__in=items).values_list('pk', flat=True))
+    if not products:
+        return 0
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    with transaction.atomic(using=DEFAULT_DB_ALIAS), transaction.atomic(using=cart.db):
+        try:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                GuestCartMerge.objects.using(DEFAULT_DB_ALIAS).create(digest=digest, user=user)
+        except IntegrityError:
+            return 0  # токен уже перенесен
+
+        cart.bulk_create([CartItem(user=user, product_id=pk, quantity=0) for pk in products], ignore_conflicts=True)
+        cart.filter(user=user, product__in=products).update(quantity=Least(
+            F('quantity') + Case(*(When(product_id=pk, then=items[pk]) for pk in products)),
+            MAX_QUANTITY,
+        ))
+    return len(products)
@@ -0,0 +1,102 @@
+# Generated by Django 5.1.15 on 2026-10-19 09:51
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # итоговая схема без внешних ключей на таблицы других приложений: в базах данных шардов
+    # нет таблиц пользователей и каталога, и на PostgreSQL ссылки на них из 0001-0005 не создаются.
+    # Базы данных, где часть 0001-0009 уже применена, доходят до конца по прежней цепочке.
+
+    replaces = [
+        ('orders', '0001_initial'),
+        ('orders', '0002_initial'),
+        ('orders', '0003_initial'),
+        ('orders', '0004_admin_indexes'),
+        ('orders', '0005_orderitem_snapshot'),
+        ('orders', '0006_backfill_orderitem_snapshot'),
+        ('orders', '0007_cross_database_relations'),
+        ('orders', '0008_cartitem_added_at_idx'),
+        ('orders', '0009_orderitem_fulfilment'),
+    ]
+
+    initial = True
+
+    dependencies = [
+        ('products', '0004_category_tree'),
+        ('shops', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dispatch_date', models.DateField(auto_now_add=True, verbose_name='Дата отправления')),
+                ('arrival_date', models.DateField(blank=True, null=True, verbose_name='Дата прибытия')),
+                ('from_field', models.CharField(blank=True, db_column='from', max_length=1024, null=True, verbose_name='Адрес отправления')),
+                ('to', models.CharField(blank=True, max_length=1024, null=True, verbose_name='Адрес прибытия')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает обработки'), ('processing', 'Принят в обработку'), ('paid', 'Оплачен'), ('shipped', 'Отгружен'), ('delivered', 'Доставлен'), ('canceled', 'Отменен'), ('returned', 'Возвращен')], default='pending', max_length=10, verbose_name='Статус')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Общая цена')),
+                ('customer', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.PROTECT, related_name='orders', related_query_name='order', to=settings.AUTH_USER_MODEL, verbose_name='Заказчик')),
+            ],
+            options={
+                'verbose_name': 'Заказ',
+                'verbose_name_plural': 'Заказы',
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveSmallIntegerField(default=1, verbose_name='Количество')),
+                ('product_name', models.CharField(blank=True, default='', max_length=64, verbose_name='Название продукта')),
+                ('unit_price', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Цена за единицу')),
+                ('discount', models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)], verbose_name='Скидка %')),
+                ('shop_name', models.CharField(blank=True, default='', max_length=128, verbose_name='Название магазина')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Общая цена')),
+                ('fulfilment_status', models.CharField(choices=[('pending', 'Ожидает сборки'), ('claimed', 'Собирается'), ('packed', 'Собран')], default='pending', max_length=10, verbose_name='Статус сборки')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='Взят в сборку')),
+                ('claimed_by', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Сборщик')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', related_query_name='item', to='orders.order', verbose_name='Заказ')),
+                ('product', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_items', related_query_name='order_item', to='products.product', verbose_name='Продукт')),
+                ('shop', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_items', related_query_name='order_item', to='shops.shop', verbose_name='Магазин')),
+            ],
+            options={
+                'verbose_name': 'Элемент заказа',
+                'verbose_name_plural': 'Элементы заказа',
+            },
+        ),
+        migrations.CreateModel(
+            name='CartItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveSmallIntegerField(default=1, verbose_name='Количество')),
+                ('added_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата добавления')),
+                ('product', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='cart_items', related_query_name='cart_item', to='products.product', verbose_name='Продукт')),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='cart_items', related_query_name='cart_item', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Элемент корзины',
+                'verbose_name_plural': 'Элементы корзины',
+                'indexes': [models.Index(fields=['added_at'], name='cartitem_added_at_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'user'), name='cart_item_product_for_user_unique_constraint')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'dispatch_date'], name='order_status_dispatch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['total_amount'], name='orderitem_total_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(condition=models.Q(('fulfilment_status__in', ('pending', 'claimed'))), fields=['shop', 'id'], name='orderitem_fulfilment_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-19 08:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_initial'),
+        ('products', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'dispatch_date'], name='order_status_dispatch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['total_amount'], name='orderitem_total_amount_idx'),
+        ),
+    ]
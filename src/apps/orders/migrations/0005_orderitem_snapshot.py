@@ -0,0 +1,47 @@
+# Generated by Django 5.1.15 on 2026-10-19 08:26
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_admin_indexes'),
+        ('products', '0003_admin_indexes'),
+        ('shops', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='discount',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)], verbose_name='Скидка %'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_name',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Название продукта'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='shop',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_items', related_query_name='order_item', to='shops.shop', verbose_name='Магазин'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='shop_name',
+            field=models.CharField(blank=True, default='', max_length=128, verbose_name='Название магазина'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='unit_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Цена за единицу'),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_items', related_query_name='order_item', to='products.product', verbose_name='Продукт'),
+        ),
+    ]
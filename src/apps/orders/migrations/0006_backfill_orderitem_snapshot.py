@@ -0,0 +1,56 @@
+from django.db import migrations
+from django.db.models import Max, Min, OuterRef, Subquery
+
+
+def backfill_snapshots(model, batch_size: int = 10_000) -> int:
+    """
+    Заполняет снимок продукта у элементов заказа, где он еще пустой.
+
+    Каждая пачка из `batch_size` идентификаторов обновляется одним запросом UPDATE
+    с подзапросами к продуктам и магазинам и, вне транзакции, фиксируется сразу,
+    поэтому блокировки на большой таблице держатся недолго.
+
+    :param model: Историческая модель элемента заказа.
+    :param batch_size: Размер пачки идентификаторов.
+    :type batch_size: int
+
+    :return: Количество заполненных элементов.
+    :rtype: int
+    """
+    product_model = model._meta.get_field('product').related_model
+    product = product_model.objects.filter(pk=OuterRef('product_id'))
+    pending = model.objects.filter(product_name='', product__isnull=False)
+    bounds = pending.aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return 0
+
+    updated = 0
+    for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+        updated += pending.filter(pk__gte=start, pk__lt=start + batch_size).update(
+            product_name=Subquery(product.values('name')[:1]),
+            unit_price=Subquery(product.values('price')[:1]),
+            discount=Subquery(product.values('discount')[:1]),
+            shop_id=Subquery(product.values('shop_id')[:1]),
+            shop_name=Subquery(product.values('shop__name')[:1]),
+        )
+    return updated
+
+
+def forwards(apps, schema_editor):
+    # элементы без снимка появились до шардирования и находятся только в базе данных default
+    if schema_editor.connection.alias != 'default':
+        return
+    backfill_snapshots(apps.get_model('orders', 'OrderItem'))
+
+
+class Migration(migrations.Migration):
+    # каждая пачка фиксируется отдельно, без одной транзакции на всю таблицу
+    atomic = False
+
+    dependencies = [
+        ('orders', '0005_orderitem_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-19 08:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_cross_database_relations'),
+        ('products', '0003_admin_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cartitem',
+            index=models.Index(fields=['added_at'], name='cartitem_added_at_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-19 08:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_closed_orders_packed(apps, schema_editor):
+    # элементы отгруженных заказов уже собраны и не должны попасть в очередь и частичный индекс
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    OrderItem.objects.using(schema_editor.connection.alias).filter(
+        order__status__in=('shipped', 'delivered', 'returned'),
+    ).update(fulfilment_status='packed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_cartitem_added_at_idx'),
+        ('products', '0004_category_tree'),
+        ('shops', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Взят в сборку'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Сборщик'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='fulfilment_status',
+            field=models.CharField(choices=[('pending', 'Ожидает сборки'), ('claimed', 'Собирается'), ('packed', 'Собран')], default='pending', max_length=10, verbose_name='Статус сборки'),
+        ),
+        migrations.RunPython(mark_closed_orders_packed, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(condition=models.Q(('fulfilment_status__in', ('pending', 'claimed'))), fields=['shop', 'id'], name='orderitem_fulfilment_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-19 09:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_squashed_0009_orderitem_fulfilment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GuestCartMerge',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Хэш токена')),
+                ('merged_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата переноса')),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Перенесенная корзина гостя',
+                'verbose_name_plural': 'Перенесенные корзины гостей',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-19 10:03
+
+from django.db import migrations, models
+
+
+def close_items_of_closed_orders(apps, schema_editor):
+    # несобранные элементы отмененных заказов и заказов, закрытых после 0009, остаются в очереди
+    # и частичном индексе; отмененные получают свой статус, отгруженные и возвращенные считаются собранными
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    queued = (OrderItem.objects.using(schema_editor.connection.alias)
+              .filter(fulfilment_status__in=('pending', 'claimed')))
+    queued.filter(order__status='canceled').update(fulfilment_status='canceled')
+    queued.filter(order__status__in=('shipped', 'delivered', 'returned')).update(fulfilment_status='packed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_guestcartmerge'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='orderitem',
+            name='fulfilment_status',
+            field=models.CharField(choices=[('pending', 'Ожидает сборки'), ('claimed', 'Собирается'), ('packed', 'Собран'), ('canceled', 'Отменен')], default='pending', max_length=10, verbose_name='Статус сборки'),
+        ),
+        migrations.RunPython(close_items_of_closed_orders, migrations.RunPython.noop),
+    ]
@@ -1,17 +1,56 @@
+import random
+from datetime import datetime, timedelta
 from decimal import Decimal
+from typing import Iterator, List
 
 from django.conf import settings
 from django.core import validators
-from django.db import models
-from django.db.models import Sum
+from django.db import models, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from apps.products.models import Product
+from core.sharding import ShardedQuerySet, get_shards
+
+
+class CartItemQuerySet(ShardedQuerySet):
+    """Набор запросов элементов корзины"""
+
+    def purge_expired(self, cutoff: datetime, batch_size: int) -> Iterator[int]:
+        """
+        Удаляет элементы корзины, добавленные раньше `cutoff`, небольшими пачками.
+
+        Идентификаторы пачки выбираются по индексу `added_at` от самых старых,
+        затем удаляются одним коротким запросом DELETE по первичному ключу,
+        поэтому блокировки держатся только на время одной пачки.
+        Генератор отдает количество удаленных строк после каждой пачки,
+        между пачками вызывающий код может сделать паузу.
+
+        :param cutoff: Граница: удаляются элементы, добавленные раньше нее.
+        :type cutoff: datetime
+        :param batch_size: Размер пачки.
+        :type batch_size: int
+
+        :return: Генератор количества удаленных строк в каждой пачке.
+        :rtype: Iterator[int]
+        """
+        expired = self.filter(added_at__lt=cutoff).order_by('added_at')
+        while True:
+            pks = list(expired.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return
+            deleted, _ = self.filter(pk__in=pks).delete()
+            yield deleted
 
 
 class CartItem(models.Model):
     """Модель элемента корзины пользователя"""
 
+    # путь к идентификатору покупателя, по которому выбирается шард (см. core.sharding)
+    shard_key = 'user_id'
+
     quantity = models.PositiveSmallIntegerField(
         _('Количество'),
         default=1,
@@ -20,30 +59,110 @@ class CartItem(models.Model):
         _('Дата добавления'),
         auto_now_add=True,
     )
+    # пользователи и каталог могут находиться в другой базе данных, чем шард корзины
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_constraint=False,
         related_name='cart_items', related_query_name='cart_item',
         verbose_name=_('Пользователь'),
     )
     product = models.ForeignKey(
         Product,
         on_delete=models.CASCADE,
+        db_constraint=False,
         related_name='cart_items', related_query_name='cart_item',
         verbose_name=_('Продукт'),
     )
 
+    objects = CartItemQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Элемент корзины')
         verbose_name_plural = _('Элементы корзины')
         constraints = (models.UniqueConstraint(
             fields=('product', 'user'),
             name='cart_item_product_for_user_unique_constraint'),)
+        # очистка брошенных корзин (CartItemQuerySet.purge_expired)
+        indexes = (models.Index(fields=('added_at',), name='cartitem_added_at_idx'),)
 
     def __str__(self):
         return f'{self.user.id}: {self.product.name} x {self.quantity}'
 
 
+class GuestCartMerge(models.Model):
+    """
+    Корзина гостя, перенесенная в корзину пользователя при входе.
+
+    Хранит хэш токена корзины, поэтому повтор того же токена ничего не добавляет.
+    У модели нет `shard_key`: записи живут в базе данных `default`, и токен
+    переносится один раз для всех пользователей и шардов.
+    """
+
+    digest = models.CharField(
+        _('Хэш токена'),
+        max_length=64,
+        primary_key=True,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='+',
+        verbose_name=_('Пользователь'),
+    )
+    merged_at = models.DateTimeField(
+        _('Дата переноса'),
+        auto_now_add=True,
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = _('Перенесенная корзина гостя')
+        verbose_name_plural = _('Перенесенные корзины гостей')
+
+    def __str__(self):
+        return self.digest
+
+
+class OrderQuerySet(ShardedQuerySet):
+    """Набор запросов заказов"""
+
+    def transition(self, status: str) -> int:
+        """
+        Переводит заказы набора в статус `status` одним запросом UPDATE.
+
+        Допустимость перехода проверяет сама СУБД: обновляются только строки,
+        текущий статус которых есть в `Order.TRANSITIONS[status]`, остальные
+        пропускаются. Поэтому параллельное изменение статуса не приведет
+        к недопустимому переходу. Для статуса `delivered` пустая дата прибытия
+        заполняется текущей датой. Несобранные элементы закрытых заказов выходят
+        из очереди сборки (`OrderItem.CLOSED_ORDER_STATUSES`) вторым UPDATE в той же
+        транзакции. Метод `save()` и сигналы не вызываются.
+
+        :param status: Новый статус.
+        :type status: str
+
+        :return: Количество измененных заказов.
+        :rtype: int
+        """
+        if status not in Order.TRANSITIONS:
+            raise ValueError(f'Нельзя перевести заказ в статус "{status}"')
+        changes = {'status': status}
+        if status == 'delivered':
+            changes['arrival_date'] = Coalesce(F('arrival_date'), timezone.localdate())
+        queryset = self.filter(status__in=Order.TRANSITIONS[status])
+        if status not in OrderItem.CLOSED_ORDER_STATUSES:
+            return queryset.update(**changes)
+        with transaction.atomic(using=self.db):
+            updated = queryset.update(**changes)
+            if updated:
+                OrderItem.objects.using(self.db).filter(
+                    order__in=self.filter(status=status), fulfilment_status__in=OrderItem.QUEUED_STATUSES,
+                ).update(fulfilment_status=OrderItem.CLOSED_ORDER_STATUSES[status])
+        return updated
+
+
 class Order(models.Model):
     """Модель заказа"""
 
@@ -56,6 +175,16 @@ class Order(models.Model):
         ('canceled', 'Отменен'),
         ('returned', 'Возвращен')
     )
+    shard_key = 'customer_id'
+    # новый статус: статусы, из которых в него можно перейти
+    TRANSITIONS = {
+        'processing': ('pending',),
+        'paid': ('processing',),
+        'shipped': ('paid',),
+        'delivered': ('shipped',),
+        'canceled': ('pending', 'processing', 'paid'),
+        'returned': ('shipped', 'delivered'),
+    }
 
     dispatch_date = models.DateField(
         _('Дата отправления'),
@@ -86,6 +215,7 @@ class Order(models.Model):
     customer = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.PROTECT,
+        db_constraint=False,
         related_name='orders', related_query_name='order',
         verbose_name=_('Заказчик'),
     )
@@ -96,6 +226,8 @@ class Order(models.Model):
         validators=(validators.MinValueValidator(0),)
     )
 
+    objects = OrderQuerySet.as_manager()
+
     def calculate_total_amount(self):
         self.total_amount = self.items.aggregate(Sum('total_amount'))['total_amount__sum']
         self.save(update_fields=['total_amount'])
@@ -103,13 +235,108 @@ class Order(models.Model):
     class Meta:
         verbose_name = _('Заказ')
         verbose_name_plural = _('Заказы')
+        # сортировка и фильтр списка заказов в админке
+        indexes = (models.Index(fields=('status', 'dispatch_date'), name='order_status_dispatch_idx'),)
 
     def __str__(self):
         return str(self.id)
 
 
+class OrderItemQuerySet(ShardedQuerySet):
+    """Набор запросов элементов заказа"""
+
+    def fulfilment_queue(self, shop_id: int) -> 'OrderItemQuerySet':
+        """
+        Возвращает очередь сборки магазина: еще не собранные элементы
+        незавершенных заказов (`FULFILMENT['ORDER_STATUSES']`) от старых к новым.
+
+        Выборка идет по частичному индексу `orderitem_fulfilment_idx`, в котором
+        есть только несобранные элементы, поэтому скорость не зависит от истории заказов.
+
+        :param shop_id: Идентификатор магазина.
+        :type shop_id: int
+
+        :return: Набор запросов.
+        :rtype: OrderItemQuerySet
+        """
+        return self.filter(
+            shop_id=shop_id,
+            fulfilment_status__in=OrderItem.QUEUED_STATUSES,
+            order__status__in=settings.FULFILMENT['ORDER_STATUSES'],
+        ).order_by('pk')
+
+    def claimable(self, now: datetime) -> 'OrderItemQuerySet':
+        """Элементы, которые никто не собирает или чей захват истек (`FULFILMENT['CLAIM_TIMEOUT']`)."""
+        expired = now - timedelta(seconds=settings.FULFILMENT['CLAIM_TIMEOUT'])
+        return self.filter(Q(fulfilment_status='pending') | Q(fulfilment_status='claimed', claimed_at__lt=expired))
+
+    def claim(self, shop_id: int, user, size: int) -> List['OrderItem']:
+        """
+        Захватывает для сборщика до `size` элементов из очереди магазина.
+
+        На каждом шарде строки выбираются `SELECT ... FOR UPDATE SKIP LOCKED`:
+        строки, заблокированные параллельным захватом, пропускаются, а не ожидаются,
+        поэтому сборщики получают непересекающиеся пачки и не ждут друг друга.
+        Обновление повторно проверяет, что строка еще свободна (для СУБД без
+        блокировки строк, например SQLite). Шарды обходятся начиная со случайного,
+        чтобы начало списка шардов не разбиралось первым.
+
+        :param shop_id: Идентификатор магазина.
+        :type shop_id: int
+        :param user: Сборщик.
+        :param size: Размер пачки.
+        :type size: int
+
+        :return: Захваченные элементы заказа.
+        :rtype: List[OrderItem]
+        """
+        now = timezone.now()
+        shards = [self.db] if self._db is not None else get_shards()
+        offset = random.randrange(len(shards))
+        claimed = []
+        for alias in shards[offset:] + shards[:offset]:
+            if len(claimed) >= size:
+                break
+            items = self.using(alias)
+            with transaction.atomic(using=alias):
+                locked = (items.fulfilment_queue(shop_id).claimable(now)
+                          .select_for_update(skip_locked=True, of=('self',))
+                          .values_list('pk', flat=True)[:size - len(claimed)])
+                pks = list(locked)
+                if not pks:
+                    continue
+                items.filter(pk__in=pks).claimable(now).update(
+                    fulfilment_status='claimed', claimed_by=user, claimed_at=now)
+            claimed += items.filter(pk__in=pks, claimed_by=user, claimed_at=now).order_by('pk')
+        return claimed
+
+
 class OrderItem(models.Model):
-    """Модель элемента заказа"""
+    """
+    Модель элемента заказа.
+
+    Название, цена, скидка и магазин продукта копируются в элемент при создании
+    (снимок на момент покупки), поэтому чтение заказов не обращается к каталогу,
+    а удаление продукта или магазина не затрагивает историю заказов.
+    """
+
+    shard_key = 'order.customer_id'
+
+    FULFILMENT_STATUSES = (
+        ('pending', 'Ожидает сборки'),
+        ('claimed', 'Собирается'),
+        ('packed', 'Собран'),
+        ('canceled', 'Отменен'),
+    )
+    # статусы элементов в очереди сборки (и в частичном индексе)
+    QUEUED_STATUSES = ('pending', 'claimed')
+    # статус заказа: статус сборки, в который переходят его несобранные элементы
+    CLOSED_ORDER_STATUSES = {
+        'shipped': 'packed',
+        'delivered': 'packed',
+        'returned': 'packed',
+        'canceled': 'canceled',
+    }
 
     quantity = models.PositiveSmallIntegerField(
         _('Количество'),
@@ -123,27 +350,105 @@ class OrderItem(models.Model):
     )
     product = models.ForeignKey(
         Product,
-        on_delete=models.PROTECT,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        db_constraint=False,
         related_name='order_items', related_query_name='order_item',
         verbose_name=_('Продукт'),
     )
+    product_name = models.CharField(
+        _('Название продукта'),
+        max_length=64,
+        blank=True, default='',
+    )
+    unit_price = models.DecimalField(
+        _('Цена за единицу'),
+        max_digits=10, decimal_places=2,
+        default=0,
+        validators=(validators.MinValueValidator(0),),
+    )
+    discount = models.PositiveSmallIntegerField(
+        _('Скидка %'),
+        default=0,
+        validators=(validators.MaxValueValidator(100),)
+    )
+    shop = models.ForeignKey(
+        'shops.Shop',
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        db_constraint=False,
+        related_name='order_items', related_query_name='order_item',
+        verbose_name=_('Магазин'),
+    )
+    shop_name = models.CharField(
+        _('Название магазина'),
+        max_length=128,
+        blank=True, default='',
+    )
     total_amount = models.DecimalField(
         _('Общая цена'),
         max_digits=10, decimal_places=2,
         default=0.0,
         validators=(validators.MinValueValidator(0),)
     )
+    fulfilment_status = models.CharField(
+        _('Статус сборки'),
+        max_length=10,
+        choices=FULFILMENT_STATUSES,
+        default='pending',
+    )
+    claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        db_constraint=False,
+        related_name='+',
+        verbose_name=_('Сборщик'),
+    )
+    claimed_at = models.DateTimeField(
+        _('Взят в сборку'),
+        null=True, blank=True,
+    )
+
+    objects = OrderItemQuerySet.as_manager()
+
+    def fill_snapshot(self, product: Product) -> None:
+        """
+        Копирует в элемент заказа текущие данные продукта.
+
+        :param product: Продукт с загруженным магазином (`select_related('shop')`).
+        :type product: Product
+
+        :return: None
+        :rtype: None
+        """
+        self.product = product
+        self.product_name = product.name
+        self.unit_price = product.price
+        self.discount = product.discount
+        self.shop_id = product.shop_id
+        self.shop_name = product.shop.name
+
+    def calculate_total_amount(self) -> Decimal:
+        return self.unit_price * Decimal(1 - self.discount / 100) * self.quantity
 
     def save(self, *args, **kwargs):
-        product = Product.objects.get(id=self.product_id)  # для оптимизации запроса
-        self.total_amount = product.price * Decimal(1 - product.discount / 100) * self.quantity
+        # снимок делается один раз, дальше цена элемента не зависит от каталога
+        if not self.product_name and self.product_id is not None:
+            self.fill_snapshot(Product.objects.select_related('shop').get(id=self.product_id))
+        self.total_amount = self.calculate_total_amount()
         super().save(*args, **kwargs)
 
 
     class Meta:
         verbose_name = _('Элемент заказа')
         verbose_name_plural = _('Элементы заказа')
+        indexes = (
+            models.Index(fields=('total_amount',), name='orderitem_total_amount_idx'),
+            # очередь сборки: только несобранные элементы, размер не растет с историей
+            models.Index(fields=('shop', 'id'), name='orderitem_fulfilment_idx',
+                         condition=Q(fulfilment_status__in=('pending', 'claimed'))),
+        )
 
     def __str__(self):
         return str(self.id)
-
@@ -1,9 +1,17 @@
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core import signing
 from rest_framework import serializers
 
+from apps.products.models import Product
+from base.serializers import DynamicFieldsModelSerializer
+from core.sharding import group_by_shard
+from . import guest_cart
 from .models import CartItem, Order, OrderItem
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(DynamicFieldsModelSerializer):
     """Сериализатор для модели элемента корзины"""
 
     user = serializers.PrimaryKeyRelatedField(
@@ -13,17 +21,136 @@ class CartItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = CartItem
         fields = ('id', 'quantity', 'user', 'product')
+        expandable_fields = {
+            'product': ('apps.products.serializers.ProductSerializer', {}),
+        }
+
+
+class GuestCartSerializer(serializers.Serializer):
+    """
+    Сериализатор корзины гостя, которая хранится только в подписанном токене `cart`.
+
+    Запрос задает количество продукта в корзине (0 - убрать продукт), ответ
+    содержит новый токен и содержимое корзины. Записей в базе данных не создается.
+    """
+
+    cart = serializers.CharField(
+        required=False, allow_blank=True,
+        help_text='Токен корзины из предыдущего ответа; пустой - новая корзина.',
+    )
+    product = serializers.PrimaryKeyRelatedField(
+        queryset=Product.objects.only('pk'),
+        write_only=True,
+    )
+    quantity = serializers.IntegerField(
+        min_value=0, max_value=guest_cart.MAX_QUANTITY,
+        default=1,
+        write_only=True,
+    )
+    items = serializers.ListField(
+        child=serializers.DictField(child=serializers.IntegerField()),
+        read_only=True,
+        help_text='Продукты корзины: [{"product": id, "quantity": количество}].',
+    )
 
+    def validate_cart(self, value: str) -> Dict[int, int]:
+        if not value:
+            return {}
+        try:
+            return guest_cart.load(value)
+        except signing.BadSignature:
+            raise serializers.ValidationError('Корзина повреждена или устарела.')
 
-class OrderItemSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели элемента заказа"""
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        items = dict(attrs.get('cart') or {})
+        product_id = attrs['product'].pk
+        if attrs['quantity']:
+            items[product_id] = attrs['quantity']
+        else:
+            items.pop(product_id, None)
+        if len(items) > guest_cart.MAX_ITEMS:
+            raise serializers.ValidationError(f'В корзине гостя не больше {guest_cart.MAX_ITEMS} продуктов.')
+        return {'items': items}
+
+    def to_representation(self, instance: Dict[int, int]) -> Dict[str, Any]:
+        return {
+            'cart': guest_cart.dump(instance),
+            'items': [{'product': product, 'quantity': quantity} for product, quantity in sorted(instance.items())],
+        }
+
+
+class OrderItemSerializer(DynamicFieldsModelSerializer):
+    """
+    Сериализатор для модели элемента заказа.
+
+    Данные продукта берутся из снимка в самом элементе, без обращения к каталогу;
+    текущий продукт можно раскрыть через `?expand=items.product`.
+    """
+
+    class Meta:
+        model = OrderItem
+        fields = ('id', 'order', 'product', 'product_name', 'unit_price', 'discount',
+                  'shop', 'shop_name', 'quantity', 'total_amount')
+        expandable_fields = {
+            'product': ('apps.products.serializers.ProductSerializer', {}),
+        }
+
+
+class FulfilmentLineSerializer(DynamicFieldsModelSerializer):
+    """Сериализатор элемента заказа в очереди сборки магазина"""
 
     class Meta:
         model = OrderItem
-        fields = ('id', 'order', 'product', 'quantity', 'total_amount')
+        fields = ('id', 'order', 'product', 'product_name', 'quantity',
+                  'fulfilment_status', 'claimed_by', 'claimed_at')
+        read_only_fields = fields
+
 
+class FulfilmentClaimSerializer(serializers.Serializer):
+    """Сериализатор запроса на захват пачки элементов из очереди сборки"""
 
-class OrderSerializer(serializers.ModelSerializer):
+    size = serializers.IntegerField(
+        min_value=1, max_value=settings.FULFILMENT['MAX_BATCH_SIZE'],
+        default=settings.FULFILMENT['BATCH_SIZE'],
+    )
+
+
+class FulfilmentStatusSerializer(serializers.Serializer):
+    """
+    Сериализатор завершения сборки: `packed` - элементы собраны,
+    `pending` - элементы возвращаются в очередь.
+
+    Изменяются только элементы магазина, захваченные текущим пользователем.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False, max_length=settings.FULFILMENT['MAX_BATCH_SIZE'],
+        write_only=True,
+    )
+    status = serializers.ChoiceField(choices=(('packed', 'Собран'), ('pending', 'Вернуть в очередь')))
+    updated = serializers.IntegerField(read_only=True, help_text='Количество измененных элементов.')
+    skipped = serializers.IntegerField(
+        read_only=True,
+        help_text='Количество элементов, которые не найдены или не захвачены текущим пользователем.',
+    )
+
+    def create(self, validated_data):
+        ids = set(validated_data['ids'])
+        changes = {'fulfilment_status': validated_data['status']}
+        if validated_data['status'] == 'pending':
+            changes.update(claimed_by=None, claimed_at=None)
+        updated = sum(
+            OrderItem.objects.using(shard)
+            .filter(pk__in=pks, shop_id=self.context['shop'].pk, fulfilment_status='claimed',
+                    claimed_by=self.context['request'].user)
+            .update(**changes)
+            for shard, pks in group_by_shard(ids).items()
+        )
+        return {'status': validated_data['status'], 'updated': updated, 'skipped': len(ids) - updated}
+
+
+class OrderSerializer(DynamicFieldsModelSerializer):
     """Сериализатор для модели заказа"""
 
     items = OrderItemSerializer(many=True)
@@ -32,3 +159,27 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = ('id', 'customer', 'status', 'total_amount',
                   'dispatch_date', 'arrival_date', 'from_field', 'to', 'items')
+
+
+class OrderStatusBulkSerializer(serializers.Serializer):
+    """Сериализатор массовой смены статуса заказов"""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False, max_length=10_000,
+        write_only=True,
+    )
+    status = serializers.ChoiceField(
+        choices=[(value, label) for value, label in Order.STATUSES if value in Order.TRANSITIONS],
+    )
+    updated = serializers.IntegerField(read_only=True, help_text='Количество измененных заказов.')
+    skipped = serializers.IntegerField(
+        read_only=True,
+        help_text='Количество заказов, которые не найдены или из текущего статуса нельзя перейти в новый.',
+    )
+
+    def create(self, validated_data):
+        ids = set(validated_data['ids'])
+        updated = sum(Order.objects.using(shard).filter(pk__in=pks).transition(validated_data['status'])
+                      for shard, pks in group_by_shard(ids).items())
+        return {'status': validated_data['status'], 'updated': updated, 'skipped': len(ids) - updated}
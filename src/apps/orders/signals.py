@@ -1,9 +1,15 @@
-from typing import Any, Dict
+from typing import Any, Dict, List
 
-from django.db.models.signals import post_delete, post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from .models import OrderItem
+from apps.products.models import Product
+from apps.shops.models import Shop
+from core.sharding import get_shards, shard_for
+from .models import CartItem, Order, OrderItem
 
 
 @receiver(post_save, sender=OrderItem)
@@ -31,4 +37,78 @@ def order_item_deleted_handler(
 
     Обновляет общую стоимость заказа после удаления элемента заказа.
     """
-    instance.order.calculate_total_amount()
\ No newline at end of file
+    instance.order.calculate_total_amount()
+
+
+def get_other_shards(using: str) -> List[str]:
+    # каскад удаления Django обходит только базу данных удаляемой записи
+    return [alias for alias in get_shards() if alias != using]
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def user_pre_delete_handler(sender, instance, using: str, **kwargs: Dict[str, Any]) -> None:
+    """
+    Обработчик, вызываемый перед удалением пользователя.
+
+    Заказы защищают покупателя от удаления (`on_delete=PROTECT`) и в его шарде,
+    если тот отличается от базы данных пользователя.
+    """
+    shard = shard_for(instance.pk)
+    if shard == using:
+        return
+    orders = list(Order.objects.using(shard).filter(customer_id=instance.pk)[:10])
+    if orders:
+        raise ProtectedError('Нельзя удалить пользователя, у которого есть заказы', set(orders))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted_handler(sender, instance, using: str, **kwargs: Dict[str, Any]) -> None:
+    """
+    Обработчик, вызываемый при удалении пользователя.
+
+    После фиксации транзакции удаляет его корзину в шарде и снимает закрепление
+    элементов заказов за ним в остальных шардах.
+    """
+    pk, shards = instance.pk, get_other_shards(using)
+
+    def cleanup():
+        for alias in shards:
+            if alias == shard_for(pk):
+                CartItem.objects.using(alias).filter(user_id=pk).delete()
+            OrderItem.objects.using(alias).filter(claimed_by_id=pk).update(claimed_by=None)
+
+    transaction.on_commit(cleanup, using=using)
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted_handler(sender, instance, using: str, **kwargs: Dict[str, Any]) -> None:
+    """
+    Обработчик, вызываемый при удалении продукта.
+
+    После фиксации транзакции удаляет продукт из корзин остальных шардов
+    и отвязывает от него элементы заказов (снимок продукта остается).
+    """
+    pk, shards = instance.pk, get_other_shards(using)
+
+    def cleanup():
+        for alias in shards:
+            CartItem.objects.using(alias).filter(product_id=pk).delete()
+            OrderItem.objects.using(alias).filter(product_id=pk).update(product=None)
+
+    transaction.on_commit(cleanup, using=using)
+
+
+@receiver(post_delete, sender=Shop)
+def shop_deleted_handler(sender, instance, using: str, **kwargs: Dict[str, Any]) -> None:
+    """
+    Обработчик, вызываемый при удалении магазина.
+
+    После фиксации транзакции отвязывает от него элементы заказов остальных шардов.
+    """
+    pk, shards = instance.pk, get_other_shards(using)
+
+    def cleanup():
+        for alias in shards:
+            OrderItem.objects.using(alias).filter(shop_id=pk).update(shop=None)
+
+    transaction.on_commit(cleanup, using=using)
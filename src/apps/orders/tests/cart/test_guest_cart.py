@@ -0,0 +1,74 @@
+from django.urls import reverse as django_reverse
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from apps.orders import guest_cart
+from apps.orders.models import CartItem
+from apps.products.models import Product
+from apps.shops.models import Shop
+from tests.base_test import BaseAPITestCase
+
+
+class GuestCartAPITest(BaseAPITestCase):
+    """
+    Тесты корзины гостя.
+
+    Этот класс тестирует корзину в подписанном токене и ее перенос
+    в корзину пользователя при входе.
+    """
+    def setUp(self):
+        shop = Shop.objects.create(name='Магазин', owner=self.auth_user2)
+        self.products = [Product.objects.create(name=f'Продукт {index}', price=10, shop=shop) for index in range(2)]
+        self.url = reverse('guest-cart')
+
+    def put(self, cart, product, quantity):
+        return self.client.post(self.url, {'cart': cart, 'product': product.pk, 'quantity': quantity}, format='json')
+
+    def test_guest_cart_without_writes(self):
+        """Изменение корзины гостя только проверяет продукт и ничего не пишет"""
+        first, second = self.products
+        with self.assertNumQueries(1):
+            response = self.put('', first, 2)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.put(response.data['cart'], second, 1)
+        response = self.put(response.data['cart'], first, 0)
+
+        self.assertEqual(response.data['items'], [{'product': second.pk, 'quantity': 1}])
+        response = self.client.get(self.url, {'cart': response.data['cart']})
+        self.assertEqual(response.data['items'], [{'product': second.pk, 'quantity': 1}])
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_tampered_token(self):
+        """Поддельный токен отклоняется"""
+        token = guest_cart.dump({self.products[0].pk: 1})
+        response = self.client.get(self.url, {'cart': token[:-1] + ('A' if token[-1] != 'A' else 'B')})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_merge_on_login(self):
+        """При входе корзина гостя добавляется к корзине пользователя"""
+        first, second = self.products
+        CartItem.objects.create(user=self.auth_user1, product=first, quantity=1)
+        token = guest_cart.dump({first.pk: 2, second.pk: 3, 10_000: 1})  # удаленный продукт пропускается
+
+        response = self.client.post(django_reverse('jwt-create'), {
+            'email': 'auth_user1@example.com', 'password': 'password', 'guest_cart': token,
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.data)
+        self.assertEqual(response.data['guest_cart_merged'], 2)
+        self.assertEqual(dict(CartItem.objects.filter(user=self.auth_user1).values_list('product', 'quantity')),
+                         {first.pk: 3, second.pk: 3})
+
+    def test_token_merged_once(self):
+        """Повторный вход с тем же токеном корзину не увеличивает"""
+        first = self.products[0]
+        token = guest_cart.dump({first.pk: 2})
+        for user in (self.auth_user1, self.auth_user1, self.auth_user2):
+            response = self.client.post(django_reverse('jwt-create'), {
+                'email': user.email, 'password': 'password', 'guest_cart': token,
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(list(CartItem.objects.values_list('user', 'product', 'quantity')),
+                         [(self.auth_user1.pk, first.pk, 2)])
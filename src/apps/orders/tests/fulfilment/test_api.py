@@ -0,0 +1,146 @@
+from datetime import timedelta
+from importlib import import_module
+from types import SimpleNamespace
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Product
+from apps.shops.models import Shop
+from core.sharding import shard_for
+from tests.base_test import BaseAPITestCase
+
+
+class FulfilmentAPITest(BaseAPITestCase):
+    """
+    Тесты очереди сборки магазина.
+
+    Этот класс тестирует список несобранных элементов заказов магазина,
+    захват непересекающихся пачек сборщиками и завершение сборки.
+    """
+    def setUp(self):
+        self.shop = Shop.objects.create(name='Магазин', owner=self.auth_user2)
+        other_shop = Shop.objects.create(name='Другой магазин', owner=self.admin_user)
+        product = Product.objects.create(name='Продукт', price=10, shop=self.shop)
+        other_product = Product.objects.create(name='Чужой продукт', price=10, shop=other_shop)
+        self.lines = []
+        for order_status in ('pending', 'paid', 'pending', 'shipped'):
+            order = Order.objects.create(customer=self.auth_user1, status=order_status)
+            self.lines.append(OrderItem.objects.create(order=order, product=product))
+            OrderItem.objects.create(order=order, product=other_product)
+        self.lines.pop()  # отгруженный заказ в очередь не попадает
+        self.authenticate(self.auth_user2)
+
+    def url(self, name):
+        return reverse(f'fulfilment-{name}', kwargs={'shop_pk': self.shop.pk})
+
+    def claim(self, size):
+        response = self.client.post(self.url('claim'), {'size': size}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [line['id'] for line in response.data]
+
+    def test_queue(self):
+        """Очередь содержит только элементы магазина из незавершенных заказов"""
+        with self.assertNumQueries(3):  # пользователь, магазин и очередь
+            response = self.client.get(self.url('list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([line['id'] for line in response.data], [line.pk for line in self.lines])
+        self.assertEqual({line['fulfilment_status'] for line in response.data}, {'pending'})
+
+    def test_only_owner(self):
+        """Очередь чужого магазина недоступна"""
+        self.authenticate(self.auth_user1)
+        self.assertEqual(self.client.get(self.url('list')).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_claim_batches_do_not_overlap(self):
+        """Последовательные захваты получают разные элементы, пока очередь не опустеет"""
+        first = self.claim(2)
+        second = self.claim(2)
+
+        self.assertEqual(first, [line.pk for line in self.lines[:2]])
+        self.assertEqual(second, [self.lines[2].pk])
+        self.assertEqual(self.claim(2), [])
+        self.assertEqual(OrderItem.objects.filter(claimed_by=self.auth_user2).count(), 3)
+
+    def test_expired_claim_returns_to_queue(self):
+        """Захват, не завершенный за CLAIM_TIMEOUT, снова доступен другим сборщикам"""
+        self.claim(3)
+        expired = timezone.now() - timedelta(seconds=settings.FULFILMENT['CLAIM_TIMEOUT'] + 1)
+        OrderItem.objects.filter(pk=self.lines[0].pk).update(claimed_at=expired)
+
+        self.authenticate(self.admin_user)
+        self.assertEqual(self.claim(3), [self.lines[0].pk])
+
+    def test_update_status(self):
+        """Собранными отмечаются только элементы, захваченные текущим пользователем"""
+        claimed = self.claim(2)
+        response = self.client.post(self.url('status'), {'ids': [*claimed, self.lines[2].pk], 'status': 'packed'},
+                                    format='json')
+
+        self.assertEqual((response.data['updated'], response.data['skipped']), (2, 1))
+        response = self.client.get(self.url('list'))
+        self.assertEqual([line['id'] for line in response.data], [self.lines[2].pk])
+
+    def test_closed_orders_leave_queue(self):
+        """Элементы отмененных заказов отменяются, отгруженных - считаются собранными, даже захваченные"""
+        self.claim(1)
+        Order.objects.filter(pk=self.lines[0].order_id).transition('canceled')
+        Order.objects.filter(pk=self.lines[1].order_id).transition('processing')  # элементы остаются в очереди
+        Order.objects.filter(pk=self.lines[2].order_id).transition('canceled')
+
+        statuses = dict(OrderItem.objects.filter(order__customer=self.auth_user1, product__shop=self.shop)
+                        .values_list('pk', 'fulfilment_status'))
+        self.assertEqual([statuses[line.pk] for line in self.lines], ['canceled', 'pending', 'canceled'])
+        self.assertEqual([line['id'] for line in self.client.get(self.url('list')).data], [self.lines[1].pk])
+
+    def test_backfill_closed_orders(self):
+        """Миграция выводит из очереди элементы заказов, закрытых до появления перехода"""
+        Order.objects.filter(pk=self.lines[0].order_id).update(status='canceled')
+        Order.objects.filter(pk=self.lines[1].order_id).update(status='returned')
+        migration = import_module('apps.orders.migrations.0011_orderitem_canceled')
+        migration.close_items_of_closed_orders(django_apps, SimpleNamespace(connection=connection))
+
+        self.assertEqual(OrderItem.objects.get(pk=self.lines[0].pk).fulfilment_status, 'canceled')
+        self.assertEqual(OrderItem.objects.get(pk=self.lines[1].pk).fulfilment_status, 'packed')
+        self.assertEqual(OrderItem.objects.filter(order__status='shipped', fulfilment_status='pending').count(), 0)
+        self.assertEqual([line['id'] for line in self.client.get(self.url('list')).data], [self.lines[2].pk])
+
+
+@override_settings(SHARDING={**settings.SHARDING, 'SHARDS': ('default', 'orders_1')})
+class FulfilmentShardingTest(BaseAPITestCase):
+    """Тесты очереди сборки, элементы которой распределены по шардам покупателей"""
+
+    databases = {'default', 'orders_1'}
+
+    def test_queue_across_shards(self):
+        """Очередь и захват охватывают все шарды"""
+        shop = Shop.objects.create(name='Магазин', owner=self.auth_user2)
+        product = Product.objects.create(name='Продукт', price=10, shop=shop)
+        customers = {}
+        index = 0
+        while len(customers) < 2:
+            user = get_user_model().objects.create_user(email=f'customer{index}@example.com', password='password')
+            customers.setdefault(shard_for(user.pk), user)
+            index += 1
+        for user in customers.values():
+            order = Order.objects.create(customer=user)
+            OrderItem.objects.using(order._state.db).create(order=order, product=product)
+
+        self.authenticate(self.auth_user2)
+        kwargs = {'shop_pk': shop.pk}
+        self.assertEqual(len(self.client.get(reverse('fulfilment-list', kwargs=kwargs)).data), 2)
+
+        response = self.client.post(reverse('fulfilment-claim', kwargs=kwargs), {'size': 5}, format='json')
+        ids = [line['id'] for line in response.data]
+        self.assertEqual(len(ids), 2)
+        response = self.client.post(reverse('fulfilment-status', kwargs=kwargs), {'ids': ids, 'status': 'packed'},
+                                    format='json')
+        self.assertEqual(response.data['updated'], 2)
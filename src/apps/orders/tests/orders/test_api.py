@@ -0,0 +1,151 @@
+from importlib import import_module
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Product
+from apps.shops.models import Shop
+from tests.base_test import BaseAPITestCase
+
+
+class OrdersListAPITest(BaseAPITestCase):
+    """
+    Тесты API списка заказов.
+
+    Этот класс тестирует эндпоинт, возвращающий список заказов пользователя.
+    """
+    def setUp(self):
+        shop = Shop.objects.create(name='Магазин', owner=self.auth_user2)
+        products = [
+            Product.objects.create(name='Продукт 1', price=10, shop=shop),
+            Product.objects.create(name='Продукт 2', price=20, shop=shop),
+        ]
+        for _ in range(3):
+            order = Order.objects.create(customer=self.auth_user1)
+            for product in products:
+                OrderItem.objects.create(order=order, product=product, quantity=2)
+
+        self.url = reverse('order-list')
+
+    def test_get_orders_list(self):
+        """Получение списка заказов вместе с элементами"""
+        self.authenticate(self.auth_user1)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(response.data[0]['items']), 2)
+
+    def test_get_orders_list_with_fields(self):
+        """Получение списка заказов без вложенных элементов"""
+        self.authenticate(self.auth_user1)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'fields': 'id,status,total_amount'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'id', 'status', 'total_amount'})
+
+    def test_get_orders_list_with_expanded_products(self):
+        """Получение списка заказов с раскрытыми продуктами в элементах"""
+        self.authenticate(self.auth_user1)
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, {'expand': 'items.product'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['items'][0]['product']['name'], 'Продукт 1')
+
+
+class OrderItemSnapshotTest(BaseAPITestCase):
+    """
+    Тесты снимка продукта в элементах заказа.
+
+    Этот класс тестирует копирование данных продукта при оформлении заказа,
+    независимость истории заказов от каталога и заполнение снимка у старых записей.
+    """
+    def setUp(self):
+        self.shop = Shop.objects.create(name='Магазин', owner=self.auth_user2)
+        self.product = Product.objects.create(name='Продукт', price=100, discount=10, shop=self.shop)
+
+    def test_checkout_copies_product(self):
+        """Заказ хранит цену на момент покупки и переживает удаление продукта"""
+        self.authenticate(self.auth_user1)
+        self.client.post(reverse('cart-item-list'), {'product': self.product.pk, 'quantity': 2}, format='json')
+        response = self.client.post(reverse('order-list'))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        Product.objects.filter(pk=self.product.pk).update(price=500)
+        self.product.delete()
+        item = self.client.get(reverse('order-detail', args=(response.data['id'],))).data['items'][0]
+        self.assertEqual(item['product'], None)
+        self.assertEqual((item['product_name'], item['unit_price'], item['discount'], item['shop'], item['shop_name']),
+                         ('Продукт', '100.00', 10, self.shop.pk, 'Магазин'))
+        self.assertEqual(item['total_amount'], '180.00')
+
+    def test_backfill(self):
+        """Пустой снимок заполняется пачками из текущих данных продукта"""
+        order = Order.objects.create(customer=self.auth_user1)
+        items = [OrderItem.objects.create(order=order, product=self.product) for _ in range(3)]
+        OrderItem.objects.update(product_name='', unit_price=0, discount=0, shop=None, shop_name='')
+
+        backfill_snapshots = import_module('apps.orders.migrations.0006_backfill_orderitem_snapshot').backfill_snapshots
+        self.assertEqual(backfill_snapshots(OrderItem, batch_size=2), 3)
+        self.assertEqual(backfill_snapshots(OrderItem, batch_size=2), 0)
+        item = OrderItem.objects.get(pk=items[-1].pk)
+        self.assertEqual((item.product_name, item.unit_price, item.discount, item.shop_id, item.shop_name),
+                         ('Продукт', 100, 10, self.shop.pk, 'Магазин'))
+
+
+class OrdersBulkStatusAPITest(BaseAPITestCase):
+    """
+    Тесты API массовой смены статуса заказов.
+
+    Этот класс тестирует эндпоинт, переводящий заказы в новый статус одним запросом.
+    """
+    def setUp(self):
+        self.pending = [Order.objects.create(customer=self.auth_user1) for _ in range(3)]
+        self.delivered = Order.objects.create(customer=self.auth_user1, status='delivered')
+        self.shipped = Order.objects.create(customer=self.auth_user2, status='shipped')
+        self.url = reverse('order-bulk-status')
+
+    def post(self, ids, new_status):
+        return self.client.post(self.url, {'ids': ids, 'status': new_status}, format='json')
+
+    def test_valid_transitions_in_one_update(self):
+        """Заказы в допустимом статусе переводятся одним UPDATE, остальные пропускаются"""
+        self.authenticate(self.admin_user)
+        ids = [order.pk for order in self.pending] + [self.delivered.pk, 999999]
+
+        with self.assertNumQueries(2):  # пользователь из токена и UPDATE
+            response = self.post(ids, 'processing')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'status': 'processing', 'updated': 3, 'skipped': 2})
+        self.assertEqual(Order.objects.filter(status='processing').count(), 3)
+        self.delivered.refresh_from_db()
+        self.assertEqual(self.delivered.status, 'delivered')
+
+    def test_delivered_sets_arrival_date(self):
+        """При доставке пустая дата прибытия заполняется"""
+        self.authenticate(self.admin_user)
+        response = self.post([self.shipped.pk], 'delivered')
+
+        self.assertEqual(response.data['updated'], 1)
+        self.shipped.refresh_from_db()
+        self.assertIsNotNone(self.shipped.arrival_date)
+
+    def test_invalid_request(self):
+        """Статус без входящих переходов и пустой список отклоняются"""
+        self.authenticate(self.admin_user)
+
+        self.assertEqual(self.post([self.shipped.pk], 'pending').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.post([], 'shipped').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_only_staff(self):
+        """Обычный пользователь не может менять статусы"""
+        self.authenticate(self.auth_user1)
+        response = self.post([self.pending[0].pk], 'canceled')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Order.objects.filter(status='canceled').count(), 0)
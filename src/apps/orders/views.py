@@ -1,23 +1,34 @@
 from typing import List
 
-from django.db.models import QuerySet
+from django.conf import settings
+from django.db.models import Prefetch, QuerySet
 from django.db.transaction import atomic
-from drf_spectacular.utils import extend_schema
-from rest_framework import viewsets, permissions, status
+from django.shortcuts import get_object_or_404
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import generics, permissions, serializers, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
+from apps.products.models import Product
+from apps.shops.models import Shop
+from base.idempotency import idempotent
+from base.permissions import IsShopOwner
+from base.views import DynamicFieldsViewSetMixin, FanOutListMixin
+from core.sharding import fan_out, is_cross_database, shard_for, shard_for_pk
 from .models import CartItem, Order, OrderItem
-from .serializers import CartItemSerializer, OrderSerializer
+from .serializers import (CartItemSerializer, FulfilmentClaimSerializer, FulfilmentLineSerializer,
+                          FulfilmentStatusSerializer, GuestCartSerializer, OrderSerializer, OrderStatusBulkSerializer)
 
 
 @extend_schema(tags=["CartItem"])
-class CartItemViewSet(viewsets.ModelViewSet):
+class CartItemViewSet(DynamicFieldsViewSetMixin, viewsets.ModelViewSet):
     """Набор представлений для просмотра и модификации элементов корзины"""
 
     http_method_names = ['get', 'post', 'patch', 'delete']  # убрали PUT, так как обновлять будем только quantity
     serializer_class = CartItemSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scopes = {'create': 'cart', 'partial_update': 'cart', 'destroy': 'cart'}
 
     def get_queryset(self) -> QuerySet[CartItem]:
         """
@@ -28,8 +39,9 @@ class CartItemViewSet(viewsets.ModelViewSet):
         :return: Набор запросов элементов корзины, принадлежащих текущему пользователю.
         :rtype: QuerySet[CartItem]
         """
-        return CartItem.objects.filter(user=self.request.user)
+        return CartItem.objects.for_customer(self.request.user.pk).filter(user=self.request.user)
 
+    @idempotent
     def create(self, request, *args, **kwargs) -> Response:
         """
         Переопределяет метод создания объекта.
@@ -99,28 +111,79 @@ class CartItemViewSet(viewsets.ModelViewSet):
         return super().partial_update(request, *args, **kwargs)
 
 
+@extend_schema(tags=["CartItem"])
+class GuestCartView(generics.GenericAPIView):
+    """
+    Корзина гостя без учетной записи.
+
+    Содержимое корзины хранится в подписанном токене на стороне клиента,
+    поэтому просмотр и изменение корзины гостем не пишут в базу данных.
+    При входе токен передается в поле `guest_cart` и корзина переносится
+    в корзину пользователя.
+    """
+
+    serializer_class = GuestCartSerializer
+    permission_classes = [permissions.AllowAny]
+    throttle_scopes = {'post': 'cart'}
+
+    @extend_schema(parameters=[OpenApiParameter('cart', str, description='Токен корзины гостя.')])
+    def get(self, request, *args, **kwargs) -> Response:
+        """
+        Возвращает содержимое корзины из токена `?cart=`.
+
+        :param request: Объект запроса, содержащий все данные HTTP запроса.
+        :type request: Request
+
+        :return: Объект ответа с токеном и содержимым корзины.
+        :rtype: Response
+        """
+        items = self.get_serializer().validate_cart(request.query_params.get('cart', ''))
+        return Response(self.get_serializer(items).data)
+
+    def post(self, request, *args, **kwargs) -> Response:
+        """
+        Задает количество продукта в корзине гостя.
+
+        :param request: Объект запроса, содержащий все данные HTTP запроса.
+        :type request: Request
+
+        :return: Объект ответа с новым токеном и содержимым корзины.
+        :rtype: Response
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(self.get_serializer(serializer.validated_data['items']).data)
+
+
 @extend_schema(tags=["Order"])
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(FanOutListMixin, DynamicFieldsViewSetMixin, viewsets.ModelViewSet):
     """Набор представлений для просмотра и модификации заказов"""
 
     serializer_class = OrderSerializer
+    throttle_scopes = {'create': 'orders'}
 
     def get_queryset(self) -> QuerySet[Order]:
         """
         Переопределяет метод получения набора запросов элементов корзины.
 
         Возвращает элементы по следующим правилам:
-        - для администратора - все записи;
-        - для текущего пользователя - только его записи.
+        - для администратора - все записи (список собирается со всех шардов,
+          отдельный заказ читается из шарда, определенного по его идентификатору);
+        - для текущего пользователя - только его записи из его шарда.
 
         :return: Набор запросов элементов корзины, принадлежащих текущему пользователю.
         :rtype: QuerySet[Order]
         """
         if self.request.user.is_staff:
-            return Order.objects.all()
+            pk = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+            if pk is None:
+                return Order.objects.all()
+            shard = shard_for_pk(pk)
+            return Order.objects.using(shard) if shard else Order.objects.none()
         else:
-            return Order.objects.filter(customer=self.request.user)
+            return Order.objects.for_customer(self.request.user.pk).filter(customer=self.request.user)
 
+    @idempotent
     def create(self, request, *args, **kwargs) -> Response:
         """
         Переопределяет метод создания объекта.
@@ -136,16 +199,34 @@ class OrderViewSet(viewsets.ModelViewSet):
         :return: Объект ответа с созданными данными.
         :rtype: Response
         """
-        cart_items = CartItem.objects.select_related('product').filter(user=request.user)
-
-        if not cart_items.exists():
+        shard = shard_for(request.user.pk)
+        cart_items = CartItem.objects.using(shard).filter(user=request.user)
+        if is_cross_database(CartItem, Product):  # JOIN с каталогом из другой базы данных невозможен
+            cart_items = cart_items.prefetch_related(Prefetch('product', queryset=Product.objects.select_related('shop')))
+        else:
+            cart_items = cart_items.select_related('product__shop')
+
+        # продукт мог быть удален из каталога в другой базе данных, пока шард еще не очищен
+        available = []
+        for item in cart_items:
+            try:
+                available.append((item, item.product))
+            except Product.DoesNotExist:
+                pass
+        if not available:
             return Response(data={'detail': 'Корзина пустая, нечего добавить'}, status=status.HTTP_400_BAD_REQUEST)
 
-        with atomic():
+        with atomic(using=shard):
             order = Order.objects.create(customer=request.user)
-            for item in cart_items:
-                order_item = OrderItem(order=order, product=item.product, quantity=item.quantity)
-                order_item.save()
+            order_items = []
+            for item, product in available:
+                order_item = OrderItem(order=order, quantity=item.quantity)
+                order_item.fill_snapshot(product)
+                order_item.total_amount = order_item.calculate_total_amount()
+                order_items.append(order_item)
+            # bulk_create не вызывает сигналы, поэтому общая цена заказа считается один раз
+            OrderItem.objects.bulk_create(order_items)
+            order.calculate_total_amount()
             cart_items.delete()
 
         serializer = self.get_serializer(instance=order)
@@ -158,8 +239,107 @@ class OrderViewSet(viewsets.ModelViewSet):
         :return: Список экземпляров классов разрешений.
         :rtype: List[BasePermission]
         """
-        if self.action in ['update', 'partial_update', 'destroy']:
+        if self.action in ['update', 'partial_update', 'destroy', 'bulk_status']:
             permission_classes = [permissions.IsAdminUser]
         else:
             permission_classes = [permissions.IsAuthenticated]
-        return [permission() for permission in permission_classes]
\ No newline at end of file
+        return [permission() for permission in permission_classes]
+
+    @extend_schema(request=OrderStatusBulkSerializer, responses=OrderStatusBulkSerializer)
+    @action(detail=False, methods=['post'], url_path='status', serializer_class=OrderStatusBulkSerializer)
+    def bulk_status(self, request, *args, **kwargs) -> Response:
+        """
+        Переводит заказы из списка `ids` в статус `status` одним запросом UPDATE на каждый шард.
+
+        Заказы, из текущего статуса которых нельзя перейти в новый, не изменяются.
+        Доступно только администраторам.
+
+        :param request: Объект запроса, содержащий все данные HTTP запроса.
+        :type request: Request
+
+        :return: Объект ответа с количеством измененных и пропущенных заказов.
+        :rtype: Response
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+@extend_schema(tags=["Fulfilment"])
+class FulfilmentViewSet(viewsets.GenericViewSet):
+    """
+    Очередь сборки магазина: элементы незавершенных заказов с продуктами магазина.
+
+    Сборщики забирают элементы пачками (`claim`), параллельные захваты не пересекаются,
+    затем отмечают их собранными или возвращают в очередь (`update_status`).
+    Доступно владельцу магазина и администраторам.
+    """
+
+    serializer_class = FulfilmentLineSerializer
+    permission_classes = [IsShopOwner]
+
+    def get_shop(self) -> Shop:
+        """
+        Возвращает магазин из адреса и проверяет права на него.
+
+        :return: Магазин.
+        :rtype: Shop
+        """
+        shop = get_object_or_404(Shop.objects.only('pk', 'owner_id'), pk=self.kwargs['shop_pk'])
+        self.check_object_permissions(self.request, shop)
+        return shop
+
+    @extend_schema(parameters=[OpenApiParameter('limit', int, description='Количество элементов.')])
+    def list(self, request, *args, **kwargs) -> Response:
+        """
+        Возвращает первые элементы очереди сборки (по умолчанию `FULFILMENT['LIST_LIMIT']`)
+        со всех шардов, от старых к новым, включая уже захваченные.
+
+        :param request: Объект запроса, содержащий все данные HTTP запроса.
+        :type request: Request
+
+        :return: Объект ответа со списком элементов.
+        :rtype: Response
+        """
+        shop = self.get_shop()
+        max_limit = settings.FULFILMENT['LIST_LIMIT']
+        limit = serializers.IntegerField(min_value=1, max_value=max_limit).run_validation(
+            request.query_params.get('limit', max_limit))
+        lines = fan_out(OrderItem.objects.fulfilment_queue(shop.pk)[:limit])[:limit]
+        return Response(self.get_serializer(lines, many=True).data)
+
+    @extend_schema(request=FulfilmentClaimSerializer, responses=FulfilmentLineSerializer(many=True))
+    def claim(self, request, *args, **kwargs) -> Response:
+        """
+        Захватывает для текущего пользователя пачку свободных элементов очереди.
+
+        :param request: Объект запроса, содержащий все данные HTTP запроса.
+        :type request: Request
+
+        :return: Объект ответа с захваченными элементами (пустой список, если очередь пуста).
+        :rtype: Response
+        """
+        shop = self.get_shop()
+        serializer = FulfilmentClaimSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        lines = OrderItem.objects.claim(shop.pk, request.user, serializer.validated_data['size'])
+        return Response(self.get_serializer(lines, many=True).data)
+
+    @extend_schema(request=FulfilmentStatusSerializer, responses=FulfilmentStatusSerializer)
+    def update_status(self, request, *args, **kwargs) -> Response:
+        """
+        Отмечает захваченные текущим пользователем элементы собранными
+        или возвращает их в очередь, одним запросом UPDATE на каждый шард.
+
+        :param request: Объект запроса, содержащий все данные HTTP запроса.
+        :type request: Request
+
+        :return: Объект ответа с количеством измененных и пропущенных элементов.
+        :rtype: Response
+        """
+        shop = self.get_shop()
+        serializer = FulfilmentStatusSerializer(data=request.data, context={'request': request, 'shop': shop})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
@@ -1,21 +1,27 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
+from base.admin import LargeTableAdmin
 from .models import Category, Product
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name',)
+    list_display = ('id', 'name', 'parent', 'path',)
     list_display_links = ('id', 'name',)
-    ordering = ('name',)
+    list_select_related = ('parent',)
+    ordering = ('path',)
     search_fields = ('name',)
+    autocomplete_fields = ('parent',)
+    readonly_fields = ('path',)
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdmin):
     list_display = ('name', 'shop', 'price', 'discount',)
     list_display_links = ('name', 'shop',)
     list_editable = ('discount',)
+    list_select_related = ('shop',)
     ordering = ('price',)
-    search_fields = ('name', 'shop__name',)
\ No newline at end of file
+    search_fields = ('name', 'shop__name',)
+    autocomplete_fields = ('shop', 'categories',)
\ No newline at end of file
@@ -0,0 +1,120 @@
+from typing import Any, Dict, List, Mapping
+
+from django.conf import settings
+from django.db.models import Count, Q, QuerySet
+from rest_framework.pagination import LimitOffsetPagination
+
+from apps.shops.models import Shop
+from core.cache import get_entry, get_tag_versions, make_entry_key, model_tag, set_entry
+from .models import Category, Product
+
+
+# параметры фильтров, от которых зависят счетчики; страница, сортировка и поля - нет
+FILTER_PARAMS = ('search', 'category', 'shop', 'price_min', 'price_max', 'discount_min')
+
+
+class FacetsPagination(LimitOffsetPagination):
+    """
+    Пагинация списка продуктов со счетчиками: `?limit=` и `?offset=`.
+
+    Количество продуктов уже посчитано вместе со счетчиками (и может быть взято из кэша),
+    поэтому отдельный запрос COUNT не выполняется.
+    """
+
+    def __init__(self, count: int):
+        self.default_limit = settings.FACETS['PAGE_SIZE']
+        self.max_limit = settings.FACETS['MAX_PAGE_SIZE']
+        self.known_count = count
+
+    def get_count(self, queryset) -> int:
+        return self.known_count
+
+
+def get_price_bands() -> List[tuple]:
+    """Диапазоны цен [min, max) из `FACETS['PRICE_BANDS']`, у последнего max равен None."""
+    bounds = settings.FACETS['PRICE_BANDS']
+    return list(zip(bounds, (*bounds[1:], None)))
+
+
+def compute_facets(queryset: QuerySet) -> Dict[str, Any]:
+    """
+    Считает количество продуктов выборки по магазинам, диапазонам цен,
+    уровням скидки и категориям.
+
+    Магазины, цены и скидки считаются одним запросом с группировкой по магазину:
+    счетчики диапазонов цен и скидок - условные агрегаты `COUNT(...) FILTER (WHERE ...)`
+    в той же строке и затем суммируются по магазинам. Категории (связь "многие ко многим")
+    считаются вторым запросом с группировкой по промежуточной таблице.
+
+    :param queryset: Отфильтрованный набор запросов продуктов.
+    :type queryset: QuerySet[Product]
+
+    :return: Словарь {"count", "shop", "price", "discount", "category"}.
+    :rtype: Dict[str, Any]
+    """
+    config = settings.FACETS
+    queryset = queryset.order_by().prefetch_related(None)
+    bands = get_price_bands()
+    aggregates = {
+        f'price_{index}': Count('pk', filter=Q(price__gte=low) & (Q(price__lt=high) if high is not None else Q()))
+        for index, (low, high) in enumerate(bands)
+    }
+    aggregates.update({
+        f'discount_{level}': Count('pk', filter=Q(discount__gte=level)) for level in config['DISCOUNT_LEVELS']
+    })
+    rows = list(queryset.values('shop_id', 'shop__name').annotate(count=Count('pk'), **aggregates))
+
+    shops = sorted(rows, key=lambda row: (-row['count'], row['shop__name']))[:config['MAX_VALUES']]
+    categories = (Product.categories.through.objects
+                  .filter(product__in=queryset.values('pk'))
+                  .values('category_id', 'category__name')
+                  .annotate(count=Count('product_id'))
+                  .order_by('-count', 'category__name')[:config['MAX_VALUES']])
+
+    return {
+        'count': sum(row['count'] for row in rows),
+        'shop': [{'id': row['shop_id'], 'name': row['shop__name'], 'count': row['count']} for row in shops],
+        'price': [
+            {'min': low, 'max': high, 'count': sum(row[f'price_{index}'] for row in rows)}
+            for index, (low, high) in enumerate(bands)
+        ],
+        'discount': [
+            {'min': level, 'count': sum(row[f'discount_{level}'] for row in rows)}
+            for level in config['DISCOUNT_LEVELS']
+        ],
+        'category': [
+            {'id': row['category_id'], 'name': row['category__name'], 'count': row['count']}
+            for row in categories
+        ],
+    }
+
+
+def get_facets(queryset: QuerySet, params: Mapping[str, str]) -> Dict[str, Any]:
+    """
+    Возвращает счетчики из кэша ответов или считает и сохраняет их.
+
+    Ключ записи зависит только от параметров фильтров, поэтому запросы с разной
+    страницей, сортировкой или набором полей получают одни и те же счетчики.
+    Запись помечается тегами продуктов, категорий и магазинов (см. `core.cache`).
+
+    :param queryset: Отфильтрованный набор запросов продуктов.
+    :type queryset: QuerySet[Product]
+    :param params: Параметры запроса.
+    :type params: Mapping[str, str]
+
+    :return: Счетчики, как в `compute_facets`.
+    :rtype: Dict[str, Any]
+    """
+    config = settings.RESPONSE_CACHE
+    if not config['ENABLED']:
+        return compute_facets(queryset)
+
+    key = make_entry_key('product-facets', *(f'{name}={params.get(name, "")}' for name in FILTER_PARAMS))
+    entry = get_entry(key)
+    if entry is not None:
+        return entry['facets']
+
+    versions = get_tag_versions((model_tag(Product), model_tag(Category), model_tag(Shop)))
+    facets = compute_facets(queryset)
+    set_entry(key, versions, {'facets': facets}, config['TIMEOUT'])
+    return facets
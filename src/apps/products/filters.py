@@ -0,0 +1,73 @@
+from django.db.models import QuerySet
+from rest_framework import filters, serializers
+
+from .models import Category, Product
+
+
+class CategorySubtreeFilter(filters.BaseFilterBackend):
+    """
+    Фильтр продуктов по категории вместе со всеми ее подкатегориями: `?category=<id>`.
+
+    Путь категории читается по первичному ключу, затем продукты выбираются
+    полусоединением с промежуточной таблицей по префиксу пути (`LIKE 'путь%'` по индексу),
+    поэтому продукт из нескольких категорий поддерева не повторяется.
+    """
+
+    query_param = 'category'
+
+    def filter_queryset(self, request, queryset: QuerySet, view) -> QuerySet:
+        value = request.query_params.get(self.query_param)
+        if value is None:
+            return queryset
+        category_id = serializers.IntegerField(min_value=1).run_validation(value)
+        path = Category.objects.filter(pk=category_id).values_list('path', flat=True).first()
+        if path is None:
+            return queryset.none()
+        product_ids = (Product.categories.through.objects
+                       .filter(category__path__startswith=path)
+                       .values('product_id'))
+        return queryset.filter(pk__in=product_ids)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Категория; продукты подкатегорий тоже попадают в выборку.',
+            'schema': {'type': 'integer'},
+        }]
+
+
+class ProductFacetFilter(filters.BaseFilterBackend):
+    """
+    Фильтры боковой панели каталога: `?shop=1,2`, `?price_min=`, `?price_max=`, `?discount_min=`.
+
+    Значения совпадают с границами счетчиков из `apps.products.facets`.
+    """
+
+    def filter_queryset(self, request, queryset: QuerySet, view) -> QuerySet:
+        params = request.query_params
+        if params.get('shop'):
+            shops = serializers.ListField(child=serializers.IntegerField(min_value=1), max_length=100)
+            queryset = queryset.filter(shop__in=shops.run_validation(params['shop'].split(',')))
+        price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+        if params.get('price_min'):
+            queryset = queryset.filter(price__gte=price.run_validation(params['price_min']))
+        if params.get('price_max'):
+            queryset = queryset.filter(price__lt=price.run_validation(params['price_max']))
+        if params.get('discount_min'):
+            discount = serializers.IntegerField(min_value=0, max_value=100)
+            queryset = queryset.filter(discount__gte=discount.run_validation(params['discount_min']))
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        descriptions = {
+            'shop': ('string', 'Магазины через запятую.'),
+            'price_min': ('number', 'Цена от (включительно).'),
+            'price_max': ('number', 'Цена до (не включительно).'),
+            'discount_min': ('integer', 'Скидка от, %.'),
+        }
+        return [
+            {'name': name, 'required': False, 'in': 'query', 'description': description, 'schema': {'type': kind}}
+            for name, (kind, description) in descriptions.items()
+        ]
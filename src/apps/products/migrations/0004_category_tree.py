@@ -0,0 +1,37 @@
+# Generated by Django 5.1.15 on 2026-10-19 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+
+
+def fill_paths(apps, schema_editor):
+    # существующие категории становятся корневыми: путь из одного id
+    Category = apps.get_model('products', 'Category')
+    Category.objects.using(schema_editor.connection.alias).update(
+        path=Concat(Cast('id', CharField()), Value('/')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT,
+                                    related_name='children', related_query_name='child', to='products.category',
+                                    verbose_name='Родительская категория'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255, verbose_name='Путь'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
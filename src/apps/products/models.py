@@ -1,10 +1,25 @@
 from django.core import validators
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
 from django.utils.translation import gettext_lazy as _
 
+from core.cache import instance_tag, invalidate_tags_on_commit, model_tag
+
+
+PATH_SEPARATOR = '/'
+
 
 class Category(models.Model):
-    """Модель категории продукта"""
+    """
+    Модель категории продукта.
+
+    Категории образуют дерево. Поле `path` хранит материализованный путь -
+    идентификаторы предков и самой категории через "/" (например, "1/5/12/"),
+    поэтому поддерево выбирается одним запросом `path__startswith` по индексу,
+    а перенос поддерева - одним UPDATE.
+    """
 
     name = models.CharField(
         _('Название'),
@@ -16,6 +31,19 @@ class Category(models.Model):
         max_length=1024,
         null=True, blank=True,
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        null=True, blank=True,
+        related_name='children', related_query_name='child',
+        verbose_name=_('Родительская категория'),
+    )
+    path = models.CharField(
+        _('Путь'),
+        max_length=255,
+        db_index=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = _('Категория')
@@ -24,6 +52,84 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def depth(self) -> int:
+        """Глубина категории в дереве, у корневой - 0."""
+        return self.path.count(PATH_SEPARATOR) - 1
+
+    def get_path(self) -> str:
+        """
+        Вычисляет путь категории по пути родителя.
+
+        :return: Материализованный путь.
+        :rtype: str
+        """
+        prefix = self.parent.path if self.parent_id else ''
+        return f'{prefix}{self.pk}{PATH_SEPARATOR}'
+
+    def is_descendant_of(self, category: 'Category') -> bool:
+        """
+        Проверяет, лежит ли категория в поддереве `category` (включая ее саму).
+
+        :param category: Предполагаемый предок.
+        :type category: Category
+
+        :return: True, если категория в поддереве.
+        :rtype: bool
+        """
+        return bool(self.path) and self.path.startswith(category.path)
+
+    def get_descendants(self, include_self: bool = False) -> models.QuerySet:
+        """
+        Возвращает все категории поддерева в порядке обхода в глубину.
+
+        :param include_self: Включить саму категорию.
+        :type include_self: bool
+
+        :return: Набор запросов.
+        :rtype: QuerySet[Category]
+        """
+        queryset = Category.objects.filter(path__startswith=self.path).order_by('path')
+        return queryset if include_self else queryset.exclude(pk=self.pk)
+
+    def clean(self):
+        if self.parent_id and self.pk and self.parent.is_descendant_of(self):
+            raise ValidationError({'parent': _('Категорию нельзя перенести в ее собственное поддерево.')})
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет категорию и поддерживает материализованный путь.
+
+        Строки категории и ее родителя блокируются (`select_for_update`) до проверки
+        на цикл, а пути берутся из базы, поэтому параллельный перенос не создаст цикл
+        и не перезапишет пути поддерева устаревшими.
+        Новой категории путь назначается после вставки, когда известен id.
+        При смене родителя пути всего поддерева меняются одним запросом UPDATE
+        заменой старого префикса на новый.
+        """
+        with transaction.atomic():
+            pks = [pk for pk in (self.pk, self.parent_id) if pk is not None]
+            paths = dict(Category.objects.select_for_update().filter(pk__in=pks).order_by('pk')
+                         .values_list('pk', 'path'))
+            old_path, parent_path = paths.get(self.pk, ''), paths.get(self.parent_id, '')
+            if self.parent_id and old_path and parent_path.startswith(old_path):
+                raise ValueError('Категорию нельзя перенести в ее собственное поддерево.')
+
+            self.path = old_path
+            super().save(*args, **kwargs)
+            new_path = f'{parent_path}{self.pk}{PATH_SEPARATOR}'
+            if old_path == new_path:
+                return
+            if not old_path:
+                Category.objects.filter(pk=self.pk).update(path=new_path)
+            else:
+                subtree = Category.objects.filter(path__startswith=old_path)
+                moved = list(subtree.values_list('pk', flat=True))
+                subtree.update(path=Concat(Value(new_path), Substr('path', len(old_path) + 1)))
+                # массовое обновление не отправляет сигналы, ответы о потомках в кэше устарели
+                invalidate_tags_on_commit({model_tag(Category)} | {instance_tag(Category, pk) for pk in moved})
+            self.path = new_path
+
 
 class Product(models.Model):
     """Модель продукта"""
@@ -75,6 +181,7 @@ class Product(models.Model):
         verbose_name_plural = _('Продукты')
         constraints = (models.UniqueConstraint(fields=('name', 'shop'),
                                                name='product_in_shop_unique_constraint'),)
+        indexes = (models.Index(fields=('price',), name='product_price_idx'),)
 
     def __str__(self):
         return f'{self.name} ({self.shop.name})'
\ No newline at end of file
@@ -1,27 +1,66 @@
+from django.conf import settings
 from rest_framework import serializers
 
 from apps.shops.models import Shop
+from base.serializers import DynamicFieldsModelSerializer
 from .models import Category, Product
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(DynamicFieldsModelSerializer):
     """Сериализатор для модели категории продукта"""
 
     class Meta:
         model = Category
-        fields = ('id', 'name', 'description',)
+        fields = ('id', 'name', 'description', 'parent', 'path',)
+        read_only_fields = ('path',)
 
+    def validate_parent(self, parent):
+        if parent is not None and self.instance is not None and parent.is_descendant_of(self.instance):
+            raise serializers.ValidationError("Категорию нельзя перенести в ее собственное поддерево.")
+        return parent
 
-class ProductSerializer(serializers.ModelSerializer):
+
+class ProductSerializer(DynamicFieldsModelSerializer):
     """Сериализатор для модели продукта"""
 
     class Meta:
         model = Product
         fields = ('id', 'name', 'price', 'image', 'description',
                   'added_at', 'discount', 'shop', 'categories')
+        expandable_fields = {
+            'shop': ('apps.shops.serializers.ShopSerializer', {}),
+            'categories': ('apps.products.serializers.CategorySerializer', {'many': True}),
+        }
 
     def validate(self, attrs):
         shop = attrs.get('shop')
         if not shop.owner == self.context['request'].user:
             raise serializers.ValidationError("Вы не можете создавать продукты в этом магазине.")
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    """Сериализатор параметров и вариантов автодополнения названий"""
+
+    q = serializers.CharField(max_length=100, write_only=True, help_text='Введенный текст.')
+    limit = serializers.IntegerField(
+        min_value=1, max_value=settings.AUTOCOMPLETE['MAX_LIMIT'],
+        default=settings.AUTOCOMPLETE['LIMIT'],
+        write_only=True,
+    )
+    type = serializers.CharField(read_only=True, help_text='category, shop или product.')
+    id = serializers.IntegerField(read_only=True)
+    name = serializers.CharField(read_only=True)
+
+
+class ProductFacetsSerializer(serializers.Serializer):
+    """Сериализатор ответа со списком продуктов и счетчиками для фильтров"""
+
+    count = serializers.IntegerField(help_text='Количество продуктов в выборке.')
+    next = serializers.URLField(allow_null=True, help_text='Следующая страница (?limit=, ?offset=).')
+    previous = serializers.URLField(allow_null=True, help_text='Предыдущая страница.')
+    results = ProductSerializer(many=True)
+    facets = serializers.DictField(
+        help_text='Счетчики: shop и category - [{"id", "name", "count"}], '
+                  'price - [{"min", "max", "count"}], discount - [{"min", "count"}].',
+    )
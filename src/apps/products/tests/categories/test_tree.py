@@ -0,0 +1,89 @@
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from apps.products.models import Category, Product
+from apps.shops.models import Shop
+from tests.base_test import BaseAPITestCase
+
+
+class CategoryTreeAPITest(BaseAPITestCase):
+    """
+    Тесты дерева категорий.
+
+    Этот класс тестирует материализованные пути, выдачу поддерева одним запросом,
+    фильтр продуктов по поддереву и перенос поддерева.
+    """
+    def setUp(self):
+        self.electronics = Category.objects.create(name='Электроника')
+        self.computers = Category.objects.create(name='Компьютеры', parent=self.electronics)
+        self.laptops = Category.objects.create(name='Ноутбуки', parent=self.computers)
+        self.phones = Category.objects.create(name='Телефоны', parent=self.electronics)
+        self.books = Category.objects.create(name='Книги')
+
+        shop = Shop.objects.create(name='Магазин', owner=self.auth_user1)
+        self.laptop = Product.objects.create(name='Ноутбук', price=10, shop=shop)
+        self.laptop.categories.set([self.laptops, self.computers])
+        self.book = Product.objects.create(name='Книга', price=10, shop=shop)
+        self.book.categories.set([self.books])
+
+    def test_paths(self):
+        """Путь категории состоит из id предков и ее собственного"""
+        self.assertEqual(self.laptops.path,
+                         f'{self.electronics.pk}/{self.computers.pk}/{self.laptops.pk}/')
+        self.assertEqual(self.laptops.depth, 2)
+        self.assertEqual(list(self.electronics.get_descendants()),
+                         [self.computers, self.laptops, self.phones])
+
+    def test_subtree(self):
+        """Поддерево возвращается одним ответом с вложенными children"""
+        url = reverse('category-subtree', args=(self.electronics.pk,))
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([child['name'] for child in response.data['children']], ['Компьютеры', 'Телефоны'])
+        self.assertEqual(response.data['children'][0]['children'][0]['name'], 'Ноутбуки')
+
+    def test_products_in_subtree(self):
+        """Фильтр по категории включает продукты подкатегорий без повторов"""
+        response = self.client.get(reverse('product-list'), {'category': self.electronics.pk})
+        self.assertEqual([product['id'] for product in response.data], [self.laptop.pk])
+
+        response = self.client.get(reverse('product-list'), {'category': 10_000})
+        self.assertEqual(response.data, [])
+
+    def test_move_subtree(self):
+        """Перенос категории меняет пути всего поддерева одним запросом UPDATE"""
+        self.authenticate(self.admin_user)
+        url = reverse('category-detail', args=(self.computers.pk,))
+        response = self.client.patch(url, {'parent': self.books.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['path'], f'{self.books.pk}/{self.computers.pk}/')
+        self.laptops.refresh_from_db()
+        self.assertEqual(self.laptops.path, f'{self.books.pk}/{self.computers.pk}/{self.laptops.pk}/')
+
+        response = self.client.get(reverse('product-list'), {'category': self.books.pk})
+        self.assertEqual({product['id'] for product in response.data}, {self.laptop.pk, self.book.pk})
+
+    def test_move_into_own_subtree(self):
+        """Категорию нельзя перенести внутрь ее собственного поддерева"""
+        self.authenticate(self.admin_user)
+        url = reverse('category-detail', args=(self.electronics.pk,))
+        response = self.client.patch(url, {'parent': self.laptops.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('parent', response.data)
+
+    def test_save_stale_instance(self):
+        """Пути берутся из заблокированных строк, а не из устаревших объектов в памяти"""
+        moved = Category.objects.get(pk=self.computers.pk)
+        moved.parent = self.books
+        moved.save()
+
+        self.laptops.name = 'Ультрабуки'
+        self.laptops.save()
+        self.assertEqual(self.laptops.path, f'{self.books.pk}/{self.computers.pk}/{self.laptops.pk}/')
+        with self.assertRaises(ValueError):
+            self.books.parent = self.computers
+            self.books.save()
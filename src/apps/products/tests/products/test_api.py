@@ -48,3 +48,99 @@ class ProductsListAPITest(BaseAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, expected_data)
 
+
+
+class ProductsSparseFieldsAPITest(BaseAPITestCase):
+    """
+    Тесты параметров `fields` и `expand` API продуктов.
+
+    Этот класс тестирует выборочные поля и раскрытие связей в списке продуктов.
+    """
+    def setUp(self):
+        shop = Shop.objects.create(name='Магазин 1', owner=self.auth_user1)
+        categories = [
+            Category.objects.create(name='Продукты'),
+            Category.objects.create(name='Игры'),
+        ]
+        for index in range(5):
+            product = Product.objects.create(name=f'Продукт {index}', price=10, shop=shop,
+                                             description='Длинное описание')
+            product.categories.set(categories)
+
+        self.url = reverse('product-list')
+
+    def test_get_products_list_with_fields(self):
+        """Получение списка продуктов только с запрошенными полями"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'fields': 'id,name,price'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+        for item in response.data:
+            self.assertEqual(set(item), {'id', 'name', 'price'})
+
+    def test_get_products_list_with_expanded_relations(self):
+        """Получение списка продуктов с раскрытыми магазином и категориями"""
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'fields': 'id,name', 'expand': 'shop,categories'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        item = response.data[0]
+        self.assertEqual(set(item), {'id', 'name', 'shop', 'categories'})
+        self.assertEqual(item['shop']['name'], 'Магазин 1')
+        self.assertEqual({category['name'] for category in item['categories']}, {'Продукты', 'Игры'})
+
+    def test_get_products_list_without_params(self):
+        """Получение списка продуктов без параметров возвращает все поля"""
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        expected_data = ProductSerializer(Product.objects.all(), many=True).data
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, expected_data)
+
+
+class ProductsAsyncAPITest(BaseAPITestCase):
+    """
+    Тесты асинхронного API продуктов.
+
+    Этот класс тестирует, что асинхронные эндпоинты отдают те же данные, что и наборы представлений DRF.
+    """
+    def setUp(self):
+        shop = Shop.objects.create(name='Магазин 1', owner=self.auth_user1)
+        category = Category.objects.create(name='Игры')
+        for index in range(3):
+            product = Product.objects.create(name=f'Продукт {index}', price=10, shop=shop)
+            product.categories.add(category)
+        self.product = product
+
+    def test_async_list_matches_viewset(self):
+        """Асинхронный список продуктов совпадает со списком набора представлений"""
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('async-product-list'))
+        expected = self.client.get(reverse('product-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, expected.content)
+
+    def test_async_detail_with_params(self):
+        """Асинхронное получение продукта с выборочными полями и раскрытым магазином"""
+        params = {'fields': 'id,name', 'expand': 'shop'}
+        url = reverse('async-product-detail', kwargs={'pk': self.product.pk})
+        response = self.client.get(url, params)
+        expected = self.client.get(reverse('product-detail', kwargs={'pk': self.product.pk}), params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, expected.content)
+
+    def test_async_search(self):
+        """Поиск продуктов по имени в асинхронном списке"""
+        response = self.client.get(reverse('async-product-list'), {'search': 'Продукт 1'})
+
+        self.assertEqual([item['name'] for item in response.json()], ['Продукт 1'])
+
+    def test_async_detail_not_found(self):
+        """Получение несуществующего продукта"""
+        response = self.client.get(reverse('async-product-detail', kwargs={'pk': 100}))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from apps.products.models import Category, Product
+from apps.shops.models import Shop
+from tests.base_test import BaseAPITestCase
+
+
+class ProductFacetsAPITest(BaseAPITestCase):
+    """
+    Тесты счетчиков для фильтров каталога.
+
+    Этот класс тестирует список продуктов вместе с количеством по магазинам,
+    диапазонам цен, скидкам и категориям, а также повторное использование счетчиков из кэша.
+    """
+    def setUp(self):
+        self.first = Shop.objects.create(name='Первый', owner=self.auth_user1)
+        self.second = Shop.objects.create(name='Второй', owner=self.auth_user2)
+        self.phones = Category.objects.create(name='Телефоны')
+        self.cases = Category.objects.create(name='Чехлы')
+        for name, price, discount, shop, categories in (
+            ('Телефон', 20_000, 10, self.first, [self.phones]),
+            ('Чехол', 500, 0, self.first, [self.cases]),
+            ('Телефон с чехлом', 21_000, 30, self.second, [self.phones, self.cases]),
+        ):
+            product = Product.objects.create(name=name, price=price, discount=discount, shop=shop)
+            product.categories.set(categories)
+        self.url = reverse('product-facets')
+
+    def test_counts_in_two_queries(self):
+        """Счетчики всех измерений считаются двумя запросами с группировкой"""
+        # список с категориями продуктов, магазины с ценами и скидками, категории
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 3)
+        facets = response.data['facets']
+        self.assertEqual([(shop['name'], shop['count']) for shop in facets['shop']], [('Первый', 2), ('Второй', 1)])
+        self.assertEqual([band['count'] for band in facets['price']], [1, 0, 0, 2, 0])
+        self.assertEqual({level['min']: level['count'] for level in facets['discount']}, {0: 3, 10: 2, 25: 1, 50: 0})
+        self.assertEqual({category['name']: category['count'] for category in facets['category']},
+                         {'Телефоны': 2, 'Чехлы': 2})
+
+    def test_counts_follow_filters(self):
+        """Счетчики считаются по текущей выборке"""
+        response = self.client.get(self.url, {'search': 'Телефон', 'discount_min': 25})
+        self.assertEqual([product['name'] for product in response.data['results']], ['Телефон с чехлом'])
+        self.assertEqual(response.data['facets']['shop'], [{'id': self.second.pk, 'name': 'Второй', 'count': 1}])
+
+        response = self.client.get(reverse('product-list'), {'shop': f'{self.first.pk}', 'price_max': 1000})
+        self.assertEqual([product['name'] for product in response.data], ['Чехол'])
+
+    def test_pagination(self):
+        """Список продуктов разбит на страницы ?limit=/?offset=, счетчики считаются по всей выборке"""
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, {'limit': 2, 'ordering': 'price'})
+
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([product['name'] for product in response.data['results']], ['Чехол', 'Телефон'])
+        self.assertIsNone(response.data['previous'])
+        self.assertIn('offset=2', response.data['next'])
+        self.assertEqual(sum(shop['count'] for shop in response.data['facets']['shop']), 3)
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([product['name'] for product in response.data['results']], ['Телефон с чехлом'])
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+
+    @override_settings(RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': True})
+    def test_cached_across_pages(self):
+        """Запросы с одинаковыми фильтрами берут счетчики из кэша до изменения продуктов"""
+        self.client.get(self.url, {'shop': self.first.pk})
+        with self.assertNumQueries(1):  # только список
+            response = self.client.get(self.url, {'shop': self.first.pk, 'ordering': '-price', 'fields': 'id'})
+        self.assertEqual(response.data['count'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name='Зарядка', price=700, shop=self.first)
+        response = self.client.get(self.url, {'shop': self.first.pk})
+        self.assertEqual(response.data['count'], 3)
@@ -1,32 +1,104 @@
-from drf_spectacular.utils import extend_schema
-from rest_framework import filters, viewsets, status
+from typing import Set
+
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import filters, generics, permissions, viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from base.idempotency import idempotent
 from base.permissions import IsAdminOrReadOnly, IsOwnerOrReadOnly
+from base.views import AsyncReadOnlyView, CachedResponseMixin, DynamicFieldsViewSetMixin, ValuesListMixin
+from core import autocomplete
+from core.cache import model_tag
+from .facets import FacetsPagination, get_facets
+from .filters import CategorySubtreeFilter, ProductFacetFilter
 from .models import Category, Product
-from .serializers import CategorySerializer, ProductSerializer
+from .serializers import AutocompleteSerializer, CategorySerializer, ProductFacetsSerializer, ProductSerializer
 
 
 @extend_schema(tags=["Category"])
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CachedResponseMixin, ValuesListMixin, DynamicFieldsViewSetMixin, viewsets.ModelViewSet):
     """Набор представлений для просмотра и модификации категорий"""
 
     permission_classes = [IsAdminOrReadOnly]
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
+    @extend_schema(responses=CategorySerializer,
+                   description='Категория со всеми подкатегориями: у каждого узла список `children`.')
+    @action(detail=True)
+    def subtree(self, request, *args, **kwargs) -> Response:
+        """
+        Возвращает поддерево категории целиком.
+
+        Потомки читаются одним запросом по префиксу материализованного пути
+        и собираются в дерево в памяти.
+
+        :param request: Объект запроса, содержащий все данные HTTP запроса.
+        :type request: Request
+
+        :return: Объект ответа с корневой категорией и вложенными `children`.
+        :rtype: Response
+        """
+        root = self.get_object()
+        nodes = [root, *root.get_descendants().order_by('name')]
+        data = CategorySerializer(nodes, many=True).data
+        by_id = {}
+        for node in data:
+            node['children'] = []
+            by_id[node['id']] = node
+        for node in data[1:]:
+            by_id[node['parent']]['children'].append(node)
+        return Response(data[0])
+
 
 @extend_schema(tags=["Product"])
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CachedResponseMixin, ValuesListMixin, DynamicFieldsViewSetMixin, viewsets.ModelViewSet):
     """Набор представлений для просмотра и модификации продуктов"""
 
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsOwnerOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [CategorySubtreeFilter, ProductFacetFilter, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
     ordering_fields = '__all__'
 
+    def get_cache_tags(self) -> Set[str]:
+        tags = super().get_cache_tags()
+        if CategorySubtreeFilter.query_param in self.request.query_params:
+            # состав поддерева меняется при переносе категорий
+            tags.add(model_tag(Category))
+        return tags
+
+    @extend_schema(responses=ProductFacetsSerializer, parameters=[
+        OpenApiParameter('limit', int, description='Количество продуктов на странице.'),
+        OpenApiParameter('offset', int, description='Смещение от начала выборки.'),
+    ])
+    @action(detail=False)
+    def facets(self, request, *args, **kwargs) -> Response:
+        """
+        Возвращает список продуктов с теми же фильтрами, что и `list`,
+        и количество продуктов выборки по магазинам, ценам, скидкам и категориям.
+
+        :param request: Объект запроса, содержащий все данные HTTP запроса.
+        :type request: Request
+
+        :return: Объект ответа с полями `count`, `next`, `previous`, `results` и `facets`.
+        :rtype: Response
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        facets = {**get_facets(queryset, request.query_params)}
+        paginator = FacetsPagination(facets.pop('count'))
+        results = self.read_page(queryset, paginator)
+        return Response({
+            'count': paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': results,
+            'facets': facets,
+        })
+
+    @idempotent
     def create(self, request, *args, **kwargs) -> Response:
         """
         Переопределяет метод создания объекта.
@@ -46,3 +118,48 @@ class ProductViewSet(viewsets.ModelViewSet):
         self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+
+@extend_schema(tags=["Product"], parameters=[AutocompleteSerializer])
+class AutocompleteView(generics.GenericAPIView):
+    """
+    Автодополнение названий категорий, магазинов и продуктов.
+
+    Отвечает из индекса в памяти процесса (см. `core.autocomplete`)
+    без запросов к базе данных, поэтому подходит для запроса на каждое нажатие клавиши
+    вместо поиска `?search=` по списку продуктов.
+    """
+
+    serializer_class = AutocompleteSerializer
+    permission_classes = [permissions.AllowAny]
+
+    @extend_schema(responses=AutocompleteSerializer(many=True))
+    def get(self, request, *args, **kwargs) -> Response:
+        """
+        Возвращает лучшие варианты для текста `?q=`.
+
+        :param request: Объект запроса, содержащий все данные HTTP запроса.
+        :type request: Request
+
+        :return: Объект ответа со списком вариантов.
+        :rtype: Response
+        """
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        results = autocomplete.index.complete(serializer.validated_data['q'], serializer.validated_data['limit'])
+        return Response(self.get_serializer(results, many=True).data)
+
+
+class CategoryAsyncView(AsyncReadOnlyView):
+    """Асинхронное представление категорий только для чтения"""
+
+    queryset = Category.objects.all()
+    serializer_class = CategorySerializer
+
+
+class ProductAsyncView(AsyncReadOnlyView):
+    """Асинхронное представление продуктов только для чтения"""
+
+    queryset = Product.objects.all()
+    serializer_class = ProductSerializer
+    search_fields = ('name',)
@@ -1,14 +1,15 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
-
+from base.admin import LargeTableAdmin
 from .models import CustomUser
 
 
 @admin.register(CustomUser)
-class CartItem(admin.ModelAdmin):
+class CartItem(LargeTableAdmin):
     list_display = ('email', 'is_superuser', 'is_active', 'last_login',)
     ordering = ('-is_superuser', '-is_active',)
+    search_fields = ('email',)
 
     fieldsets = (
         (
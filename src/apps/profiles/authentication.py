@@ -0,0 +1,29 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import Token
+
+from .revocation import registry
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """
+    JWT аутентификация с проверкой отзыва токена.
+
+    Проверка выполняется по реестру в памяти процесса и не обращается к базе данных.
+    """
+
+    def get_validated_token(self, raw_token: bytes) -> Token:
+        """
+        Валидирует токен и отклоняет его, если он был отозван.
+
+        :param raw_token: Закодированный токен из заголовка запроса.
+        :type raw_token: bytes
+
+        :return: Провалидированный токен.
+        :rtype: Token
+        """
+        token = super().get_validated_token(raw_token)
+        if registry.is_revoked(token):
+            raise InvalidToken(_('Токен отозван'))
+        return token
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 08:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('profiles', '0002_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['-is_superuser', '-is_active'], name='user_admin_ordering_idx'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser
@@ -102,12 +103,46 @@ class CustomUser(AbstractUser):
     class Meta:
         verbose_name = _('Пользователь')
         verbose_name_plural = _('Пользователи')
+        indexes = (models.Index(fields=('-is_superuser', '-is_active'), name='user_admin_ordering_idx'),)
 
     def __str__(self):
         return self.email
 
 
+class RevokedToken(models.Model):
+    """
+    Модель отозванного JWT токена.
 
+    Запись с заполненным `jti` отзывает один токен (выход из системы).
+    Запись без `jti` отзывает все токены пользователя, выпущенные
+    до `revoked_at` (например, при блокировке учетной записи).
+    """
 
+    jti = models.CharField(
+        _('Идентификатор токена'),
+        max_length=255,
+        unique=True,
+        null=True, blank=True,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='revoked_tokens', related_query_name='revoked_token',
+        verbose_name=_('Пользователь'),
+    )
+    revoked_at = models.DateTimeField(
+        _('Дата отзыва'),
+        auto_now_add=True,
+        db_index=True,
+    )
+    expires_at = models.DateTimeField(
+        _('Действует до'),
+        db_index=True,
+    )
 
+    class Meta:
+        verbose_name = _('Отозванный токен')
+        verbose_name_plural = _('Отозванные токены')
 
+    def __str__(self):
+        return self.jti or f'{self.user_id}: все токены'
@@ -0,0 +1,213 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone as django_timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+from .models import RevokedToken
+
+
+DEFAULTS = {
+    # как часто (в секундах) процесс подтягивает новые записи об отзыве
+    'SYNC_INTERVAL': 5,
+    # запас (в секундах) окна повторного чтения: запись видна другим процессам только
+    # после фиксации транзакции, которая может случиться позже, чем у записей с большим `id`
+    'SYNC_MARGIN': 60,
+    # как часто (в секундах) фильтр пересобирается без истекших записей
+    'REBUILD_INTERVAL': 60 * 60,
+    # ожидаемое число отозванных токенов и допустимая доля ложных срабатываний
+    'CAPACITY': 100_000,
+    'ERROR_RATE': 0.001,
+}
+
+
+def get_revocation_settings() -> Dict[str, Any]:
+    """
+    Возвращает настройки отзыва токенов с учетом `settings.JWT_REVOCATION`.
+
+    :return: Словарь настроек.
+    :rtype: Dict[str, Any]
+    """
+    return {**DEFAULTS, **getattr(settings, 'JWT_REVOCATION', {})}
+
+
+class BloomFilter:
+    """
+    Фильтр Блума для строковых ключей.
+
+    Занимает около 1.8 байта на ключ при доле ложных срабатываний 0.1%.
+    Ложноотрицательных ответов не бывает: если ключ добавлен, `in` вернет True.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationRegistry:
+    """
+    Реестр отозванных токенов в памяти процесса.
+
+    Каждый рабочий процесс держит свою копию и раз в `SYNC_INTERVAL` секунд
+    перечитывает из таблицы `RevokedToken` записи, отозванные после прошлой
+    синхронизации с запасом `SYNC_MARGIN` секунд. Окно перекрывается с прошлым, поэтому
+    запись, транзакция которой зафиксирована позже соседних, не теряется, а уже
+    учтенные записи пропускаются по `id`. Так отзыв доходит до всех процессов за несколько секунд,
+    а проверка токена не обращается к базе данных.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Сбрасывает состояние реестра, следующая проверка загрузит его заново."""
+        config = get_revocation_settings()
+        self._filter = BloomFilter(config['CAPACITY'], config['ERROR_RATE'])
+        self._users = {}
+        # начало окна следующей синхронизации и уже учтенные записи из него
+        self._since = None
+        self._seen = set()
+        self._synced_at = -math.inf
+        self._built_at = -math.inf
+
+    def _add(self, jti: Optional[str], user_id: Any, revoked_at: datetime) -> None:
+        if jti:
+            self._filter.add(jti)
+        else:
+            key = str(user_id)
+            timestamp = revoked_at.timestamp()
+            self._users[key] = max(self._users.get(key, timestamp), timestamp)
+
+    def sync(self, force: bool = False) -> None:
+        """
+        Подтягивает новые записи об отзыве из базы данных.
+
+        :param force: Синхронизировать, даже если интервал еще не истек.
+        :type force: bool
+
+        :return: None
+        :rtype: None
+        """
+        config = get_revocation_settings()
+        if not force and time.monotonic() - self._synced_at < config['SYNC_INTERVAL']:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._synced_at < config['SYNC_INTERVAL']:
+                return
+
+            started_at = django_timezone.now()
+            queryset = RevokedToken.objects.all()
+            rebuild = (now - self._built_at >= config['REBUILD_INTERVAL']
+                       or self._filter.count > self._filter.capacity)
+            if rebuild:
+                queryset = queryset.filter(expires_at__gt=started_at)
+            else:
+                queryset = queryset.filter(revoked_at__gte=self._since)
+            rows = list(queryset.values_list('id', 'jti', 'user_id', 'revoked_at'))
+
+            if rebuild:
+                self._filter = BloomFilter(max(config['CAPACITY'], len(rows) * 2), config['ERROR_RATE'])
+                self._users = {}
+                self._seen = set()
+                self._built_at = now
+            for pk, jti, user_id, revoked_at in rows:
+                if pk not in self._seen:
+                    self._add(jti, user_id, revoked_at)
+
+            self._since = started_at - timedelta(seconds=config['SYNC_MARGIN'])
+            self._seen = {pk for pk, _, _, revoked_at in rows if revoked_at >= self._since}
+            self._synced_at = now
+
+    def is_revoked(self, token: Token) -> bool:
+        """
+        Проверяет, отозван ли токен.
+
+        Фильтр Блума может ошибаться только в положительную сторону,
+        поэтому совпадение подтверждается запросом к таблице отзывов.
+
+        :param token: Провалидированный токен.
+        :type token: Token
+
+        :return: True, если токен отозван.
+        :rtype: bool
+        """
+        self.sync()
+
+        user_revoked_at = self._users.get(str(token.get(api_settings.USER_ID_CLAIM)))
+        issued_at = token.get('iat')
+        if user_revoked_at is not None and issued_at is not None and issued_at <= user_revoked_at:
+            return True
+
+        jti = token.get(api_settings.JTI_CLAIM)
+        if jti and jti in self._filter:
+            return RevokedToken.objects.filter(jti=jti).exists()
+        return False
+
+    def revoke_token(self, token: Token) -> None:
+        """
+        Отзывает один токен.
+
+        :param token: Токен, который нужно отозвать.
+        :type token: Token
+
+        :return: None
+        :rtype: None
+        """
+        jti = token[api_settings.JTI_CLAIM]
+        revoked, _ = RevokedToken.objects.get_or_create(
+            jti=jti,
+            defaults={
+                'user_id': token[api_settings.USER_ID_CLAIM],
+                'expires_at': datetime.fromtimestamp(token['exp'], tz=timezone.utc),
+            },
+        )
+        with self._lock:
+            self._add(jti, revoked.user_id, revoked.revoked_at)
+            self._seen.add(revoked.pk)
+
+    def revoke_user(self, user) -> None:
+        """
+        Отзывает все токены пользователя, выпущенные до текущего момента.
+
+        :param user: Пользователь, токены которого нужно отозвать.
+
+        :return: None
+        :rtype: None
+        """
+        lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+        revoked = RevokedToken.objects.create(user=user, expires_at=django_timezone.now() + lifetime)
+        with self._lock:
+            self._add(None, user.pk, revoked.revoked_at)
+            self._seen.add(revoked.pk)
+
+
+registry = RevocationRegistry()
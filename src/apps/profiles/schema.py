@@ -0,0 +1,7 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class RevocableJWTScheme(SimpleJWTScheme):
+    """Описание аутентификации `RevocableJWTAuthentication` в схеме OpenAPI (как у обычного JWT)"""
+
+    target_class = 'apps.profiles.authentication.RevocableJWTAuthentication'
@@ -1,16 +1,50 @@
+from typing import Any, Dict
+
 from django.contrib.auth.models import Group
+from django.core import signing
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 
+from apps.orders import guest_cart
+from base.serializers import DynamicFieldsHyperlinkedModelSerializer
 from .models import CustomUser
+from .revocation import registry
 
 
-class CustomUserSerializer(serializers.HyperlinkedModelSerializer):
+class CustomUserSerializer(DynamicFieldsHyperlinkedModelSerializer):
     class Meta:
         model = CustomUser
         fields = ['url', 'email', 'first_name', 'last_name', 'is_staff']
 
 
-class GroupSerializer(serializers.HyperlinkedModelSerializer):
+class GroupSerializer(DynamicFieldsHyperlinkedModelSerializer):
     class Meta:
         model = Group
-        fields = ['url', 'name']
\ No newline at end of file
+        fields = ['url', 'name']
+
+
+class GuestCartTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Сериализатор входа, переносящий корзину гостя (поле `guest_cart`) в корзину пользователя"""
+
+    guest_cart = serializers.CharField(required=False, allow_blank=True, write_only=True)
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        data = super().validate(attrs)
+        if attrs.get('guest_cart'):
+            try:
+                items = guest_cart.load(attrs['guest_cart'])
+            except signing.BadSignature:
+                items = {}  # поврежденная или устаревшая корзина не мешает входу
+            data['guest_cart_merged'] = guest_cart.merge(self.user, items, attrs['guest_cart'])
+        return data
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """Сериализатор обновления токена, отклоняющий отозванные refresh токены"""
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, str]:
+        if registry.is_revoked(self.token_class(attrs['refresh'])):
+            raise InvalidToken(_('Токен отозван'))
+        return super().validate(attrs)
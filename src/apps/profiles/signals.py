@@ -0,0 +1,25 @@
+from typing import Any, Dict
+
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from .models import CustomUser
+from .revocation import registry
+
+
+@receiver(pre_save, sender=CustomUser)
+def user_deactivated_handler(
+        sender: type(CustomUser),
+        instance: CustomUser,
+        **kwargs: Dict[str, Any],
+) -> None:
+    """
+    Обработчик, вызываемый перед сохранением записи CustomUser.
+
+    При блокировке учетной записи отзывает все выпущенные ей токены.
+    """
+    if instance.pk is None or instance.is_active:
+        return
+    was_active = CustomUser.objects.filter(pk=instance.pk, is_active=True).exists()
+    if was_active:
+        registry.revoke_user(instance)
@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.utils import json
+
+from apps.profiles.models import RevokedToken
+from apps.profiles.revocation import BloomFilter, registry
+from tests.base_test import BaseAPITestCase
+
+
+class LogoutAPITest(BaseAPITestCase):
+    """
+    Тесты API выхода из системы.
+
+    Этот класс тестирует отзыв JWT токенов при выходе и блокировке пользователя.
+    """
+    def setUp(self):
+        registry.reset()
+        self.logout_url = reverse('jwt-logout')
+        self.cart_url = reverse('cart-item-list')
+
+    def test_logout_revokes_access_token(self):
+        """Access токен после выхода больше не принимается"""
+        tokens = self.get_jwt_token(self.auth_user1)
+        self.client.credentials(HTTP_AUTHORIZATION='JWT ' + tokens['access'])
+
+        response = self.client.post(self.logout_url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.get(self.cart_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_does_not_affect_other_tokens(self):
+        """Выход отзывает только текущий токен"""
+        self.authenticate(self.auth_user1)
+        self.client.post(self.logout_url)
+
+        self.authenticate(self.auth_user1)
+        with self.assertNumQueries(2):  # пользователь и элементы корзины, без проверки отзыва
+            response = self.client.get(self.cart_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_logout_revokes_refresh_token(self):
+        """Refresh токен, переданный при выходе, больше нельзя обновить"""
+        tokens = self.get_jwt_token(self.auth_user1)
+        self.client.credentials(HTTP_AUTHORIZATION='JWT ' + tokens['access'])
+        self.client.post(
+            path=self.logout_url,
+            data=json.dumps({'refresh': tokens['refresh']}),
+            content_type='application/json',
+        )
+        self.client.credentials()
+
+        response = self.client.post(
+            path=reverse('jwt-refresh'),
+            data=json.dumps({'refresh': tokens['refresh']}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_is_visible_after_sync(self):
+        """Отзыв, записанный другим процессом, подхватывается при синхронизации"""
+        self.authenticate(self.auth_user1)
+        self.client.post(self.logout_url)
+        registry.reset()
+        registry.sync(force=True)
+
+        response = self.client.get(self.cart_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_sync_rereads_recent_window(self):
+        """Запись с меньшим id, зафиксированная после синхронизации, не теряется"""
+        expires_at = timezone.now() + timedelta(hours=1)
+        late_pk = RevokedToken.objects.create(jti='late', user=self.auth_user1, expires_at=expires_at).pk
+        RevokedToken.objects.create(jti='early', user=self.auth_user1, expires_at=expires_at)
+        # транзакция с записью "late" еще не зафиксирована, когда процесс синхронизируется
+        RevokedToken.objects.filter(pk=late_pk).delete()
+        registry.sync(force=True)
+        registry.sync(force=True)
+        self.assertIn('early', registry._filter)
+        self.assertNotIn('late', registry._filter)
+
+        RevokedToken.objects.create(pk=late_pk, jti='late', user=self.auth_user1, expires_at=expires_at)
+        RevokedToken.objects.filter(pk=late_pk).update(revoked_at=timezone.now() - timedelta(seconds=10))
+        count = registry._filter.count
+        registry.sync(force=True)
+        self.assertIn('late', registry._filter)
+        self.assertEqual(registry._filter.count, count + 1)
+
+    def test_deactivation_revokes_user_tokens(self):
+        """Блокировка пользователя отзывает все его токены"""
+        self.authenticate(self.auth_user2)
+        self.auth_user2.is_active = False
+        self.auth_user2.save()
+        self.auth_user2.is_active = True
+        self.auth_user2.save()
+
+        response = self.client.get(self.cart_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(RevokedToken.objects.filter(user=self.auth_user2, jti=None).exists())
+
+
+class BloomFilterTest(BaseAPITestCase):
+    """Тесты фильтра Блума для отозванных токенов"""
+
+    def test_added_keys_are_found(self):
+        """Добавленные ключи всегда находятся"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.001)
+        keys = [f'jti-{index}' for index in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f'other-{index}' in bloom for index in range(10000))
+        self.assertLess(false_positives, 50)
@@ -1,17 +1,59 @@
 from django.contrib.auth.models import Group
-from rest_framework import permissions, viewsets
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions, status, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
+from base.views import DynamicFieldsViewSetMixin
 from .models import CustomUser
+from .revocation import registry
 from .serializers import CustomUserSerializer, GroupSerializer
 
 
-class CustomUserViewSet(viewsets.ModelViewSet):
+class CustomUserViewSet(DynamicFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = CustomUser.objects.all().order_by('-date_joined')
     serializer_class = CustomUserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class GroupViewSet(viewsets.ModelViewSet):
+class GroupViewSet(DynamicFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = Group.objects.all().order_by('name')
     serializer_class = GroupSerializer
-    permission_classes = [permissions.IsAuthenticated]
\ No newline at end of file
+    permission_classes = [permissions.IsAuthenticated]
+
+
+@extend_schema(tags=["Auth"], request=None, responses={204: None})
+class LogoutView(APIView):
+    """Выход из системы с отзывом JWT токенов"""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs) -> Response:
+        """
+        Отзывает текущий access токен и, если передан, refresh токен.
+
+        :param request: Объект запроса, содержащий все данные HTTP запроса.
+        :type request: Request
+        :param args: Дополнительные позиционные аргументы.
+        :param kwargs: Дополнительные именованные аргументы.
+
+        :return: Пустой ответ со статусом 204.
+        :rtype: Response
+        """
+        registry.revoke_token(request.auth)
+
+        raw_refresh = request.data.get('refresh')
+        if raw_refresh:
+            try:
+                refresh = RefreshToken(raw_refresh)
+            except TokenError as error:
+                raise ValidationError({'refresh': str(error)})
+            if str(refresh[api_settings.USER_ID_CLAIM]) != str(request.user.pk):
+                raise ValidationError({'refresh': 'Токен принадлежит другому пользователю'})
+            registry.revoke_token(refresh)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,9 +1,12 @@
 from django.contrib import admin
 
+from base.admin import LargeTableAdmin
 from .models import Review
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(LargeTableAdmin):
     list_display = ('product', 'grade',)
-    search_fields = ('product__name',)
\ No newline at end of file
+    list_select_related = ('product__shop',)
+    search_fields = ('product__name',)
+    autocomplete_fields = ('product', 'customer',)
\ No newline at end of file
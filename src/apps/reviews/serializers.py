@@ -0,0 +1,13 @@
+from base.serializers import DynamicFieldsModelSerializer
+from .models import Review
+
+
+class ReviewSerializer(DynamicFieldsModelSerializer):
+    """Сериализатор для модели отзыва"""
+
+    class Meta:
+        model = Review
+        fields = ('id', 'grade', 'comment', 'product', 'customer',)
+        expandable_fields = {
+            'product': ('apps.products.serializers.ProductSerializer', {}),
+        }
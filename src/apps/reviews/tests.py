@@ -1,3 +1,37 @@
-from django.test import TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
 
-# Create your tests here.
+from apps.products.models import Product
+from apps.reviews.models import Review
+from apps.shops.models import Shop
+from tests.base_test import BaseAPITestCase
+
+
+class ReviewsAsyncAPITest(BaseAPITestCase):
+    """
+    Тесты асинхронного API отзывов.
+
+    Этот класс тестирует список отзывов и отдельный отзыв.
+    """
+    def setUp(self):
+        shop = Shop.objects.create(name='Магазин 1', owner=self.auth_user1)
+        product = Product.objects.create(name='Продукт 1', price=10, shop=shop)
+        self.review = Review.objects.create(grade=5, comment='Отлично', product=product, customer=self.auth_user2)
+        Review.objects.create(grade=3, product=product, customer=self.auth_user1)
+
+    def test_get_reviews_list(self):
+        """Получение списка отзывов"""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('async-review-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_get_review_with_expanded_product(self):
+        """Получение отзыва с раскрытым продуктом"""
+        url = reverse('async-review-detail', kwargs={'pk': self.review.pk})
+        response = self.client.get(url, {'expand': 'product'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['product']['name'], 'Продукт 1')
+        self.assertEqual(response.json()['customer'], self.auth_user2.pk)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import ReviewAsyncView
+
+
+urlpatterns = [
+    path('reviews/', ReviewAsyncView.as_view(), name='async-review-list'),
+    path('reviews/<int:pk>/', ReviewAsyncView.as_view(), name='async-review-detail'),
+]
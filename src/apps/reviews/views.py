@@ -0,0 +1,10 @@
+from base.views import AsyncReadOnlyView
+from .models import Review
+from .serializers import ReviewSerializer
+
+
+class ReviewAsyncView(AsyncReadOnlyView):
+    """Асинхронное представление отзывов только для чтения"""
+
+    queryset = Review.objects.all()
+    serializer_class = ReviewSerializer
@@ -1,9 +1,10 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from apps.orders.views import CartItemViewSet, OrderViewSet
-from apps.products.views import CategoryViewSet, ProductViewSet
-from apps.shops.views import ShopViewSet
+from apps.orders.views import CartItemViewSet, FulfilmentViewSet, GuestCartView, OrderViewSet
+from apps.products.views import (AutocompleteView, CategoryAsyncView, CategoryViewSet, ProductAsyncView,
+                                 ProductViewSet)
+from apps.shops.views import ShopAsyncView, ShopViewSet
 
 
 router = routers.DefaultRouter()
@@ -17,4 +18,22 @@ router.register(r'orders', OrderViewSet, basename='order')
 urlpatterns = [
     # path('', include('apps.profiles.urls')),
     path('', include(router.urls)),
+    path('guest-cart/', GuestCartView.as_view(), name='guest-cart'),
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
+
+    # очередь сборки заказов магазина
+    path('shops/<int:shop_pk>/fulfilment/', FulfilmentViewSet.as_view({'get': 'list'}), name='fulfilment-list'),
+    path('shops/<int:shop_pk>/fulfilment/claim/', FulfilmentViewSet.as_view({'post': 'claim'}),
+         name='fulfilment-claim'),
+    path('shops/<int:shop_pk>/fulfilment/status/', FulfilmentViewSet.as_view({'post': 'update_status'}),
+         name='fulfilment-status'),
+
+    # асинхронные эндпоинты каталога только для чтения (выигрыш дают только под ASGI)
+    path('async/categories/', CategoryAsyncView.as_view(), name='async-category-list'),
+    path('async/categories/<int:pk>/', CategoryAsyncView.as_view(), name='async-category-detail'),
+    path('async/shops/', ShopAsyncView.as_view(), name='async-shop-list'),
+    path('async/shops/<int:pk>/', ShopAsyncView.as_view(), name='async-shop-detail'),
+    path('async/products/', ProductAsyncView.as_view(), name='async-product-list'),
+    path('async/products/<int:pk>/', ProductAsyncView.as_view(), name='async-product-detail'),
+    path('async/', include('apps.reviews.urls')),
 ]
\ No newline at end of file
@@ -8,4 +8,5 @@ from .models import Shop
 class ShopAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'address',)
     list_display_links = ('id', 'name',)
-    search_fields = ('name',)
\ No newline at end of file
+    search_fields = ('name',)
+    autocomplete_fields = ('owner',)
\ No newline at end of file
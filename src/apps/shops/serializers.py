@@ -1,9 +1,10 @@
 from rest_framework import serializers
 
+from base.serializers import DynamicFieldsModelSerializer
 from .models import Shop
 
 
-class ShopSerializer(serializers.ModelSerializer):
+class ShopSerializer(DynamicFieldsModelSerializer):
     """Сериализатор для модели магазина"""
 
     owner = serializers.PrimaryKeyRelatedField(
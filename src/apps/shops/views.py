@@ -2,14 +2,17 @@ from typing import List
 
 from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets, permissions
+from rest_framework.response import Response
 
+from base.idempotency import idempotent
 from base.permissions import IsOwnerOrAdmin, ReadOnly
+from base.views import AsyncReadOnlyView, CachedResponseMixin, DynamicFieldsViewSetMixin, ValuesListMixin
 from .models import Shop
 from .serializers import ShopSerializer
 
 
 @extend_schema(tags=["Shop"])
-class ShopViewSet(viewsets.ModelViewSet):
+class ShopViewSet(CachedResponseMixin, ValuesListMixin, DynamicFieldsViewSetMixin, viewsets.ModelViewSet):
     """Набор представлений для просмотра и модификации магазинов"""
 
     queryset = Shop.objects.all()
@@ -30,6 +33,20 @@ class ShopViewSet(viewsets.ModelViewSet):
             permission_classes = [ReadOnly]
         return [permission() for permission in permission_classes]
 
+    @idempotent
+    def create(self, request, *args, **kwargs) -> Response:
+        """
+        Создает магазин; повтор запроса с тем же заголовком `Idempotency-Key`
+        возвращает ответ первого запроса.
+
+        :param request: Объект запроса, содержащий все данные HTTP запроса.
+        :type request: Request
+
+        :return: Объект ответа с созданными данными.
+        :rtype: Response
+        """
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer: ShopSerializer) -> None:
         """
         Переопределяет метод создания объекта.
@@ -43,4 +60,11 @@ class ShopViewSet(viewsets.ModelViewSet):
         :return: None
         :rtype: None
         """
-        serializer.save(owner=self.request.user)
\ No newline at end of file
+        serializer.save(owner=self.request.user)
+
+
+class ShopAsyncView(AsyncReadOnlyView):
+    """Асинхронное представление магазинов только для чтения"""
+
+    queryset = Shop.objects.all()
+    serializer_class = ShopSerializer
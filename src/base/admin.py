@@ -0,0 +1,183 @@
+import copy
+import json
+from typing import Optional
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from core.sharding import get_shards, is_cross_database, is_sharded, shard_for_pk
+
+
+def estimate_count(queryset: QuerySet) -> Optional[int]:
+    """
+    Возвращает оценку количества строк набора запросов по статистике планировщика PostgreSQL.
+
+    Для набора без условий берется `pg_class.reltuples` таблицы,
+    для отфильтрованного - оценка строк из `EXPLAIN`. Оценка
+    не требует чтения таблицы, но может отличаться от точного значения.
+
+    :param queryset: Набор запросов.
+    :type queryset: QuerySet
+
+    :return: Оценка или None, если СУБД не PostgreSQL или статистики еще нет.
+    :rtype: Optional[int]
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    query = queryset.query
+    if not query.has_filters() and not query.distinct and not query.is_sliced:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+                           [connection.ops.quote_name(queryset.model._meta.db_table)])
+            row = cursor.fetchone()
+        # -1 - таблица еще не анализировалась
+        return row[0] if row and row[0] >= 0 else None
+
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    # psycopg 3 разбирает JSON сам, и Django отдает один объект вместо списка
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, который на больших таблицах не выполняет `COUNT(*)`.
+
+    Если оценка планировщика не меньше `ADMIN_ESTIMATED_COUNT_THRESHOLD`,
+    количество страниц считается по ней, иначе выполняется точный подсчет.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        if isinstance(self.object_list, QuerySet):
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Базовый класс админки для больших таблиц.
+
+    Использует `EstimatedCountPaginator` и не считает общее количество
+    строк без фильтров (`show_full_result_count`) - второй `COUNT(*)` на каждой странице.
+    Связи из `list_display` нужно указывать в `list_select_related`,
+    а внешние ключи в формах - в `autocomplete_fields`.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class ShardListFilter(admin.SimpleListFilter):
+    """Выбор шарда в списке записей шардируемой модели: `?shard=<псевдоним>`, по умолчанию первый шард."""
+
+    title = _('Шард')
+    parameter_name = 'shard'
+
+    def lookups(self, request, model_admin):
+        return [(alias, alias) for alias in get_shards()]
+
+    def has_output(self) -> bool:
+        return len(self.lookup_choices) > 1
+
+    def choices(self, changelist):
+        current = self.value() or get_shards()[0]
+        for alias, title in self.lookup_choices:
+            yield {
+                'selected': alias == current,
+                'query_string': changelist.get_query_string({self.parameter_name: alias}),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        # база данных выбирается в ShardedAdminMixin.get_queryset
+        return queryset
+
+
+class ShardedAdminMixin:
+    """
+    Примесь админки шардируемых моделей (см. `core.sharding`).
+
+    Список и действия над выбранными записями работают с шардом из фильтра `?shard=`
+    (по умолчанию с первым), а страницы записи - с шардом, которому принадлежит ее
+    идентификатор. Связи с моделями основной базы из `list_select_related` загружаются
+    `prefetch_related`, а поиск по их полям сначала выбирает идентификаторы в основной базе,
+    потому что JOIN между базами данных невозможен.
+    """
+
+    def get_shard(self, request) -> str:
+        """
+        Возвращает шард, с которым работает запрос.
+
+        :param request: Объект запроса.
+
+        :return: Псевдоним базы данных.
+        :rtype: str
+        """
+        shards = get_shards()
+        object_id = request.resolver_match.kwargs.get('object_id') if request.resolver_match else None
+        if object_id is not None:
+            return shard_for_pk(object_id) or shards[0]
+        alias = request.GET.get(ShardListFilter.parameter_name)
+        return alias if alias in shards else shards[0]
+
+    def is_cross_database_path(self, path: str) -> bool:
+        """Ведет ли путь поля (`customer__email`) в модель другой базы данных."""
+        field = self.model._meta.get_field(path.lstrip('=^@').split(LOOKUP_SEP)[0])
+        return field.is_relation and is_cross_database(self.model, field.related_model)
+
+    def get_list_filter(self, request):
+        return (ShardListFilter, *super().get_list_filter(request))
+
+    def get_list_select_related(self, request):
+        related = super().get_list_select_related(request)
+        if not isinstance(related, (list, tuple)):
+            return related
+        return [path for path in related if not self.is_cross_database_path(path)]
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request).using(self.get_shard(request))
+        related = super().get_list_select_related(request)
+        if isinstance(related, (list, tuple)):
+            queryset = queryset.prefetch_related(*(path for path in related if self.is_cross_database_path(path)))
+        return queryset
+
+    def get_search_results(self, request, queryset, search_term):
+        fields = self.get_search_fields(request)
+        remote = [path for path in fields if self.is_cross_database_path(path)]
+        if not remote or not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+
+        condition = Q()
+        for path in remote:
+            name, lookup = path.lstrip('=^@').split(LOOKUP_SEP, 1)
+            related_model = self.model._meta.get_field(name).related_model
+            pks = related_model._default_manager.filter(**{f'{lookup}__icontains': search_term.strip()})
+            condition |= Q(**{f'{name}__in': list(pks.values_list('pk', flat=True))})
+        results = queryset.filter(condition)
+
+        local = [path for path in fields if path not in remote]
+        if not local:
+            return results, False
+        # поиск Django по полям самой модели, без полей другой базы данных
+        local_admin = copy.copy(self)
+        local_admin.search_fields = local
+        local_results, may_have_duplicates = super(ShardedAdminMixin, local_admin).get_search_results(
+            request, queryset, search_term)
+        return local_results | results, may_have_duplicates
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if is_sharded(db_field.related_model):
+            kwargs.setdefault('using', self.get_shard(request))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
@@ -0,0 +1,135 @@
+import hashlib
+import time
+from functools import wraps
+from typing import Callable
+
+import orjson
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.response import Response
+
+
+HEADER = 'Idempotency-Key'
+KEY_PREFIX = 'idempotency:'
+MAX_KEY_LENGTH = 255
+# как часто повтор проверяет, сохранил ли ответ первый запрос, в секундах
+POLL_INTERVAL = 0.05
+
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Запрос с этим ключом идемпотентности еще выполняется, повторите позже.'
+    default_code = 'idempotency_conflict'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'Ключ идемпотентности уже использован для другого запроса.'
+    default_code = 'idempotency_key_reused'
+
+
+def get_fingerprint(request) -> str:
+    """
+    Возвращает отпечаток запроса: метод, путь и разобранное тело.
+
+    Отпечаток считается по `request.data`, а не по сырому телу, поэтому
+    один и тот же запрос в JSON и MessagePack дает один отпечаток.
+
+    :param request: Объект запроса DRF.
+    :type request: Request
+
+    :return: Хэш запроса.
+    :rtype: str
+    """
+    data = request.data
+    if hasattr(data, 'lists'):  # QueryDict форм
+        data = dict(data.lists())
+    body = orjson.dumps(data, default=str, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(b'\n'.join((request.method.encode(), request.path.encode(), body))).hexdigest()
+
+
+def get_cache_key(request, key: str) -> str:
+    # ключи разных пользователей не пересекаются
+    if request.user and request.user.is_authenticated:
+        owner = f'user-{request.user.pk}'
+    else:
+        owner = f'ip-{request.META.get("REMOTE_ADDR")}'
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f'{KEY_PREFIX}{owner}:{digest}'
+
+
+def replay(entry: dict) -> Response:
+    response = Response(entry['data'], status=entry['status'], headers=entry['headers'])
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(handler: Callable) -> Callable:
+    """
+    Декоратор действия набора представлений, поддерживающий заголовок `Idempotency-Key`.
+
+    Первый запрос с ключом занимает его в кэше (`cache.add`) и выполняется как обычно;
+    ответ, который вернул обработчик (с кодом меньше 500), сохраняется
+    на `IDEMPOTENCY['TIMEOUT']` секунд. Повторы с тем же ключом получают сохраненный
+    ответ с заголовком `Idempotent-Replayed: true`, не обращаясь к базе данных.
+    Повтор, пришедший, пока первый запрос выполняется, ждет его ответа не дольше
+    `IDEMPOTENCY['WAIT']` секунд, опрашивая кэш, и получает сохраненный ответ; если ответ
+    не появился за это время или тело повтора отличается, - 409. Тот же ключ с другим телом
+    после завершения первого запроса - 422. Ключ занимается
+    атомарным `add`, поэтому кэш должен быть общим для процессов и поддерживать
+    атомарные операции (см. `core.server.ATOMIC_CACHE_BACKENDS`). Если обработчик
+    выбросил исключение (в том числе ошибку валидации) или вернул ответ 5xx,
+    ключ освобождается и запрос можно повторить. Запросы без заголовка обрабатываются как раньше.
+
+    :param handler: Метод набора представлений, например `create`.
+    :type handler: Callable
+
+    :return: Обернутый метод.
+    :rtype: Callable
+    """
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        config = settings.IDEMPOTENCY
+        key = request.headers.get(HEADER)
+        if not config['ENABLED'] or key is None:
+            return handler(self, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ParseError(f'Заголовок {HEADER} должен содержать от 1 до {MAX_KEY_LENGTH} символов.')
+
+        cache = caches[config['ALIAS']]
+        cache_key = get_cache_key(request, key)
+        fingerprint = get_fingerprint(request)
+        deadline = time.monotonic() + config['WAIT']
+        # запись живет LOCK_TIMEOUT секунд, даже если процесс упал, не сохранив ответ
+        while not cache.add(cache_key, {'fingerprint': fingerprint}, config['LOCK_TIMEOUT']):
+            entry = cache.get(cache_key)
+            if entry is None:  # первый запрос не удался и освободил ключ, пробуем занять его снова
+                continue
+            if 'status' in entry:
+                if entry['fingerprint'] != fingerprint:
+                    raise IdempotencyKeyReused()
+                return replay(entry)
+            if entry['fingerprint'] != fingerprint or time.monotonic() >= deadline:
+                raise IdempotencyConflict()
+            time.sleep(POLL_INTERVAL)  # первый запрос еще выполняется, ждем его ответа
+
+        try:
+            response = handler(self, request, *args, **kwargs)
+        except BaseException:
+            cache.delete(cache_key)
+            raise
+        if not isinstance(response, Response) or response.status_code >= 500:
+            cache.delete(cache_key)
+            return response
+
+        cache.set(cache_key, {
+            'fingerprint': fingerprint,
+            'status': response.status_code,
+            'data': response.data,
+            'headers': {name: value for name, value in response.items() if name != 'Content-Type'},
+        }, config['TIMEOUT'])
+        return response
+
+    return wrapper
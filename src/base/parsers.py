@@ -0,0 +1,47 @@
+import io
+
+import msgpack
+import orjson
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from .renderers import MessagePackRenderer, ORJSONRenderer
+
+
+class ORJSONParser(parsers.JSONParser):
+    """
+    Парсер JSON на orjson.
+
+    Результат совпадает с `rest_framework.parsers.JSONParser`. Тело в кодировке,
+    отличной от UTF-8, и тело, которое orjson не принял, разбирает родительский
+    класс, поэтому ошибки и редкие случаи (целые числа больше 64 бит,
+    одиночные суррогаты) обрабатываются так же, как раньше.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not self.strict or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+
+
+class MessagePackParser(parsers.BaseParser):
+    """Парсер тела запроса в формате MessagePack (`Content-Type: application/msgpack`)"""
+
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
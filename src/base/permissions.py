@@ -32,6 +32,16 @@ class IsOwnerOrAdmin(permissions.BasePermission):
         return obj.owner == request.user or request.user.is_staff
 
 
+class IsShopOwner(permissions.BasePermission):
+    """Владелец магазина или администратор, в том числе для чтения"""
+
+    def has_permission(self, request, view):
+        return request.user and request.user.is_authenticated
+
+    def has_object_permission(self, request, view, obj):
+        return obj.owner_id == request.user.pk or request.user.is_staff
+
+
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """Владелец, иначе только чтение"""
 
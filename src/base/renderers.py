@@ -0,0 +1,61 @@
+import msgpack
+import orjson
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+
+# кодировщик DRF для типов, которые не поддерживают orjson и MessagePack
+_default = JSONEncoder().default
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    Рендерер JSON на orjson.
+
+    Вывод побайтно совпадает с `rest_framework.renderers.JSONRenderer`:
+    даты, время, `Decimal` и прочие нестандартные типы передаются
+    кодировщику DRF, `\\u2028` и `\\u2029` экранируются так же.
+    Отличаются только числа с плавающей точкой вне диапазона [1e-4, 1e16),
+    для которых orjson не пишет знак и ведущий ноль порядка (`1e16` вместо `1e+16`).
+    Если orjson не может закодировать данные (отступы для Browsable API,
+    нестроковые ключи словарей, целые числа больше 64 бит),
+    рендеринг выполняет родительский класс.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.ensure_ascii or not self.compact or \
+                self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # orjson пишет эти символы как есть, DRF экранирует их для совместимости с JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    Рендерер MessagePack для клиентов с заголовком `Accept: application/msgpack`.
+
+    Значения совпадают с ответом в JSON: даты и время - строки ISO 8601,
+    остальные нестандартные типы приводятся кодировщиком DRF.
+    """
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True, datetime=False)
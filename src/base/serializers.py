@@ -0,0 +1,459 @@
+import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Prefetch, QuerySet
+from django.utils.module_loading import import_string
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from core.sharding import is_cross_database
+
+
+def split_paths(paths: Iterable[str]) -> Dict[str, Set[str]]:
+    """
+    Группирует пути вида `items.product` по первому сегменту.
+
+    :param paths: Перечисление путей, разделенных точкой.
+    :type paths: Iterable[str]
+
+    :return: Словарь {первый сегмент: множество оставшихся путей}.
+    :rtype: Dict[str, Set[str]]
+    """
+    result = {}
+    for path in paths:
+        head, _, rest = path.partition('.')
+        if not head:
+            continue
+        nested = result.setdefault(head, set())
+        if rest:
+            nested.add(rest)
+    return result
+
+
+def get_model_field(model, name: str):
+    """
+    Возвращает поле модели по имени атрибута, включая обратные связи.
+
+    Обратные связи ищутся по имени менеджера (`related_name`),
+    так как именно его использует сериализатор в качестве `source`.
+
+    :param model: Класс модели.
+    :param name: Имя атрибута модели.
+    :type name: str
+
+    :return: Поле модели или обратная связь.
+    :raises FieldDoesNotExist: Если атрибут не является полем модели.
+    """
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        for relation in model._meta.related_objects:
+            if relation.get_accessor_name() == name:
+                return relation
+        raise
+
+
+class DynamicFieldsMixin:
+    """
+    Примесь для сериализаторов моделей, добавляющая выборочные поля и раскрытие связей.
+
+    Принимает два дополнительных именованных аргумента:
+    - `fields` - перечень полей, которые нужно оставить в ответе;
+    - `expand` - перечень связей, которые нужно раскрыть во вложенные объекты
+      (поддерживаются вложенные пути вида `items.product`).
+
+    Раскрываемые связи описываются в `Meta.expandable_fields` в виде
+    {имя поля: (путь к классу сериализатора, именованные аргументы)}.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            self.restrict_fields(fields)
+        if expand:
+            self.expand_fields(expand)
+
+    def restrict_fields(self, fields: Iterable[str]) -> None:
+        """
+        Убирает из сериализатора все поля, кроме перечисленных.
+
+        :param fields: Имена полей, которые нужно оставить.
+        :type fields: Iterable[str]
+
+        :return: None
+        :rtype: None
+        """
+        allowed = set(fields)
+        for name in set(self.fields) - allowed:
+            self.fields.pop(name)
+
+    def expand_fields(self, expand: Iterable[str]) -> None:
+        """
+        Заменяет первичные ключи связей на вложенные сериализаторы.
+
+        :param expand: Пути связей, которые нужно раскрыть.
+        :type expand: Iterable[str]
+
+        :return: None
+        :rtype: None
+        """
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name, nested in split_paths(expand).items():
+            if name not in self.fields:
+                continue
+            if name in expandable:
+                serializer_path, options = expandable[name]
+                serializer_class = import_string(serializer_path)
+                self.fields[name] = serializer_class(read_only=True, expand=nested, **options)
+            elif nested:
+                field = self.fields[name]
+                child = getattr(field, 'child', field)
+                if isinstance(child, DynamicFieldsMixin):
+                    child.expand_fields(nested)
+
+    def get_only_fields(self) -> Optional[Set[str]]:
+        """
+        Возвращает имена столбцов модели, которые нужны сериализатору.
+
+        :return: Множество имен полей модели или None, если набор
+                 полей нельзя определить (например, для `SerializerMethodField`).
+        :rtype: Optional[Set[str]]
+        """
+        model = self.Meta.model
+        only = {model._meta.pk.name}
+        for field in self.fields.values():
+            if field.source == '*':
+                if isinstance(field, serializers.HyperlinkedIdentityField):
+                    continue
+                return None
+            try:
+                model_field = get_model_field(model, field.source_attrs[0])
+            except FieldDoesNotExist:
+                return None
+            if model_field.concrete and not model_field.many_to_many:
+                only.add(model_field.name)
+        return only
+
+    def get_lookups(self, prefix: str = '') -> Tuple[Optional[Set[str]], List[str], List[Prefetch]]:
+        """
+        Собирает столбцы и связи, которые нужно загрузить для сериализатора.
+
+        Раскрытые внешние ключи обходятся рекурсивно, поэтому связи вложенных
+        сериализаторов тоже попадают в `select_related` и `prefetch_related`.
+
+        :param prefix: Префикс пути от корневой модели (например, `product__`).
+        :type prefix: str
+
+        :return: Кортеж (столбцы для `only` или None, пути для `select_related`,
+                 объекты `Prefetch` для `prefetch_related`).
+        :rtype: Tuple[Optional[Set[str]], List[str], List[Prefetch]]
+        """
+        model = self.Meta.model
+        only = self.get_only_fields()
+        if only is not None:
+            only = {f'{prefix}{column}' for column in only}
+        select_related, prefetch_related = [], []
+
+        for field in self.fields.values():
+            if field.source == '*':
+                continue
+            try:
+                model_field = get_model_field(model, field.source_attrs[0])
+            except FieldDoesNotExist:
+                continue
+            if not model_field.is_relation:
+                continue
+
+            lookup = f'{prefix}{field.source_attrs[0]}'
+            child = getattr(field, 'child', field)
+            nested = child if isinstance(child, DynamicFieldsMixin) else None
+
+            if model_field.many_to_one or model_field.one_to_one:
+                if nested is None:
+                    continue
+                if model_field.concrete and is_cross_database(model, model_field.related_model):
+                    # связанная запись в другой базе данных: отдельный запрос вместо JOIN,
+                    # столбец внешнего ключа уже есть в `only`
+                    related_queryset = nested.optimize_queryset(model_field.related_model._default_manager.all())
+                    prefetch_related.append(Prefetch(lookup, queryset=related_queryset))
+                    continue
+                nested_only, nested_select, nested_prefetch = nested.get_lookups(f'{lookup}__')
+                select_related += [lookup, *nested_select]
+                prefetch_related += nested_prefetch
+                if only is not None and nested_only is not None:
+                    only |= nested_only
+                else:
+                    only = None
+            else:
+                # many_to_many или обратная связь one_to_many
+                related_queryset = model_field.related_model._default_manager.all()
+                # для обратной связи нужен столбец внешнего ключа, иначе каждая строка догрузится отдельно
+                remote_only = (model_field.field.name,) if model_field.one_to_many else ()
+                if nested is not None:
+                    related_queryset = nested.optimize_queryset(related_queryset, remote_only)
+                else:
+                    related_queryset = related_queryset.only('pk', *remote_only)
+                prefetch_related.append(Prefetch(lookup, queryset=related_queryset))
+
+        return only, select_related, prefetch_related
+
+    def optimize_queryset(self, queryset: QuerySet, extra_only: Iterable[str] = ()) -> QuerySet:
+        """
+        Ограничивает выборку столбцами и связями, которые нужны сериализатору.
+
+        - Столбцы, не попавшие в `fields`, не выбираются (`only`).
+        - Раскрытые внешние ключи подгружаются через `select_related`.
+        - Связи "многие ко многим" и обратные связи подгружаются
+          через `prefetch_related` и только если они запрошены.
+
+        :param queryset: Исходный набор запросов.
+        :type queryset: QuerySet
+        :param extra_only: Дополнительные столбцы, которые нужно выбрать.
+        :type extra_only: Iterable[str]
+
+        :return: Оптимизированный набор запросов.
+        :rtype: QuerySet
+        """
+        only, select_related, prefetch_related = self.get_lookups()
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if only is not None:
+            queryset = queryset.only(*only, *extra_only)
+        return queryset
+
+
+class DynamicFieldsModelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Сериализатор модели с поддержкой параметров `fields` и `expand`"""
+
+
+class DynamicFieldsHyperlinkedModelSerializer(DynamicFieldsMixin, serializers.HyperlinkedModelSerializer):
+    """Гиперссылочный сериализатор модели с поддержкой параметров `fields` и `expand`"""
+
+
+class _UnsupportedField(Exception):
+    """Поле нельзя прочитать из `values_list` без экземпляра модели"""
+
+
+class ValuesReader:
+    """
+    Читает данные сериализатора модели из `values_list`, не создавая экземпляры моделей.
+
+    Поля сериализатора один раз разбираются в план: номер столбца в строке
+    и функция преобразования значения (`to_representation` поля или ничего для строк
+    и целых чисел). Раскрытые внешние ключи читаются из той же строки через JOIN,
+    связи "многие ко многим" и обратные связи - одним дополнительным запросом
+    на связь, как при `prefetch_related`. Результат совпадает с `serializer.data`.
+
+    Если сериализатор содержит поле, значение которого нельзя получить
+    из столбцов (`SerializerMethodField`, `source='*'`, переопределенный
+    `to_representation` и т.п.), `compile` возвращает None.
+    """
+
+    VALUE, NESTED, MANY = range(3)
+
+    def __init__(self, serializer: serializers.ModelSerializer, prefix: str = '',
+                 columns: Optional[List[str]] = None):
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            raise _UnsupportedField(type(serializer).__name__)
+        self.model = serializer.Meta.model
+        self.columns = [] if columns is None else columns
+        self.pk_index = self.add_column(f'{prefix}pk')
+        self.nested: List[ValuesReader] = []
+        self.many: List[_RelatedValuesReader] = []
+        self.steps = [(name, *self.compile_field(field, prefix))
+                      for name, field in serializer.fields.items() if not field.write_only]
+
+    @classmethod
+    def compile(cls, serializer) -> Optional['ValuesReader']:
+        """
+        Строит план чтения для сериализатора.
+
+        :param serializer: Экземпляр сериализатора модели (с уже примененными `fields` и `expand`).
+
+        :return: План чтения или None, если сериализатор нельзя прочитать из столбцов
+                 или чтение через `values_list` выключено (`VALUES_LIST_ENABLED`).
+        :rtype: Optional[ValuesReader]
+        """
+        if not settings.VALUES_LIST_ENABLED or not isinstance(serializer, serializers.ModelSerializer):
+            return None
+        try:
+            return cls(serializer)
+        except _UnsupportedField:
+            return None
+
+    def add_column(self, lookup: str) -> int:
+        self.columns.append(lookup)
+        return len(self.columns) - 1
+
+    def compile_field(self, field, prefix: str) -> Tuple[int, Optional[int], Any]:
+        if field.source == '*' or len(field.source_attrs) != 1:
+            raise _UnsupportedField(field.field_name)
+        try:
+            model_field = get_model_field(self.model, field.source_attrs[0])
+        except FieldDoesNotExist:
+            raise _UnsupportedField(field.field_name)
+
+        if isinstance(field, (serializers.ManyRelatedField, serializers.ListSerializer)):
+            if not (model_field.many_to_many or model_field.one_to_many):
+                raise _UnsupportedField(field.field_name)
+            related = _RelatedValuesReader(model_field, field)
+            self.many.append(related)
+            return self.MANY, None, related
+
+        if model_field.is_relation:
+            if not model_field.concrete or not (model_field.many_to_one or model_field.one_to_one):
+                raise _UnsupportedField(field.field_name)
+            if isinstance(field, serializers.ModelSerializer):
+                reader = ValuesReader(field, f'{prefix}{model_field.name}__', self.columns)
+                self.nested.append(reader)
+                return self.NESTED, reader.pk_index, reader
+            return self.VALUE, self.add_column(f'{prefix}{model_field.name}'), _pk_converter(field)
+
+        if type(field).get_attribute is not serializers.Field.get_attribute:
+            raise _UnsupportedField(field.field_name)
+        index = self.add_column(f'{prefix}{model_field.name}')
+        if isinstance(field, serializers.FileField):
+            return self.VALUE, index, _file_converter(field, model_field)
+        return self.VALUE, index, _value_converter(field, model_field)
+
+    def prepare(self, rows: Sequence[tuple]) -> None:
+        """Загружает связи "многие ко многим" и обратные связи для строк."""
+        if self.many and rows:
+            pks = {row[self.pk_index] for row in rows}
+            for related in self.many:
+                related.fetch(pks)
+        for reader in self.nested:
+            reader.prepare([row for row in rows if row[reader.pk_index] is not None])
+
+    def build(self, row: tuple) -> Dict[str, Any]:
+        data = {}
+        for name, kind, index, payload in self.steps:
+            if kind == self.VALUE:
+                value = row[index]
+                data[name] = value if value is None or payload is None else payload(value)
+            elif kind == self.NESTED:
+                data[name] = None if row[index] is None else payload.build(row)
+            else:
+                data[name] = payload.get(row[self.pk_index])
+        return data
+
+    def read(self, rows: Iterable[tuple]) -> List[Dict[str, Any]]:
+        """
+        Преобразует строки `values_list(*reader.columns)` в данные сериализатора.
+
+        :param rows: Строки набора запросов или страница пагинации.
+        :type rows: Iterable[tuple]
+
+        :return: Список словарей, как `serializer.data` с `many=True`.
+        :rtype: List[Dict[str, Any]]
+        """
+        rows = list(rows)
+        self.prepare(rows)
+        return [self.build(row) for row in rows]
+
+
+class _RelatedValuesReader:
+    """Чтение связи "многие ко многим" или обратной связи одним запросом на все строки"""
+
+    def __init__(self, relation, field):
+        self.queryset = relation.related_model._default_manager.all()
+        # имя, по которому связанная модель фильтруется по владельцу
+        if isinstance(relation, models.ForeignObjectRel):
+            self.query_name = relation.field.name
+        else:
+            self.query_name = relation.related_query_name()
+        self.related: Dict[Any, list] = {}
+
+        if isinstance(field, serializers.ListSerializer):
+            if type(field).to_representation is not serializers.ListSerializer.to_representation or \
+                    not isinstance(field.child, serializers.ModelSerializer):
+                raise _UnsupportedField(field.field_name)
+            self.reader = ValuesReader(field.child, columns=[self.query_name])
+            self.columns = self.reader.columns
+            self.convert = None
+        else:
+            if type(field).to_representation is not serializers.ManyRelatedField.to_representation:
+                raise _UnsupportedField(field.field_name)
+            self.reader = None
+            self.columns = [self.query_name, 'pk']
+            self.convert = _pk_converter(field.child_relation)
+
+    def fetch(self, pks: Set) -> None:
+        rows = list(self.queryset.filter(**{f'{self.query_name}__in': pks}).values_list(*self.columns))
+        related = {}
+        if self.reader is not None:
+            self.reader.prepare(rows)
+            for row in rows:
+                related.setdefault(row[0], []).append(self.reader.build(row))
+        else:
+            convert = self.convert
+            for owner, pk in rows:
+                related.setdefault(owner, []).append(pk if convert is None else convert(pk))
+        self.related = related
+
+    def get(self, pk) -> list:
+        return self.related.get(pk, [])
+
+
+def _pk_converter(field) -> Optional[Callable[[Any], Any]]:
+    if not isinstance(field, serializers.PrimaryKeyRelatedField) or \
+            type(field).to_representation is not serializers.PrimaryKeyRelatedField.to_representation:
+        raise _UnsupportedField(field.field_name)
+    return field.pk_field.to_representation if field.pk_field is not None else None
+
+
+def _file_converter(field, model_field) -> Callable[[str], Optional[str]]:
+    if not isinstance(model_field, models.FileField) or \
+            type(field).to_representation is not serializers.FileField.to_representation:
+        raise _UnsupportedField(field.field_name)
+    if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+        return lambda name: name or None
+
+    storage = model_field.storage
+    request = field.context.get('request')
+
+    def convert(name):
+        # как FileField.to_representation: пустое имя файла - None
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def _value_converter(field, model_field) -> Optional[Callable[[Any], Any]]:
+    # значения столбцов уже имеют нужный тип, to_representation ничего бы не изменил
+    if type(field) is serializers.ReadOnlyField:
+        return None
+    if type(field) is serializers.CharField and isinstance(model_field, (models.CharField, models.TextField)):
+        return None
+    if type(field) is serializers.IntegerField and isinstance(model_field, models.IntegerField):
+        return None
+    if type(field) is serializers.DateTimeField:
+        return _datetime_converter(field)
+    return field.to_representation
+
+
+def _datetime_converter(field: serializers.DateTimeField) -> Callable[[Any], Any]:
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        # как DateTimeField.to_representation, но часовой пояс определяется один раз на запрос
+        if not isinstance(value, datetime.datetime) or value.utcoffset() is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
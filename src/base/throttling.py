@@ -0,0 +1,161 @@
+import math
+import time
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+KEY_PREFIX = 'throttle:'
+
+
+def get_key_timeout(interval: int, burst: int) -> int:
+    """
+    Время жизни корзины в секундах: за `burst * interval` мс без запросов корзина
+    наполняется целиком, поэтому истекший ключ равносилен полной корзине.
+
+    :param interval: Интервал пополнения одного токена в мс.
+    :type interval: int
+    :param burst: Емкость корзины.
+    :type burst: int
+
+    :return: Время жизни ключа в секундах.
+    :rtype: int
+    """
+    return math.ceil(burst * interval / 1000) + 1
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """
+    Разбирает ограничение вида `N/период[:емкость]`, например `30/min:10`.
+
+    Корзина пополняется на N токенов за период (`s`, `min`, `hour`, `day`),
+    емкость - наибольшее число запросов подряд, по умолчанию N.
+
+    :param rate: Ограничение.
+    :type rate: str
+
+    :return: Кортеж (интервал пополнения одного токена в мс, емкость).
+    :rtype: Tuple[int, int]
+    """
+    rate, _, burst = rate.partition(':')
+    count, _, period = rate.partition('/')
+    count = int(count)
+    interval = max(1, PERIODS[period.strip()[:1]] * 1000 // count)
+    return interval, int(burst) if burst else count
+
+
+def consume(key: str, interval: int, burst: int, now: Optional[int] = None) -> float:
+    """
+    Забирает один токен из корзины `key`.
+
+    Корзина хранится одним целым числом - теоретическим временем прихода
+    следующего запроса (TAT, алгоритм GCRA) в миллисекундах. Обычный запрос
+    стоит атомарной операции `incr` в кэше и продления ключа (`touch`): `incr` не меняет
+    время жизни, а ключ должен дожить до TAT. Отказ стоит еще одной операции (`decr`),
+    первый запрос после простоя - `set`. Если несколько процессов одновременно
+    застали корзину полной, каждый из них может получить по лишнему токену.
+
+    :param key: Ключ корзины в кэше.
+    :type key: str
+    :param interval: Интервал пополнения одного токена в мс.
+    :type interval: int
+    :param burst: Емкость корзины.
+    :type burst: int
+    :param now: Текущее время в мс (для тестов).
+    :type now: Optional[int]
+
+    :return: 0, если токен получен, иначе сколько секунд ждать следующего.
+    :rtype: float
+    """
+    cache = caches[settings.THROTTLING['ALIAS']]
+    timeout = get_key_timeout(interval, burst)
+    if now is None:
+        now = time.time_ns() // 1_000_000
+    try:
+        tat = cache.incr(key, interval)
+    except ValueError:  # корзины еще нет или она истекла
+        if cache.add(key, now + interval, timeout):
+            return 0.0
+        tat = cache.incr(key, interval)
+
+    if tat - interval < now:
+        # запросов давно не было, корзина полная: отсчет начинается заново
+        cache.set(key, now + interval, timeout)
+        return 0.0
+    if tat - now <= burst * interval:
+        cache.touch(key, timeout)
+        return 0.0
+    cache.decr(key, interval)  # отказ не расходует токен
+    return (tat - now - burst * interval) / 1000
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов по алгоритму корзины токенов.
+
+    Ограничения задаются для действий представления через
+    `throttle_scopes = {действие: область}`, а значения - в
+    `settings.THROTTLING['RATES'][область][вид]`, где вид - `user` или `ip`.
+    Для действий без области проверка ничего не стоит: кэш не запрашивается.
+    Корзины хранятся в общем кэше (`THROTTLING['ALIAS']`), поэтому
+    ограничение действует на все процессы и серверы. Бэкенд должен
+    увеличивать счетчики атомарно (см. `core.server.ATOMIC_CACHE_BACKENDS`).
+    """
+
+    kind: str = None
+
+    def __init__(self):
+        self.wait_seconds = 0.0
+
+    def get_scope(self, request, view) -> Optional[str]:
+        scopes = getattr(view, 'throttle_scopes', None)
+        if not scopes:
+            return None
+        return scopes.get(getattr(view, 'action', None) or request.method.lower())
+
+    def get_cache_ident(self, request) -> str:
+        raise NotImplementedError
+
+    def allow_request(self, request, view) -> bool:
+        config = settings.THROTTLING
+        if not config['ENABLED']:
+            return True
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+        rate = config['RATES'].get(scope, {}).get(self.kind)
+        if rate is None:
+            return True
+
+        interval, burst = parse_rate(rate)
+        key = f'{KEY_PREFIX}{scope}:{self.kind}:{self.get_cache_ident(request)}'
+        self.wait_seconds = consume(key, interval, burst)
+        return not self.wait_seconds
+
+    def wait(self) -> Optional[float]:
+        return self.wait_seconds
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Корзина на пользователя (анонимные пользователи - по IP адресу)"""
+
+    kind = 'user'
+
+    def get_cache_ident(self, request) -> str:
+        if request.user and request.user.is_authenticated:
+            return f'user-{request.user.pk}'
+        return f'ip-{self.get_ident(request)}'
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Корзина на IP адрес, общая для всех пользователей с этого адреса"""
+
+    kind = 'ip'
+
+    def get_cache_ident(self, request) -> str:
+        return self.get_ident(request)
@@ -0,0 +1,342 @@
+from functools import reduce
+from operator import or_
+from typing import Callable, Optional, Set
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from core.cache import get_entry, get_tag_versions, instance_tag, make_entry_key, model_tag, set_entry
+from core.sharding import fan_out, get_shards
+from .renderers import ORJSONRenderer
+from .serializers import DynamicFieldsMixin, ValuesReader
+
+
+class DynamicFieldsQueryMixin:
+    """Разбор параметров `?fields=` и `?expand=` запроса"""
+
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def _get_query_param_set(self, name: str) -> Optional[Set[str]]:
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return None
+        # запрос DRF или обычный HttpRequest Django
+        value = getattr(request, 'query_params', request.GET).get(name)
+        if value is None:
+            return None
+        return {item.strip() for item in value.split(',') if item.strip()}
+
+    def get_requested_fields(self) -> Optional[Set[str]]:
+        """
+        Возвращает множество полей из параметра `fields`.
+
+        :return: Множество имен полей или None, если параметр не передан.
+        :rtype: Optional[Set[str]]
+        """
+        fields = self._get_query_param_set(self.fields_query_param)
+        if fields is None:
+            return None
+        # раскрываемая связь должна остаться в ответе, даже если ее не перечислили
+        return fields | {path.partition('.')[0] for path in self.get_requested_expand()}
+
+    def get_requested_expand(self) -> Set[str]:
+        """
+        Возвращает множество связей из параметра `expand`.
+
+        :return: Множество путей раскрываемых связей.
+        :rtype: Set[str]
+        """
+        return self._get_query_param_set(self.expand_query_param) or set()
+
+
+class DynamicFieldsViewSetMixin(DynamicFieldsQueryMixin):
+    """
+    Примесь для наборов представлений, поддерживающая параметры `?fields=` и `?expand=`.
+
+    Параметры применяются только к безопасным (читающим) методам:
+    сериализатор отдает лишь запрошенные поля, а набор запросов
+    выбирает только нужные столбцы и подгружает только раскрытые связи.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Передает в сериализатор запрошенные поля и раскрываемые связи.
+        """
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, DynamicFieldsMixin):
+            kwargs.setdefault('fields', self.get_requested_fields())
+            kwargs.setdefault('expand', self.get_requested_expand())
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        """
+        Ограничивает набор запросов полями и связями, которые нужны сериализатору.
+
+        Оптимизация выполняется здесь, а не в `get_queryset`, так как
+        наборы представлений часто переопределяют `get_queryset` целиком.
+
+        :param queryset: Набор запросов из `get_queryset`.
+        :type queryset: QuerySet
+
+        :return: Отфильтрованный и оптимизированный набор запросов.
+        :rtype: QuerySet
+        """
+        queryset = super().filter_queryset(queryset)
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return queryset
+
+        serializer_class = self.get_serializer_class()
+        if not issubclass(serializer_class, DynamicFieldsMixin):
+            return queryset
+        serializer = serializer_class(
+            fields=self.get_requested_fields(),
+            expand=self.get_requested_expand(),
+            context=self.get_serializer_context(),
+        )
+        return serializer.optimize_queryset(queryset)
+
+
+class ValuesListMixin:
+    """
+    Примесь для наборов представлений, отдающая список без создания экземпляров моделей.
+
+    Действие `list` читает строки через `values_list` и преобразует их
+    планом `ValuesReader`, а не сериализатором. Ответ не отличается от ответа
+    сериализатора, включая `?fields=`, `?expand=`, поиск, сортировку и пагинацию.
+    Если сериализатор нельзя прочитать из столбцов, работает обычный `list`.
+    """
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        reader = ValuesReader.compile(serializer)
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+
+        # связи загружает сам план, prefetch_related с values_list несовместим
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).values_list(*reader.columns)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(ReturnList(reader.read(page), serializer=serializer))
+        return Response(ReturnList(reader.read(queryset), serializer=serializer))
+
+    def read_page(self, queryset: QuerySet, paginator) -> ReturnList:
+        """
+        Читает страницу уже отфильтрованного набора запросов так же, как `list`.
+
+        :param queryset: Отфильтрованный набор запросов.
+        :type queryset: QuerySet
+        :param paginator: Экземпляр класса пагинации.
+
+        :return: Данные страницы.
+        :rtype: ReturnList
+        """
+        serializer = self.get_serializer()
+        reader = ValuesReader.compile(serializer)
+        if reader is None:
+            return self.get_serializer(paginator.paginate_queryset(queryset, self.request, view=self), many=True).data
+        queryset = queryset.prefetch_related(None).values_list(*reader.columns)
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        return ReturnList(reader.read(page), serializer=serializer)
+
+
+class FanOutListMixin:
+    """
+    Примесь для наборов представлений шардируемых моделей (см. `core.sharding`).
+
+    Если `get_queryset` не выбрал шард (например, список всех заказов для
+    администратора), действие `list` выполняет запрос на каждом шарде и объединяет
+    результаты в порядке сортировки набора запросов. Запросы, направленные
+    в шард покупателя, и конфигурация с одним шардом обрабатываются как обычно.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if queryset._db is not None or len(get_shards()) == 1:
+            return super().list(request, *args, **kwargs)
+
+        objects = fan_out(queryset)
+        page = self.paginate_queryset(objects)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(objects, many=True).data)
+
+
+def get_serializer_models(serializer) -> Set:
+    """
+    Возвращает модели вложенных (раскрытых) сериализаторов.
+
+    :param serializer: Экземпляр сериализатора.
+
+    :return: Множество классов моделей.
+    :rtype: Set
+    """
+    found = set()
+    for field in serializer.fields.values():
+        if isinstance(field, serializers.ListSerializer):
+            field = field.child
+        if isinstance(field, serializers.ModelSerializer):
+            found.add(field.Meta.model)
+            found |= get_serializer_models(field)
+    return found
+
+
+class CachedResponseMixin:
+    """
+    Примесь для наборов представлений, кэширующая ответы `list` и `retrieve`.
+
+    Запись кэша помечается тегами моделей, от которых зависит ответ:
+    список - тегом модели, детальное представление - тегом записи,
+    раскрытые связи - тегами их моделей. Сигналы моделей (см. `core.cache`)
+    меняют версии тегов, и помеченные ими записи перестают считаться актуальными.
+    Подходит только для ответов, которые не зависят от пользователя.
+    """
+
+    # заголовки представления, которые повторяются в ответе из кэша (Vary нужен промежуточным кэшам)
+    cached_headers = ('Vary', 'Allow')
+
+    def get_cache_tags(self) -> Set[str]:
+        """
+        Возвращает теги, от которых зависит ответ текущего действия.
+
+        :return: Множество тегов.
+        :rtype: Set[str]
+        """
+        serializer = self.get_serializer()
+        model = serializer.Meta.model
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if self.action == 'retrieve' and self.lookup_field == 'pk':
+            tags = {instance_tag(model, self.kwargs[lookup_url_kwarg])}
+        else:
+            tags = {model_tag(model)}
+        return tags | {model_tag(related) for related in get_serializer_models(serializer)}
+
+    def get_cache_key(self) -> str:
+        request = self.request
+        namespace = f'{type(self).__module__}.{type(self).__name__}.{self.action}'
+        # адрес целиком, так как ссылки на файлы в ответе абсолютные
+        return make_entry_key(namespace, request.build_absolute_uri(), request.META.get('HTTP_ACCEPT', ''))
+
+    def cached_response(self, handler: Callable, request, *args, **kwargs):
+        """
+        Возвращает ответ из кэша или вызывает обработчик и сохраняет его результат.
+
+        :param handler: Обработчик действия из родительского класса.
+        :type handler: Callable
+        :param request: Объект запроса.
+        :type request: Request
+
+        :return: Объект ответа.
+        :rtype: HttpResponse
+        """
+        config = settings.RESPONSE_CACHE
+        if not config['ENABLED']:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_cache_key()
+        entry = get_entry(key)
+        if entry is not None:
+            response = HttpResponse(entry['content'], status=entry['status'], content_type=entry['content_type'])
+            for name, value in entry.get('headers', {}).items():
+                response[name] = value
+            response['X-Cache'] = 'HIT'
+            return response
+
+        versions = get_tag_versions(self.get_cache_tags())
+        response = handler(request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200:
+            def store(rendered):
+                set_entry(key, versions, {
+                    'content': rendered.content,
+                    'status': rendered.status_code,
+                    'content_type': rendered['Content-Type'],
+                    'headers': {name: rendered[name] for name in self.cached_headers if rendered.has_header(name)},
+                }, config['TIMEOUT'])
+            response.add_post_render_callback(store)
+            response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class AsyncReadOnlyView(DynamicFieldsQueryMixin, View):
+    """
+    Асинхронное представление списка и отдельного объекта только для чтения.
+
+    Выборка идет через асинхронный ORM Django, поэтому под ASGI один рабочий
+    процесс обслуживает много медленных запросов одновременно, не занимая
+    по потоку на каждый. Поддерживает `?fields=`, `?expand=` и `?search=`,
+    ответ совпадает с ответом соответствующего набора представлений DRF.
+    Аутентификация не выполняется: представление предназначено для публичного каталога.
+    """
+
+    queryset: QuerySet = None
+    serializer_class = None
+    search_fields = ()
+    search_query_param = 'search'
+    http_method_names = ['get', 'head', 'options']
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('context', {'request': self.request})
+        if issubclass(self.serializer_class, DynamicFieldsMixin):
+            kwargs.setdefault('fields', self.get_requested_fields())
+            kwargs.setdefault('expand', self.get_requested_expand())
+        return self.serializer_class(*args, **kwargs)
+
+    def get_queryset(self) -> QuerySet:
+        """
+        Возвращает набор запросов с поиском и выборкой только нужных сериализатору данных.
+
+        :return: Набор запросов.
+        :rtype: QuerySet
+        """
+        queryset = self.queryset.all()
+        # как в rest_framework.filters.SearchFilter: каждое слово ищется хотя бы в одном из полей
+        for term in self.request.GET.get(self.search_query_param, '').replace(',', ' ').split():
+            if self.search_fields:
+                queryset = queryset.filter(reduce(or_, (Q(**{f'{name}__icontains': term})
+                                                        for name in self.search_fields)))
+        serializer = self.get_serializer()
+        if isinstance(serializer, DynamicFieldsMixin):
+            queryset = serializer.optimize_queryset(queryset)
+        return queryset
+
+    @staticmethod
+    def render(data, status: int = 200) -> HttpResponse:
+        return HttpResponse(ORJSONRenderer().render(data), status=status, content_type='application/json')
+
+    async def get(self, request, pk: Optional[int] = None) -> HttpResponse:
+        """
+        Отдает список объектов или объект с указанным первичным ключом.
+
+        Сериализатор работает с уже загруженными объектами и связями,
+        поэтому запросов к базе данных вне асинхронного ORM не возникает.
+
+        :param request: Объект запроса.
+        :type request: HttpRequest
+        :param pk: Первичный ключ объекта или None для списка.
+        :type pk: Optional[int]
+
+        :return: Ответ в формате JSON.
+        :rtype: HttpResponse
+        """
+        queryset = self.get_queryset()
+        if pk is None:
+            return self.render(self.get_serializer([obj async for obj in queryset], many=True).data)
+
+        try:
+            instance = await queryset.aget(pk=pk)
+        except queryset.model.DoesNotExist:
+            return self.render({'detail': NotFound.default_detail}, status=404)
+        return self.render(self.get_serializer(instance).data)
@@ -1,5 +1,6 @@
 import os
 from datetime import timedelta
+import sys
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -30,6 +31,7 @@ INSTALLED_APPS = [
     'drf_spectacular',
 
     # my apps
+    'core.apps.CoreConfig',
     'apps.profiles.apps.ProfilesConfig',
     'apps.shops.apps.ShopsConfig',
     'apps.products.apps.ProductsConfig',
@@ -84,6 +86,148 @@ DATABASES = {
     }
 }
 
+# Пул соединений PostgreSQL (psycopg 3). Пул принадлежит процессу, поэтому его размер
+# считается на один рабочий процесс: DB_MAX_CONNECTIONS делится на WEB_CONCURRENCY.
+# Без пула (другие СУБД или DB_POOL=False) соединения переиспользуются через CONN_MAX_AGE.
+# https://docs.djangoproject.com/en/5.1/ref/databases/#connection-pool
+
+# количество рабочих процессов сервера (manage.py serve), по умолчанию - по числу ядер
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', os.cpu_count() or 1))
+DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', 90))
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql' and os.getenv('DB_POOL', 'True') == 'True':
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', max(2, DB_MAX_CONNECTIONS // WEB_CONCURRENCY))),
+            # сколько секунд лишнее соединение простаивает до закрытия
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 3600)),
+            # сколько секунд запрос ждет свободное соединение, прежде чем получить ошибку
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 60))
+
+# проверка соединения перед использованием (для пула - перед выдачей из пула)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+TESTING = sys.argv[1:2] == ['test']
+
+# Шардирование заказов и корзин по покупателю (см. core.sharding).
+# ORDER_SHARDS баз данных: `default` и orders_1 ... orders_{N-1} с теми же параметрами подключения,
+# имя базы - DB_ORDERS_<N>_NAME (по умолчанию db_orders_<N>.sqlite3 рядом с db.sqlite3 или <DB_NAME>_orders_<N>).
+# ALIASES - все базы шардов в порядке номеров (номер определяет диапазон идентификаторов),
+# SHARDS - базы, по которым распределяются покупатели. В тестах есть запасной шард orders_1.
+ORDER_SHARDS = int(os.getenv('ORDER_SHARDS', 1))
+SHARD_ALIASES = ['default']
+for index in range(1, max(ORDER_SHARDS, 2 if TESTING else 1)):
+    default_name = str(DATABASES['default']['NAME'])
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        shard_name = str(Path(default_name).with_name(f'db_orders_{index}.sqlite3'))
+    else:
+        shard_name = f'{default_name}_orders_{index}'
+    DATABASES[f'orders_{index}'] = {**DATABASES['default'], 'NAME': os.getenv(f'DB_ORDERS_{index}_NAME', shard_name)}
+    SHARD_ALIASES.append(f'orders_{index}')
+
+SHARDING = {
+    'APPS': ('orders',),
+    'ALIASES': SHARD_ALIASES,
+    'SHARDS': SHARD_ALIASES[:max(ORDER_SHARDS, 1)],
+}
+DATABASE_ROUTERS = ['core.sharding.ShardRouter']
+
+
+# Кэш. По умолчанию - память процесса; для нескольких процессов/серверов задайте общий бэкенд,
+# например CACHE_BACKEND=django.core.cache.backends.redis.RedisCache и CACHE_LOCATION=redis://redis:6379/1
+# (так настроен сервис app в docker-compose.yml; serve не запускает несколько процессов с LocMemCache)
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'store'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+    }
+}
+
+# Кэш ответов list/retrieve каталога с инвалидацией по тегам моделей.
+# В тестах выключен, так как откат транзакций не отправляет сигналы моделей.
+RESPONSE_CACHE = {
+    'ENABLED': os.getenv('RESPONSE_CACHE_ENABLED', str(not TESTING)) == 'True',
+    'ALIAS': 'default',
+    'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TIMEOUT', 600)),
+    'MODELS': ('products.Product', 'products.Category', 'shops.Shop', 'reviews.Review'),
+}
+
+# Ограничение частоты запросов (корзина токенов, см. base.throttling).
+# Ограничение `N/период:емкость` задается для области (throttle_scopes представления)
+# отдельно на пользователя и на IP адрес. Для нескольких процессов нужен общий кэш
+# с атомарным incr (Redis или Memcached), иначе serve не запустится.
+THROTTLING = {
+    'ENABLED': os.getenv('THROTTLING_ENABLED', str(not TESTING)) == 'True',
+    'ALIAS': 'default',
+    'RATES': {
+        'cart': {'user': '120/min:30', 'ip': '600/min:100'},
+        'orders': {'user': '10/min:5', 'ip': '60/min:20'},
+    },
+}
+
+# Ключи идемпотентности (заголовок Idempotency-Key, см. base.idempotency).
+# Ответ на первый запрос хранится TIMEOUT секунд; одновременный повтор ждет этого ответа
+# до WAIT секунд, затем получает 409.
+# LOCK_TIMEOUT - сколько держится ключ запроса, процесс которого упал, не успев ответить.
+# Для нескольких процессов нужен общий кэш с атомарным add (Redis или Memcached), иначе serve не запустится.
+IDEMPOTENCY = {
+    'ENABLED': os.getenv('IDEMPOTENCY_ENABLED', 'True') == 'True',
+    'ALIAS': 'default',
+    'TIMEOUT': int(os.getenv('IDEMPOTENCY_TIMEOUT', 24 * 60 * 60)),
+    'LOCK_TIMEOUT': int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', 60)),
+    'WAIT': float(os.getenv('IDEMPOTENCY_WAIT', 5)),
+}
+
+# Брошенные корзины (manage.py cleanup_carts): элементы старше DAYS дней удаляются
+# пачками по BATCH_SIZE строк с паузой PAUSE секунд между пачками.
+CART_RETENTION = {
+    'DAYS': int(os.getenv('CART_RETENTION_DAYS', 30)),
+    'BATCH_SIZE': int(os.getenv('CART_RETENTION_BATCH_SIZE', 1000)),
+    'PAUSE': float(os.getenv('CART_RETENTION_PAUSE', 0.1)),
+}
+
+# Очередь сборки заказов магазина: элементы заказов в статусах ORDER_STATUSES.
+# Захват сборщиком истекает через CLAIM_TIMEOUT секунд, после чего элемент снова доступен.
+FULFILMENT = {
+    'ORDER_STATUSES': ('pending', 'processing', 'paid'),
+    'CLAIM_TIMEOUT': int(os.getenv('FULFILMENT_CLAIM_TIMEOUT', 30 * 60)),
+    'BATCH_SIZE': 10,
+    'MAX_BATCH_SIZE': 100,
+    'LIST_LIMIT': 100,
+}
+
+# Счетчики фильтров каталога (GET /products/facets/): границы диапазонов цен,
+# уровни скидки "от N%", наибольшее число магазинов и категорий в ответе
+# и размер страницы продуктов (?limit=, не больше MAX_PAGE_SIZE).
+FACETS = {
+    'PRICE_BANDS': (0, 1000, 5000, 10000, 50000),
+    'DISCOUNT_LEVELS': (0, 10, 25, 50),
+    'MAX_VALUES': 50,
+    'PAGE_SIZE': 20,
+    'MAX_PAGE_SIZE': 100,
+}
+
+# Автодополнение названий (core.autocomplete): индекс в памяти каждого процесса.
+# Порядок MODELS задает приоритет при равных совпадениях. Изменения из других процессов
+# подхватываются по счетчику версии в кэше ALIAS не реже раза в SYNC_INTERVAL секунд.
+AUTOCOMPLETE = {
+    'ALIAS': 'default',
+    'MODELS': ('products.Category', 'shops.Shop', 'products.Product'),
+    'SYNC_INTERVAL': int(os.getenv('AUTOCOMPLETE_SYNC_INTERVAL', 5)),
+    'LIMIT': 10,
+    'MAX_LIMIT': 50,
+    'CACHE_SIZE': 10_000,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -129,6 +273,28 @@ MEDIA_URL = '/media/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Файлы сгенерированной схемы OpenAPI (имя файла - отпечаток кода, см. core.schema)
+OPENAPI_SCHEMA_CACHE_DIR = os.getenv('OPENAPI_SCHEMA_CACHE_DIR', BASE_DIR / '.cache' / 'openapi')
+
+
+# Начиная с этого числа строк админка показывает оценку планировщика PostgreSQL вместо COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ADMIN_ESTIMATED_COUNT_THRESHOLD', 100_000))
+
+
+# Заголовок Server-Timing с временем в БД и рендеринга для каждого ответа
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'True') == 'True'
+
+# Чтение списков через values_list по плану сериализатора (base.views.ValuesListMixin);
+# False - списки всегда строятся сериализатором из экземпляров моделей
+VALUES_LIST_ENABLED = os.getenv('VALUES_LIST_ENABLED', 'True') == 'True'
+
+# Доступ к /metrics/: администраторы, адреса из списка или заголовок `Authorization: Bearer <TOKEN>`
+METRICS = {
+    'ALLOWED_IPS': tuple(ip for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip),
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),
+}
+
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -177,11 +343,26 @@ LOGGING = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.profiles.authentication.RevocableJWTAuthentication',
     ),
     # 'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     # 'PAGE_SIZE': 10,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_THROTTLE_CLASSES': (
+        'base.throttling.UserTokenBucketThrottle',
+        'base.throttling.IPTokenBucketThrottle',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'base.renderers.ORJSONRenderer',
+        'base.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'base.parsers.ORJSONParser',
+        'base.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -208,4 +389,17 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': timedelta(minutes=5),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
+
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.profiles.serializers.GuestCartTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.profiles.serializers.RevocableTokenRefreshSerializer',
+}
+
+# Отзыв JWT токенов (выход из системы, блокировка пользователя).
+# Каждый процесс держит фильтр отозванных jti в памяти и догружает новые записи раз в SYNC_INTERVAL секунд.
+JWT_REVOCATION = {
+    'SYNC_INTERVAL': int(os.getenv('JWT_REVOCATION_SYNC_INTERVAL', 5)),
+    'SYNC_MARGIN': int(os.getenv('JWT_REVOCATION_SYNC_MARGIN', 60)),
+    'REBUILD_INTERVAL': 60 * 60,
+    'CAPACITY': 100_000,
+    'ERROR_RATE': 0.001,
 }
\ No newline at end of file
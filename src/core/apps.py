@@ -0,0 +1,20 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        from . import autocomplete
+        from .cache import connect_signals
+        from .middleware import install_query_counter
+        from .sharding import configure_sequences
+
+        connect_signals(settings.RESPONSE_CACHE['MODELS'])
+        autocomplete.connect_signals(settings.AUTOCOMPLETE['MODELS'])
+        connection_created.connect(install_query_counter, dispatch_uid='core.middleware.install_query_counter')
+        post_migrate.connect(configure_sequences, dispatch_uid='core.sharding.configure_sequences')
@@ -0,0 +1,298 @@
+import bisect
+import heapq
+import itertools
+import math
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+
+VERSION_KEY = 'autocomplete:version'
+# верхняя граница диапазона ключей с заданным префиксом
+_MAX_CHAR = '\U0010ffff'
+_WORD_RE = re.compile(r'\w+')
+
+
+def get_cache():
+    return caches[settings.AUTOCOMPLETE['ALIAS']]
+
+
+def normalize(text: str) -> str:
+    """
+    Приводит текст к виду, в котором хранятся ключи индекса.
+
+    Регистр и буква "ё" не учитываются, знаки препинания и лишние пробелы отбрасываются.
+
+    :param text: Исходный текст.
+    :type text: str
+
+    :return: Нормализованный текст.
+    :rtype: str
+    """
+    return ' '.join(_WORD_RE.findall(text.casefold().replace('ё', 'е')))
+
+
+class AutocompleteIndex:
+    """
+    Индекс префиксного поиска по названиям в памяти процесса.
+
+    Хранит отсортированный список ключей: нормализованное название
+    и его хвосты, начинающиеся с каждого следующего слова, поэтому "lenovo"
+    находит "Ноутбук Lenovo". Поиск - два `bisect` по списку и выбор лучших
+    `limit` записей из найденного диапазона. Для префиксов не длиннее
+    `SHORT_PREFIX` символов диапазон слишком велик, поэтому для них
+    хранятся отдельные списки, уже упорядоченные по рангу. Результаты
+    повторяющихся запросов кэшируются до следующего изменения индекса.
+
+    Индекс строится при старте процесса и обновляется сигналами моделей
+    после фиксации транзакции, поэтому откаченные изменения в него не попадают.
+    Изменения из других процессов приходят через счетчик версии в общем кэше:
+    не реже раза в `SYNC_INTERVAL` секунд процесс сверяет версию и при расхождении
+    перестраивает индекс целиком.
+    """
+
+    SHORT_PREFIX = 2
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Сбрасывает индекс, следующий запрос построит его заново."""
+        self._entries = []
+        self._short = {}
+        self._objects = {}
+        self._results = {}
+        self._version = None
+        self._synced_at = -math.inf
+        self.built = False
+
+    @staticmethod
+    def _keys(name: str) -> List[str]:
+        words = normalize(name).split(' ')
+        return [' '.join(words[index:]) for index in range(len(words)) if words[index]]
+
+    def _items(self, kind: int, pk: Any, name: str, keys: List[str]):
+        # пары (короткий префикс или None для общего списка, элемент списка)
+        for position, key in enumerate(keys):
+            rank = (position > 0, len(name), kind, pk)
+            yield None, (key, *rank)
+            for length in range(1, min(len(key), self.SHORT_PREFIX) + 1):
+                yield key[:length], rank
+
+    def _list(self, short: str) -> list:
+        return self._entries if short is None else self._short.setdefault(short, [])
+
+    def _add(self, kind: int, pk: Any, name: str) -> None:
+        keys = self._keys(name)
+        self._objects[kind, pk] = (name, keys)
+        for short, item in self._items(kind, pk, name, keys):
+            bisect.insort(self._list(short), item)
+
+    def _remove(self, kind: int, pk: Any) -> None:
+        name, keys = self._objects.pop((kind, pk), ('', ()))
+        for short, item in self._items(kind, pk, name, keys):
+            items = self._list(short)
+            index = bisect.bisect_left(items, item)
+            if index < len(items) and items[index] == item:
+                del items[index]
+
+    def build(self) -> None:
+        """
+        Строит индекс по всем записям моделей из `AUTOCOMPLETE['MODELS']`.
+
+        :return: None
+        :rtype: None
+        """
+        with self._lock:
+            version = get_cache().get(VERSION_KEY, 0)
+            objects = {}
+            for kind, label in enumerate(settings.AUTOCOMPLETE['MODELS']):
+                for pk, name in apps.get_model(label)._default_manager.values_list('pk', 'name').iterator():
+                    objects[kind, pk] = (name, self._keys(name))
+
+            # сортировка один раз вместо вставок по одной записи
+            # новые списки подменяют старые целиком, запросы во время сборки читают прежний индекс
+            entries, short_lists = [], {}
+            for (kind, pk), (name, keys) in objects.items():
+                for short, item in self._items(kind, pk, name, keys):
+                    (entries if short is None else short_lists.setdefault(short, [])).append(item)
+            entries.sort()
+            for items in short_lists.values():
+                items.sort()
+            self._entries, self._short, self._objects = entries, short_lists, objects
+            self._results = {}
+            self._version = version
+            self._synced_at = time.monotonic()
+            self.built = True
+
+    def sync(self, force: bool = False) -> None:
+        """
+        Строит индекс при первом обращении и перестраивает его,
+        если записи изменились в другом процессе.
+
+        :param force: Сверить версию, даже если интервал еще не истек.
+        :type force: bool
+
+        :return: None
+        :rtype: None
+        """
+        if not self.built:
+            return self.build()
+        if not force and time.monotonic() - self._synced_at < settings.AUTOCOMPLETE['SYNC_INTERVAL']:
+            return
+        self._synced_at = time.monotonic()
+        if get_cache().get(VERSION_KEY, 0) != self._version:
+            self.build()
+
+    def update(self, model, pk: Any, name: str = None) -> None:
+        """
+        Добавляет, изменяет или удаляет (если `name` равно None) одну запись индекса
+        и сообщает об изменении другим процессам.
+
+        :param model: Модель записи.
+        :param pk: Первичный ключ записи.
+        :type pk: Any
+        :param name: Новое название записи.
+        :type name: str
+
+        :return: None
+        :rtype: None
+        """
+        cache = get_cache()
+        cache.add(VERSION_KEY, 0, timeout=None)
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:  # ключ вытеснен между add и incr
+            version = None
+        if not self.built:
+            return
+
+        kind = settings.AUTOCOMPLETE['MODELS'].index(model._meta.label)
+        with self._lock:
+            if self._objects.get((kind, pk), (None,))[0] != name:
+                self._remove(kind, pk)
+                if name is not None:
+                    self._add(kind, pk, name)
+                self._results = {}
+            # если между изменениями версию увеличил другой процесс, sync перестроит индекс
+            if version is not None and version == self._version + 1:
+                self._version = version
+
+    def complete(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Возвращает лучшие `limit` названий, начинающихся с `prefix`
+        или содержащих слово, начинающееся с него.
+
+        Выше стоят точные совпадения, затем совпадения с начала названия,
+        затем совпадения с начала следующего слова; внутри группы - короткие
+        названия, затем порядок моделей в `AUTOCOMPLETE['MODELS']`.
+
+        :param prefix: Введенный пользователем текст.
+        :type prefix: str
+        :param limit: Количество вариантов.
+        :type limit: int
+
+        :return: Список словарей {"type", "id", "name"}.
+        :rtype: List[Dict[str, Any]]
+        """
+        self.sync()
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results = self._results.get((prefix, limit))
+        if results is not None:
+            return results
+
+        entries = self._entries
+        if len(prefix) <= self.SHORT_PREFIX:
+            # точные совпадения названия, затем список префикса по возрастанию ранга
+            exact = entries[bisect.bisect_left(entries, (prefix,)):bisect.bisect_left(entries, (prefix, True))]
+            candidates = itertools.chain(
+                (((-1, length, kind, pk), (kind, pk)) for _, _, length, kind, pk in exact),
+                ((rank, rank[2:]) for rank in self._short.get(prefix, ())),
+            )
+            found, top = set(), []
+            for rank, obj in candidates:
+                if obj not in found:
+                    found.add(obj)
+                    top.append((rank, obj))
+                    if len(top) == limit:
+                        break
+        else:
+            start = bisect.bisect_left(entries, (prefix,))
+            stop = bisect.bisect_left(entries, (prefix + _MAX_CHAR,), start)
+            best = {}
+            for key, inner, length, kind, pk in entries[start:stop]:
+                rank = (-1 if key == prefix and not inner else inner, length, kind)
+                if rank < best.get((kind, pk), (math.inf,)):
+                    best[kind, pk] = rank
+            top = heapq.nsmallest(limit, ((rank, obj) for obj, rank in best.items()))
+
+        labels = settings.AUTOCOMPLETE['MODELS']
+        results = []
+        for rank, (kind, pk) in top:
+            name = self._objects.get((kind, pk), ('',))[0]
+            results.append({'type': labels[kind].rsplit('.', 1)[1].lower(), 'id': pk, 'name': name})
+
+        if len(self._results) >= settings.AUTOCOMPLETE['CACHE_SIZE']:
+            self._results = {}
+        self._results[prefix, limit] = results
+        return results
+
+
+index = AutocompleteIndex()
+
+
+def _on_save(sender, instance, raw=False, using=None, **kwargs) -> None:
+    if not raw:
+        pk, name = instance.pk, instance.name
+        transaction.on_commit(lambda: index.update(sender, pk, name), using=using)
+
+
+def _on_delete(sender, instance, using=None, **kwargs) -> None:
+    pk = instance.pk
+    transaction.on_commit(lambda: index.update(sender, pk), using=using)
+
+
+def connect_signals(model_labels: Iterable[str]) -> None:
+    """
+    Подключает обновление индекса автодополнения к сигналам моделей.
+    Индекс обновляется после фиксации транзакции, в которой изменена запись.
+
+    Массовые операции (`QuerySet.update`, `bulk_create`) сигналы не отправляют,
+    после них нужно вызвать `invalidate`.
+
+    :param model_labels: Метки моделей вида `products.Product`.
+    :type model_labels: Iterable[str]
+
+    :return: None
+    :rtype: None
+    """
+    for label in model_labels:
+        model = apps.get_model(label)
+        uid = f'autocomplete:{label}'
+        post_save.connect(_on_save, sender=model, dispatch_uid=uid)
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=uid)
+
+
+def invalidate() -> None:
+    """
+    Заставляет все процессы перестроить индекс при следующей сверке версии.
+
+    :return: None
+    :rtype: None
+    """
+    cache = get_cache()
+    cache.add(VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        pass
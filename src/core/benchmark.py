@@ -0,0 +1,506 @@
+import asyncio
+import io
+import math
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.urls import resolve
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.orders.models import CartItem
+from apps.products.models import Category, Product
+from apps.shops.models import Shop
+
+
+SEARCH_TERMS = ('phone', 'book', 'lamp', 'chair', 'game', 'coffee', 'shirt', 'watch')
+
+
+@dataclass
+class Dataset:
+    """Набор данных, на котором выполняются сценарии"""
+
+    users: List[Any]
+    products: List[int]
+
+
+@dataclass
+class ScenarioResult:
+    """Результаты одного сценария"""
+
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Возвращает сводку: перцентили задержки (мс), пропускную способность и запросы к БД.
+
+        :return: Словарь с метриками сценария.
+        :rtype: Dict[str, float]
+        """
+        return {
+            'requests': len(self.latencies),
+            'p50_ms': percentile(self.latencies, 50) * 1000,
+            'p95_ms': percentile(self.latencies, 95) * 1000,
+            'p99_ms': percentile(self.latencies, 99) * 1000,
+            'throughput_rps': len(self.latencies) / self.elapsed if self.elapsed else 0.0,
+            'queries_per_request': sum(self.queries) / len(self.queries) if self.queries else 0.0,
+        }
+
+
+@contextmanager
+def temporary_databases(create: bool = True) -> Iterator[None]:
+    """
+    Готовит тестовое окружение и временные базы данных для всех псевдонимов
+    из `DATABASES` (основной базы и шардов заказов), после прогона удаляет базы.
+
+    :param create: Создавать временные базы; False - работать с текущими.
+    :type create: bool
+
+    :return: Контекстный менеджер.
+    :rtype: Iterator[None]
+    """
+    try:
+        setup_test_environment()
+        environment_ready = True
+    except RuntimeError:  # окружение уже подготовлено (например, команда вызвана из тестов)
+        environment_ready = False
+
+    old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=set()) if create else None
+    try:
+        yield
+    finally:
+        if old_config is not None:
+            teardown_databases(old_config, verbosity=0)
+        if environment_ready:
+            teardown_test_environment()
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Возвращает перцентиль методом ближайшего ранга.
+
+    :param values: Значения.
+    :type values: List[float]
+    :param percent: Перцентиль от 0 до 100.
+    :type percent: float
+
+    :return: Значение перцентиля или 0 для пустого списка.
+    :rtype: float
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def seed(users: int, shops: int, categories: int, products: int, rng: random.Random) -> Dataset:
+    """
+    Создает детерминированный набор данных для сценариев.
+
+    Пароли не хешируются для каждого пользователя: всем выставляется
+    один заранее посчитанный хеш, пользователи аутентифицируются по JWT.
+
+    :return: Набор данных.
+    :rtype: Dataset
+    """
+    user_model = get_user_model()
+    password = make_password(None)
+    user_model.objects.bulk_create(
+        user_model(email=f'bench{index}@example.com', password=password) for index in range(users)
+    )
+    created_users = list(user_model.objects.filter(email__startswith='bench').order_by('id'))
+
+    Shop.objects.bulk_create(
+        Shop(name=f'Bench shop {index}', owner=rng.choice(created_users)) for index in range(shops)
+    )
+    created_shops = list(Shop.objects.filter(name__startswith='Bench shop'))
+
+    Category.objects.bulk_create(Category(name=f'Bench category {index}') for index in range(categories))
+    created_categories = list(Category.objects.filter(name__startswith='Bench category'))
+
+    Product.objects.bulk_create(
+        Product(
+            name=f'{rng.choice(SEARCH_TERMS)} {index}',
+            price=Decimal(rng.randint(100, 100000)) / 100,
+            discount=rng.choice((0, 0, 0, 5, 10, 25)),
+            description='Описание ' * rng.randint(1, 20),
+            shop=rng.choice(created_shops),
+        )
+        for index in range(products)
+    )
+    product_ids = list(Product.objects.values_list('id', flat=True))
+
+    through = Product.categories.through
+    through.objects.bulk_create(
+        through(product_id=product_id, category_id=category.id)
+        for product_id in product_ids
+        for category in rng.sample(created_categories, k=min(2, len(created_categories)))
+    )
+    return Dataset(users=created_users, products=product_ids)
+
+
+class Runner:
+    """Выполняет сценарии через тестовый клиент DRF и собирает замеры"""
+
+    def __init__(self, dataset: Dataset, rng: random.Random):
+        self.dataset = dataset
+        self.rng = rng
+        self.clients = {}
+
+    def client_for(self, user) -> APIClient:
+        client = self.clients.get(user.pk)
+        if client is None:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION='JWT ' + str(RefreshToken.for_user(user).access_token))
+            self.clients[user.pk] = client
+        return client
+
+    def measure(self, result: ScenarioResult, request: Callable[[], Any]) -> None:
+        # запросы считаются по всем базам данных, включая шарды заказов
+        with ExitStack() as stack:
+            contexts = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            started = time.perf_counter()
+            response = request()
+            latency = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise RuntimeError(f'{result.name}: {response.status_code} {response.content[:200]!r}')
+        result.latencies.append(latency)
+        result.queries.append(sum(len(context.captured_queries) for context in contexts))
+
+    def browse_products(self, result: ScenarioResult) -> None:
+        client = self.client_for(self.rng.choice(self.dataset.users))
+        self.measure(result, lambda: client.get(reverse('product-list')))
+
+    def product_detail(self, result: ScenarioResult) -> None:
+        client = self.client_for(self.rng.choice(self.dataset.users))
+        url = reverse('product-detail', kwargs={'pk': self.rng.choice(self.dataset.products)})
+        self.measure(result, lambda: client.get(url))
+
+    def search(self, result: ScenarioResult) -> None:
+        client = self.client_for(self.rng.choice(self.dataset.users))
+        term = self.rng.choice(SEARCH_TERMS)
+        self.measure(result, lambda: client.get(reverse('product-list'), {'search': term}))
+
+    def add_to_cart(self, result: ScenarioResult) -> None:
+        client = self.client_for(self.rng.choice(self.dataset.users))
+        payload = {'product': self.rng.choice(self.dataset.products), 'quantity': 1}
+        self.measure(result, lambda: client.post(reverse('cart-item-list'), payload, format='json'))
+
+    def checkout(self, result: ScenarioResult) -> None:
+        user = self.rng.choice(self.dataset.users)
+        client = self.client_for(user)
+        CartItem.objects.for_customer(user.pk).filter(user=user).delete()
+        CartItem.objects.bulk_create(
+            CartItem(user=user, product_id=product_id, quantity=self.rng.randint(1, 3))
+            for product_id in self.rng.sample(self.dataset.products, k=min(5, len(self.dataset.products)))
+        )
+        self.measure(result, lambda: client.post(reverse('order-list')))
+
+    def list_orders(self, result: ScenarioResult) -> None:
+        client = self.client_for(self.rng.choice(self.dataset.users))
+        self.measure(result, lambda: client.get(reverse('order-list')))
+
+    SCENARIOS = ('browse_products', 'product_detail', 'search', 'add_to_cart', 'checkout', 'list_orders')
+
+    def run(self, name: str, iterations: int, warmup: int) -> ScenarioResult:
+        """
+        Выполняет сценарий: сначала прогрев, затем замеряемые итерации.
+
+        :param name: Имя сценария из `SCENARIOS`.
+        :type name: str
+        :param iterations: Количество замеряемых итераций.
+        :type iterations: int
+        :param warmup: Количество итераций прогрева.
+        :type warmup: int
+
+        :return: Результаты сценария.
+        :rtype: ScenarioResult
+        """
+        step = getattr(self, name)
+        for _ in range(warmup):
+            step(ScenarioResult(name))
+
+        result = ScenarioResult(name)
+        for _ in range(iterations):
+            step(result)
+        # в пропускную способность входит только время запросов, без подготовки данных
+        result.elapsed = sum(result.latencies)
+        return result
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """
+    Сравнивает результаты с сохраненным базовым прогоном.
+
+    Регрессией считается рост p50/p95/p99 или запросов на запрос
+    более чем на `threshold`, а также падение пропускной способности.
+
+    :param results: Текущие результаты по сценариям.
+    :param baseline: Базовые результаты по сценариям.
+    :param threshold: Допустимое относительное отклонение (0.1 = 10%).
+
+    :return: Список описаний регрессий.
+    :rtype: List[str]
+    """
+    regressions = []
+    for name, current in results.items():
+        base: Optional[Dict[str, float]] = baseline.get(name)
+        if not base:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request'):
+            if base.get(metric) and current[metric] > base[metric] * (1 + threshold):
+                regressions.append(f'{name}.{metric}: {base[metric]:.2f} -> {current[metric]:.2f}')
+        base_rps = base.get('throughput_rps')
+        if base_rps and current['throughput_rps'] < base_rps * (1 - threshold):
+            regressions.append(f'{name}.throughput_rps: {base_rps:.2f} -> {current["throughput_rps"]:.2f}')
+    return regressions
+
+
+class QueryDelay:
+    """
+    Обертка выполнения SQL, добавляющая задержку к каждому запросу.
+
+    Имитирует медленную базу данных, чтобы сравнение WSGI и ASGI показывало
+    поведение под нагрузкой, а не только скорость SQLite в памяти.
+    Подключается ко всем соединениям, включая открытые в других потоках позже.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+    def install(self, sender=None, connection=None, **kwargs) -> None:
+        targets = [connection] if connection is not None else connections.all(initialized_only=True)
+        for target in targets:
+            # в начало списка: execute_wrapper() снимает со списка последнюю обертку
+            if self not in target.execute_wrappers:
+                target.execute_wrappers.insert(0, self)
+
+    def __enter__(self):
+        if self.seconds:
+            self.install()
+            connection_created.connect(self.install)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self.install)
+        for target in connections.all(initialized_only=True):
+            if self in target.execute_wrappers:
+                target.execute_wrappers.remove(self)
+
+
+def catalog_paths(dataset: Dataset, requests: int, rng: random.Random, prefix: str) -> List[str]:
+    """
+    Возвращает одинаковую для WSGI и ASGI последовательность запросов к каталогу.
+
+    :param prefix: Префикс эндпоинтов: `product` или `async-product`.
+    :type prefix: str
+
+    :return: Список путей.
+    :rtype: List[str]
+    """
+    paths = []
+    for _ in range(requests):
+        if rng.random() < 0.2:
+            paths.append(reverse(f'{prefix}-list'))
+        else:
+            paths.append(reverse(f'{prefix}-detail', kwargs={'pk': rng.choice(dataset.products)}))
+    return paths
+
+
+def run_wsgi(application, paths: List[str], concurrency: int, threads: int) -> ScenarioResult:
+    """
+    Прогоняет запросы через WSGI приложение.
+
+    `concurrency` клиентов отправляют запросы одновременно, а рабочий процесс
+    обрабатывает не больше `threads` запросов за раз, как синхронный воркер
+    gunicorn с потоками. Задержка включает ожидание свободного потока.
+
+    :return: Результаты прогона.
+    :rtype: ScenarioResult
+    """
+    result = ScenarioResult('wsgi')
+    queue = list(reversed(paths))
+    lock = threading.Lock()
+
+    def handle(path: str) -> str:
+        statuses = []
+        body = application({
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+            'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr, 'wsgi.multithread': threads > 1, 'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }, lambda status, headers, exc_info=None: statuses.append(status))
+        b''.join(body)
+        body.close()
+        return statuses[0]
+
+    # очередь пула потоков FIFO, как очередь соединений перед воркером
+    with ThreadPoolExecutor(max_workers=threads) as worker:
+        def client():
+            while True:
+                with lock:
+                    if not queue:
+                        return
+                    path = queue.pop()
+                started = time.perf_counter()
+                status = worker.submit(handle, path).result()
+                latency = time.perf_counter() - started
+                if not status.startswith('200'):
+                    raise RuntimeError(f'wsgi {path}: {status}')
+                with lock:
+                    result.latencies.append(latency)
+
+        started = time.perf_counter()
+        clients = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        result.elapsed = time.perf_counter() - started
+    return result
+
+
+def run_asgi(application, paths: List[str], concurrency: int) -> ScenarioResult:
+    """
+    Прогоняет запросы через ASGI приложение в одном цикле событий.
+
+    `concurrency` клиентов отправляют запросы одновременно, как к одному
+    рабочему процессу uvicorn.
+
+    :return: Результаты прогона.
+    :rtype: ScenarioResult
+    """
+    result = ScenarioResult('asgi')
+    queue = list(reversed(paths))
+
+    async def request(path: str) -> None:
+        messages = []
+        received = False
+
+        async def receive():
+            nonlocal received
+            if received:  # после ответа клиент отключается
+                await asyncio.Event().wait()
+            received = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        started = time.perf_counter()
+        await application({
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '', 'query_string': b'',
+            'headers': [(b'host', b'testserver')], 'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+        }, receive, send)
+        latency = time.perf_counter() - started
+        status = messages[0]['status']
+        if status != 200:
+            raise RuntimeError(f'asgi {path}: {status}')
+        result.latencies.append(latency)
+
+    async def client():
+        while queue:
+            await request(queue.pop())
+
+    async def main():
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def time_codecs(data: Any, renderer_classes: Dict[str, type], parser_classes: Dict[str, type],
+                rounds: int) -> Dict[str, Dict[str, float]]:
+    """
+    Замеряет рендеринг `data` и разбор результата каждым рендерером и парсером.
+
+    Берется медиана `rounds` повторов. Парсер с тем же именем, что и рендерер,
+    разбирает его вывод.
+
+    :param data: Данные ответа (например, `response.data` списка продуктов).
+    :param renderer_classes: Словарь {имя: класс рендерера}.
+    :type renderer_classes: Dict[str, type]
+    :param parser_classes: Словарь {имя: класс парсера}.
+    :type parser_classes: Dict[str, type]
+    :param rounds: Количество повторов.
+    :type rounds: int
+
+    :return: Словарь {имя: {'render_ms', 'parse_ms', 'bytes'}}.
+    :rtype: Dict[str, Dict[str, float]]
+    """
+    results = {}
+    for name, renderer_class in renderer_classes.items():
+        renderer = renderer_class()
+        content = renderer.render(data, renderer.media_type, {})
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            renderer.render(data, renderer.media_type, {})
+            timings.append(time.perf_counter() - started)
+        results[name] = {'render_ms': percentile(timings, 50) * 1000, 'parse_ms': 0.0, 'bytes': len(content)}
+
+        if name in parser_classes:
+            parser = parser_classes[name]()
+            timings = []
+            for _ in range(rounds):
+                stream = io.BytesIO(content)
+                started = time.perf_counter()
+                parser.parse(stream, parser.media_type, {})
+                timings.append(time.perf_counter() - started)
+            results[name]['parse_ms'] = percentile(timings, 50) * 1000
+    return results
+
+
+def time_view(path: str, params: Dict[str, str], rounds: int) -> float:
+    """
+    Замеряет обработку GET запроса представлением без middleware и рендеринга.
+
+    :param path: Путь эндпоинта.
+    :type path: str
+    :param params: Параметры запроса.
+    :type params: Dict[str, str]
+    :param rounds: Количество повторов.
+    :type rounds: int
+
+    :return: Медиана времени обработки в миллисекундах.
+    :rtype: float
+    """
+    match = resolve(path)
+    factory = APIRequestFactory()
+    timings = []
+    for _ in range(rounds):
+        request = factory.get(path, params)
+        started = time.perf_counter()
+        response = match.func(request, *match.args, **match.kwargs)
+        timings.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f'{path}: {response.status_code}')
+    return percentile(timings, 50) * 1000
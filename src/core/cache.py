@@ -0,0 +1,206 @@
+import hashlib
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+
+TAG_KEY_PREFIX = 'response-cache:tag:'
+ENTRY_KEY_PREFIX = 'response-cache:entry:'
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE['ALIAS']]
+
+
+def model_tag(model) -> str:
+    """Тег, зависящий от любой записи модели (списки)."""
+    return model._meta.label_lower
+
+
+def instance_tag(model, pk: Any) -> str:
+    """Тег, зависящий от одной записи модели (детальное представление)."""
+    return f'{model._meta.label_lower}:{pk}'
+
+
+def _initial_version() -> int:
+    # версия начинается с текущего времени, чтобы вытесненный и заново созданный тег
+    # не совпал со старой версией, сохраненной в записях кэша
+    return time.time_ns()
+
+
+def get_tag_versions(tags: Iterable[str]) -> Dict[str, int]:
+    """
+    Возвращает текущие версии тегов, создавая отсутствующие.
+
+    :param tags: Теги.
+    :type tags: Iterable[str]
+
+    :return: Словарь {тег: версия}.
+    :rtype: Dict[str, int]
+    """
+    cache = get_cache()
+    keys = {TAG_KEY_PREFIX + tag: tag for tag in tags}
+    found = cache.get_many(keys)
+    versions = {keys[key]: value for key, value in found.items()}
+    for key, tag in keys.items():
+        if key not in found:
+            cache.add(key, _initial_version(), timeout=None)
+            versions[tag] = cache.get(key)
+    return versions
+
+
+def invalidate_tags(tags: Iterable[str]) -> None:
+    """
+    Делает недействительными все записи кэша, помеченные указанными тегами.
+
+    :param tags: Теги.
+    :type tags: Iterable[str]
+
+    :return: None
+    :rtype: None
+    """
+    cache = get_cache()
+    for tag in set(tags):
+        key = TAG_KEY_PREFIX + tag
+        try:
+            cache.incr(key)
+        except ValueError:  # тега еще нет, значит и записей с ним нет
+            cache.add(key, _initial_version(), timeout=None)
+
+
+def invalidate_tags_on_commit(tags: Iterable[str], using: Optional[str] = None) -> None:
+    """
+    Делает записи с указанными тегами недействительными после фиксации текущей транзакции.
+
+    Если сбросить теги внутри транзакции, параллельный запрос успеет прочитать
+    старые данные и сохранить их в кэш с новыми версиями тегов. Вне транзакции
+    теги сбрасываются сразу, при откате транзакции - не сбрасываются.
+
+    :param tags: Теги.
+    :type tags: Iterable[str]
+    :param using: База данных транзакции.
+    :type using: Optional[str]
+
+    :return: None
+    :rtype: None
+    """
+    tags = set(tags)
+    transaction.on_commit(lambda: invalidate_tags(tags), using=using)
+
+
+def make_entry_key(namespace: str, *parts: str) -> str:
+    digest = hashlib.md5('\n'.join(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'{ENTRY_KEY_PREFIX}{namespace}:{digest}'
+
+
+def get_entry(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Возвращает запись кэша, если ни один из ее тегов не изменился.
+
+    :param key: Ключ записи.
+    :type key: str
+
+    :return: Запись или None.
+    :rtype: Optional[Dict[str, Any]]
+    """
+    entry = get_cache().get(key)
+    if entry is None:
+        return None
+    if get_tag_versions(entry['versions']) != entry['versions']:
+        return None
+    return entry
+
+
+def set_entry(key: str, versions: Dict[str, int], payload: Dict[str, Any], timeout: int) -> None:
+    """
+    Сохраняет запись кэша вместе с версиями тегов.
+
+    Версии нужно прочитать до формирования ответа: тогда изменение, случившееся
+    во время формирования, сделает запись недействительной при следующем чтении.
+
+    :param key: Ключ записи.
+    :type key: str
+    :param versions: Версии тегов из `get_tag_versions`.
+    :type versions: Dict[str, int]
+    :param payload: Данные записи.
+    :type payload: Dict[str, Any]
+    :param timeout: Время жизни записи в секундах.
+    :type timeout: int
+
+    :return: None
+    :rtype: None
+    """
+    get_cache().set(key, {**payload, 'versions': versions}, timeout)
+
+
+def _m2m_related_tags(instance) -> Set[str]:
+    """Теги записей, связанных с удаляемым объектом через "многие ко многим"."""
+    tags = set()
+    for relation in instance._meta.get_fields():
+        if not relation.many_to_many:
+            continue
+        if relation.auto_created:  # обратная сторона связи
+            accessor = relation.get_accessor_name()
+        else:
+            accessor = relation.name
+        related_model = relation.related_model
+        tags.add(model_tag(related_model))
+        for pk in getattr(instance, accessor).values_list('pk', flat=True):
+            tags.add(instance_tag(related_model, pk))
+    return tags
+
+
+def _on_save(sender, instance, using=None, **kwargs):
+    invalidate_tags_on_commit((model_tag(sender), instance_tag(sender, instance.pk)), using)
+
+
+def _on_pre_delete(sender, instance, **kwargs):
+    # строки промежуточной таблицы удаляются без сигнала m2m_changed
+    instance._response_cache_tags = _m2m_related_tags(instance)
+
+
+def _on_delete(sender, instance, using=None, **kwargs):
+    tags = {model_tag(sender), instance_tag(sender, instance.pk)}
+    tags |= getattr(instance, '_response_cache_tags', set())
+    invalidate_tags_on_commit(tags, using)
+
+
+def _on_m2m_changed(sender, instance, action, reverse, model, pk_set, using=None, **kwargs):
+    if not action.startswith('post_'):
+        return
+    tags = {model_tag(type(instance)), instance_tag(type(instance), instance.pk), model_tag(model)}
+    # pk_set содержит записи другой стороны связи, для clear он пустой
+    if pk_set:
+        tags |= {instance_tag(model, pk) for pk in pk_set}
+    else:
+        tags.add(model_tag(model))
+    invalidate_tags_on_commit(tags, using)
+
+
+def connect_signals(model_labels: Iterable[str]) -> None:
+    """
+    Подключает инвалидацию кэша ответов к сигналам моделей.
+
+    Теги сбрасываются после фиксации транзакции, в которой изменилась запись.
+    Массовые операции (`QuerySet.update`, `bulk_create`) сигналы не отправляют,
+    после них нужно вызвать `invalidate_tags_on_commit` вручную.
+
+    :param model_labels: Метки моделей вида `products.Product`.
+    :type model_labels: Iterable[str]
+
+    :return: None
+    :rtype: None
+    """
+    for label in model_labels:
+        model = apps.get_model(label)
+        uid = f'response-cache:{label}'
+        post_save.connect(_on_save, sender=model, dispatch_uid=uid)
+        pre_delete.connect(_on_pre_delete, sender=model, dispatch_uid=uid)
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=uid)
+        for field in model._meta.many_to_many:
+            m2m_changed.connect(_on_m2m_changed, sender=field.remote_field.through, dispatch_uid=uid)
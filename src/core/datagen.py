@@ -0,0 +1,331 @@
+import csv
+import io
+import random
+from array import array
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.color import no_style
+from django.db import connections
+from django.db.models import Max
+
+from apps.orders.models import CartItem, Order, OrderItem
+from apps.products.models import PATH_SEPARATOR, Category, Product
+from apps.reviews.models import Review
+from apps.shops.models import Shop
+from . import autocomplete
+from .sharding import ID_RANGE, shard_for
+
+
+EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+PERIOD_SECONDS = 2 * 365 * 24 * 60 * 60
+
+WORDS = ('Смартфон', 'Ноутбук', 'Кофе', 'Чай', 'Книга', 'Лампа', 'Стул', 'Стол', 'Игра', 'Часы',
+         'Рубашка', 'Кроссовки', 'Рюкзак', 'Наушники', 'Камера', 'Чайник', 'Плед', 'Ручка')
+ADJECTIVES = ('Новый', 'Классический', 'Умный', 'Большой', 'Компактный', 'Премиум', 'Детский', 'Домашний')
+DISCOUNTS = (0, 5, 10, 15, 20, 30, 50)
+DISCOUNT_WEIGHTS = (70, 8, 8, 5, 4, 3, 2)
+STATUSES = [status for status, _ in Order.STATUSES]
+STATUS_WEIGHTS = (5, 5, 10, 10, 60, 7, 3)
+GRADES = (1, 2, 3, 4, 5)
+GRADE_WEIGHTS = (5, 7, 15, 33, 40)
+
+
+def batched(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    """Разбивает поток строк на пачки указанного размера."""
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class BulkWriter:
+    """
+    Пишет строки в таблицы модели пачками.
+
+    На PostgreSQL используется `COPY ... FROM STDIN` (psycopg2 и psycopg 3),
+    на остальных СУБД - `bulk_create`. Строки передаются кортежами значений
+    в порядке `fields` (имена атрибутов модели, например `shop_id`).
+    Строки шардируемых моделей пишутся в базу данных шарда, переданную в `using`.
+    """
+
+    def __init__(self, batch_size: int, using: str = 'default'):
+        self.batch_size = batch_size
+        self.using = using
+        self.use_copy = connections[using].vendor == 'postgresql'
+
+    def write(self, model, fields: Sequence[str], rows: Iterable[tuple], using: Optional[str] = None) -> int:
+        """
+        Записывает строки в таблицу модели.
+
+        :param using: База данных; по умолчанию - база данных писателя.
+        :type using: Optional[str]
+
+        :return: Количество записанных строк.
+        :rtype: int
+        """
+        using = using or self.using
+        written = 0
+        for batch in batched(rows, self.batch_size):
+            if connections[using].vendor == 'postgresql':
+                self._copy(model, fields, batch, using)
+            else:
+                model._default_manager.using(using).bulk_create(
+                    [model(**dict(zip(fields, row))) for row in batch],
+                    batch_size=self.batch_size,
+                )
+            written += len(batch)
+        return written
+
+    def _copy(self, model, fields: Sequence[str], batch: List[tuple], using: str) -> None:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        connection = connections[using]
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+        sql = f'COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)'
+        with connection.cursor() as cursor:
+            if hasattr(cursor, 'copy_expert'):  # psycopg2
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+    def reset_sequences(self, model_list: Sequence, using: Optional[str] = None) -> None:
+        """Сдвигает последовательности первичных ключей после вставки явных id."""
+        connection = connections[using or self.using]
+        statements = connection.ops.sequence_reset_sql(no_style(), model_list)
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+
+
+class DataGenerator:
+    """
+    Детерминированный генератор синтетических данных магазина.
+
+    Распределения приближены к реальным: популярность продуктов и активность
+    покупателей подчиняются степенному закону, цены - логнормальному
+    распределению, большинство продуктов без скидки, оценки смещены к 4-5.
+    Идентификаторы назначаются явно, поэтому внешние ключи не требуют
+    обратного чтения из базы данных.
+    """
+
+    def __init__(self, writer: BulkWriter, seed: int = 1,
+                 log: Optional[Callable[[str], None]] = None):
+        self.writer = writer
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.user_ids: Tuple[int, int] = (0, 0)
+        self.shop_ids: Tuple[int, int] = (0, 0)
+        self.category_ids: Tuple[int, int] = (0, 0)
+        self.product_ids: Tuple[int, int] = (0, 0)
+        # цены в копейках, скидки, магазины и слова названий продуктов, индекс - смещение от первого id
+        self.prices = array('q')
+        self.discounts = array('B')
+        self.product_shops = array('q')
+        self.product_words = array('H')
+        # шарды, в которые записаны заказы
+        self.order_shards = set()
+
+    @staticmethod
+    def next_id(model, using: Optional[str] = None) -> int:
+        return (model._default_manager.db_manager(using).aggregate(max_id=Max('pk'))['max_id'] or 0) + 1
+
+    @staticmethod
+    def shop_name(pk: int) -> str:
+        return f'Магазин {pk}'
+
+    def product_name(self, pk: int) -> str:
+        adjective, word = divmod(self.product_words[pk - self.product_ids[0]], len(WORDS))
+        return f'{ADJECTIVES[adjective]} {WORDS[word].lower()} {pk}'
+
+    def moment(self) -> datetime:
+        return EPOCH + timedelta(seconds=self.rng.randrange(PERIOD_SECONDS))
+
+    def skewed(self, size: int, skew: float = 2.5) -> int:
+        """Случайный индекс от 0 до size-1, маленькие индексы выпадают намного чаще."""
+        return min(int(size * self.rng.random() ** skew), size - 1)
+
+    def pick(self, id_range: Tuple[int, int], skew: float = 2.5) -> int:
+        start, stop = id_range
+        return start + self.skewed(stop - start, skew)
+
+    def users(self, count: int) -> int:
+        start = self.next_id(get_user_model())
+        self.user_ids = (start, start + count)
+        # пароль не хешируется: у всех пользователей одно непригодное для входа значение
+        password = f'{UNUSABLE_PASSWORD_PREFIX}synthetic'
+        rows = (
+            (pk, password, f'user{pk}@example.com', f'Имя{pk}', f'Фамилия{pk}',
+             False, False, True, self.moment(), self.rng.choice(('male', 'female')))
+            for pk in range(*self.user_ids)
+        )
+        return self.writer.write(get_user_model(), (
+            'id', 'password', 'email', 'first_name', 'last_name',
+            'is_superuser', 'is_staff', 'is_active', 'date_joined', 'gender',
+        ), rows)
+
+    def shops(self, count: int) -> int:
+        start = self.next_id(Shop)
+        self.shop_ids = (start, start + count)
+        rows = (
+            (pk, self.shop_name(pk), f'Описание магазина {pk}', self.pick(self.user_ids, skew=1.5), self.moment())
+            for pk in range(*self.shop_ids)
+        )
+        return self.writer.write(Shop, ('id', 'name', 'description', 'owner_id', 'created_at'), rows)
+
+    def categories(self, count: int) -> int:
+        start = self.next_id(Category)
+        self.category_ids = (start, start + count)
+        roots = max(1, count // 10)
+
+        def rows():
+            # дерево: первые категории корневые, у остальных родитель из уже созданных
+            paths = {}
+            for pk in range(*self.category_ids):
+                parent_id = None if pk < start + roots else self.rng.randrange(start, pk)
+                paths[pk] = f'{paths[parent_id] if parent_id else ""}{pk}{PATH_SEPARATOR}'
+                yield pk, f'Категория {pk}', None, parent_id, paths[pk]
+
+        return self.writer.write(Category, ('id', 'name', 'description', 'parent_id', 'path'), rows())
+
+    def products(self, count: int, max_categories: int = 3) -> int:
+        start = self.next_id(Product)
+        self.product_ids = (start, start + count)
+        self.prices = array('q')
+        self.discounts = array('B')
+        self.product_shops = array('q')
+        self.product_words = array('H')
+        rng = self.rng
+
+        def product_rows():
+            for pk in range(*self.product_ids):
+                price = max(100, min(int(rng.lognormvariate(9.0, 1.3)), 9_999_999_999))
+                discount = rng.choices(DISCOUNTS, DISCOUNT_WEIGHTS)[0]
+                self.prices.append(price)
+                self.discounts.append(discount)
+                self.product_words.append(rng.randrange(len(ADJECTIVES)) * len(WORDS) + rng.randrange(len(WORDS)))
+                name = self.product_name(pk)
+                description = 'Описание продукта ' * rng.randint(1, 30)
+                added_at = self.moment()
+                shop_id = self.pick(self.shop_ids, skew=1.5)
+                self.product_shops.append(shop_id)
+                yield pk, name, Decimal(price).scaleb(-2), description, added_at, discount, shop_id
+
+        written = self.writer.write(Product, (
+            'id', 'name', 'price', 'description', 'added_at', 'discount', 'shop_id',
+        ), product_rows())
+
+        category_count = self.category_ids[1] - self.category_ids[0]
+        if category_count:
+            def category_rows():
+                for pk in range(*self.product_ids):
+                    size = min(rng.randint(1, max_categories), category_count)
+                    for category_id in {self.pick(self.category_ids, skew=1.5) for _ in range(size)}:
+                        yield pk, category_id
+
+            self.writer.write(Product.categories.through, ('product_id', 'category_id'), category_rows())
+        return written
+
+    def line_total(self, product_id: int, quantity: int) -> int:
+        index = product_id - self.product_ids[0]
+        return self.prices[index] * (100 - self.discounts[index]) * quantity // 100
+
+    def cart_items(self, carts: int, max_items: int = 5) -> int:
+        user_count = self.user_ids[1] - self.user_ids[0]
+        rng = self.rng
+
+        # корзина пишется в шард пользователя
+        rows = {}
+        for user_id in rng.sample(range(*self.user_ids), k=min(carts, user_count)):
+            for product_id in {self.pick(self.product_ids) for _ in range(rng.randint(1, max_items))}:
+                rows.setdefault(shard_for(user_id), []).append((rng.randint(1, 3), self.moment(), user_id, product_id))
+
+        return sum(
+            self.writer.write(CartItem, ('quantity', 'added_at', 'user_id', 'product_id'), shard_rows, using=alias)
+            for alias, shard_rows in rows.items()
+        )
+
+    def orders(self, count: int, max_lines: int = 6) -> int:
+        """
+        Создает заказы вместе с элементами в шардах покупателей.
+
+        Общая цена заказа и снимок продукта в элементах берутся из данных продуктов в памяти,
+        без запросов к базе данных. Идентификаторы заказов назначаются из диапазона шарда
+        (см. `core.sharding`), элементы получают идентификаторы от счетчика шарда.
+
+        :return: Количество элементов заказов.
+        :rtype: int
+        """
+        rng = self.rng
+        aliases = settings.SHARDING['ALIASES']
+        queued = settings.FULFILMENT['ORDER_STATUSES']
+        next_ids = {}
+        order_fields = ('id', 'dispatch_date', 'status', 'customer_id', 'total_amount')
+        item_fields = ('quantity', 'order_id', 'product_id', 'product_name', 'unit_price', 'discount',
+                       'shop_id', 'shop_name', 'total_amount', 'fulfilment_status')
+        written_orders = written_items = 0
+
+        while written_orders < count:
+            size = min(self.writer.batch_size, count - written_orders)
+            orders, items = {}, {}
+            for _ in range(size):
+                customer_id = self.pick(self.user_ids, skew=2.0)
+                alias = shard_for(customer_id)
+                if alias not in next_ids:
+                    next_ids[alias] = max(self.next_id(Order, alias), aliases.index(alias) * ID_RANGE + 1)
+                pk = next_ids[alias]
+                next_ids[alias] += 1
+
+                status = rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+                fulfilment_status = ('pending' if status in queued
+                                     else OrderItem.CLOSED_ORDER_STATUSES.get(status, 'packed'))
+                total = 0
+                lines = min(1 + self.skewed(max_lines, skew=2.0), max_lines)
+                for product_id in {self.pick(self.product_ids) for _ in range(lines)}:
+                    index = product_id - self.product_ids[0]
+                    quantity = rng.choices((1, 2, 3, 5), (70, 20, 7, 3))[0]
+                    line_total = self.line_total(product_id, quantity)
+                    total += line_total
+                    shop_id = self.product_shops[index]
+                    items.setdefault(alias, []).append((
+                        quantity, pk, product_id, self.product_name(product_id),
+                        Decimal(self.prices[index]).scaleb(-2), self.discounts[index],
+                        shop_id, self.shop_name(shop_id), Decimal(line_total).scaleb(-2), fulfilment_status,
+                    ))
+                orders.setdefault(alias, []).append(
+                    (pk, self.moment().date(), status, customer_id, Decimal(total).scaleb(-2)))
+
+            for alias, shard_orders in orders.items():
+                self.writer.write(Order, order_fields, shard_orders, using=alias)
+                written_items += self.writer.write(OrderItem, item_fields, items[alias], using=alias)
+            written_orders += size
+            self.log(f'  заказов: {written_orders}, элементов: {written_items}')
+        self.order_shards.update(next_ids)
+        return written_items
+
+    def reviews(self, count: int) -> int:
+        rng = self.rng
+        rows = (
+            (rng.choices(GRADES, GRADE_WEIGHTS)[0], rng.choice((None, 'Отличный товар', 'Не понравилось')),
+             self.pick(self.product_ids), self.pick(self.user_ids, skew=2.0))
+            for _ in range(count)
+        )
+        return self.writer.write(Review, ('grade', 'comment', 'product_id', 'customer_id'), rows)
+
+    def finish(self) -> None:
+        """
+        Выравнивает последовательности id после вставки явных значений
+        и перестраивает индекс автодополнения, так как массовая вставка не отправляет сигналы.
+        """
+        self.writer.reset_sequences([get_user_model(), Shop, Category, Product])
+        for alias in self.order_shards:
+            self.writer.reset_sequences([Order], using=alias)
+        autocomplete.invalidate()
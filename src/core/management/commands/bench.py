@@ -0,0 +1,79 @@
+import json
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный прогон основных сценариев API через тестовый клиент: '
+            'p50/p95/p99, пропускная способность и SQL запросы на запрос.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--shops', type=int, default=20)
+        parser.add_argument('--categories', type=int, default=30)
+        parser.add_argument('--products', type=int, default=500)
+        parser.add_argument('--iterations', type=int, default=200, help='Замеряемых запросов на сценарий.')
+        parser.add_argument('--warmup', type=int, default=10, help='Запросов прогрева на сценарий.')
+        parser.add_argument('--seed', type=int, default=42, help='Зерно генератора случайных чисел.')
+        parser.add_argument('--scenario', action='append', choices=benchmark.Runner.SCENARIOS,
+                            help='Сценарий для прогона (можно указать несколько), по умолчанию все.')
+        parser.add_argument('--output', help='Файл для результатов в формате JSON.')
+        parser.add_argument('--baseline', help='JSON файл базового прогона для сравнения.')
+        parser.add_argument('--threshold', type=float, default=0.1,
+                            help='Допустимое ухудшение относительно базового прогона (0.1 = 10%%).')
+        parser.add_argument('--use-current-db', action='store_true',
+                            help='Не создавать временные базы, а работать с текущими.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)['scenarios']
+
+        # все запросы идут с одного адреса, ограничение частоты оборвало бы сценарии корзины и заказов
+        throttling = {**settings.THROTTLING, 'ENABLED': False}
+        create = not options['use_current_db']
+        with benchmark.temporary_databases(create=create), override_settings(THROTTLING=throttling):
+            results = self.run_scenarios(options)
+
+        self.print_table(results)
+        report = {
+            'parameters': {key: options[key] for key in
+                           ('users', 'shops', 'categories', 'products', 'iterations', 'warmup', 'seed')},
+            'scenarios': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2, ensure_ascii=False)
+            self.stdout.write(f'Результаты записаны в {options["output"]}')
+
+        if baseline is not None:
+            regressions = benchmark.compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError('Обнаружены регрессии:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('Регрессий относительно базового прогона нет'))
+
+    def run_scenarios(self, options):
+        rng = random.Random(options['seed'])
+        dataset = benchmark.seed(options['users'], options['shops'], options['categories'],
+                                 options['products'], rng)
+        runner = benchmark.Runner(dataset, rng)
+
+        results = {}
+        for name in options['scenario'] or benchmark.Runner.SCENARIOS:
+            results[name] = runner.run(name, options['iterations'], options['warmup']).summary()
+        return results
+
+    def print_table(self, results):
+        header = f'{"scenario":<18}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"rps":>10}{"queries":>10}'
+        self.stdout.write(header)
+        for name, summary in results.items():
+            self.stdout.write(
+                f'{name:<18}{summary["p50_ms"]:>10.2f}{summary["p95_ms"]:>10.2f}{summary["p99_ms"]:>10.2f}'
+                f'{summary["throughput_rps"]:>10.1f}{summary["queries_per_request"]:>10.1f}'
+            )
@@ -0,0 +1,63 @@
+import json
+import random
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Сравнение пропускной способности каталога: синхронные наборы представлений под WSGI '
+            'и асинхронные эндпоинты под ASGI при одинаковой нагрузке.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--shops', type=int, default=10)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--products', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=500, help='Запросов в каждом режиме.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Одновременных клиентов.')
+        parser.add_argument('--threads', type=int, default=1,
+                            help='Потоков WSGI воркера (1 - синхронный воркер).')
+        parser.add_argument('--query-delay', type=float, default=0.0,
+                            help='Искусственная задержка каждого SQL запроса в миллисекундах.')
+        parser.add_argument('--seed', type=int, default=42, help='Зерно генератора случайных чисел.')
+        parser.add_argument('--output', help='Файл для результатов в формате JSON.')
+
+    def handle(self, *args, **options):
+        # кэш ответов выключен, чтобы сравнивать обработку запросов, а не попадания в кэш
+        response_cache = {**settings.RESPONSE_CACHE, 'ENABLED': False}
+        with benchmark.temporary_databases(), override_settings(RESPONSE_CACHE=response_cache):
+            results = self.run_modes(options)
+
+        header = f'{"mode":<8}{"rps":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+        self.stdout.write(header)
+        for name, summary in results.items():
+            self.stdout.write(f'{name:<8}{summary["throughput_rps"]:>10.1f}{summary["p50_ms"]:>10.2f}'
+                              f'{summary["p95_ms"]:>10.2f}{summary["p99_ms"]:>10.2f}')
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({'parameters': {key: options[key] for key in (
+                    'products', 'requests', 'concurrency', 'threads', 'query_delay', 'seed')},
+                    'modes': results}, file, indent=2, ensure_ascii=False)
+            self.stdout.write(f'Результаты записаны в {options["output"]}')
+
+    def run_modes(self, options):
+        rng = random.Random(options['seed'])
+        dataset = benchmark.seed(options['users'], options['shops'], options['categories'],
+                                 options['products'], rng)
+        # одна и та же последовательность объектов для обоих режимов
+        wsgi_paths = benchmark.catalog_paths(dataset, options['requests'], random.Random(options['seed']), 'product')
+        asgi_paths = benchmark.catalog_paths(dataset, options['requests'], random.Random(options['seed']),
+                                             'async-product')
+
+        with benchmark.QueryDelay(options['query_delay'] / 1000):
+            wsgi = benchmark.run_wsgi(get_wsgi_application(), wsgi_paths,
+                                      options['concurrency'], options['threads'])
+            asgi = benchmark.run_asgi(get_asgi_application(), asgi_paths, options['concurrency'])
+        return {'wsgi': wsgi.summary(), 'asgi': asgi.summary()}
@@ -0,0 +1,72 @@
+import json
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from base.parsers import MessagePackParser, ORJSONParser
+from base.renderers import MessagePackRenderer, ORJSONRenderer
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Сравнение чтения и рендеринга списка продуктов: сериализатор DRF и values_list, '
+            'JSON DRF, JSON на orjson и MessagePack.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--shops', type=int, default=10)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--expand', default='', help='Раскрываемые связи, например `shop`.')
+        parser.add_argument('--rounds', type=int, default=50, help='Повторов для каждого рендерера.')
+        parser.add_argument('--seed', type=int, default=42, help='Зерно генератора случайных чисел.')
+        parser.add_argument('--output', help='Файл для результатов в формате JSON.')
+
+    def handle(self, *args, **options):
+        response_cache = {**settings.RESPONSE_CACHE, 'ENABLED': False}
+        with benchmark.temporary_databases(), override_settings(RESPONSE_CACHE=response_cache):
+            benchmark.seed(options['users'], options['shops'], options['categories'],
+                           options['products'], random.Random(options['seed']))
+            params = {'expand': options['expand']} if options['expand'] else {}
+            response = APIClient().get(reverse('product-list'), params)
+            if response.status_code != 200:
+                raise CommandError(f'Список продуктов вернул {response.status_code}')
+            data = response.data
+
+            url = reverse('product-list')
+            view_ms = {'values': benchmark.time_view(url, params, options['rounds'])}
+            with override_settings(VALUES_LIST_ENABLED=False):
+                view_ms['serializer'] = benchmark.time_view(url, params, options['rounds'])
+
+        if ORJSONRenderer().render(data) != JSONRenderer().render(data):
+            raise CommandError('Вывод ORJSONRenderer отличается от JSONRenderer')
+
+        results = benchmark.time_codecs(
+            data,
+            {'drf-json': JSONRenderer, 'orjson': ORJSONRenderer, 'msgpack': MessagePackRenderer},
+            {'drf-json': JSONParser, 'orjson': ORJSONParser, 'msgpack': MessagePackParser},
+            options['rounds'],
+        )
+        self.stdout.write(f'{"list view":<12}{"ms":>10}{"speedup":>10}')
+        for name in ('serializer', 'values'):
+            self.stdout.write(f'{name:<12}{view_ms[name]:>10.2f}{view_ms["serializer"] / view_ms[name]:>9.1f}x')
+
+        baseline = results['drf-json']
+        self.stdout.write(f'{"codec":<10}{"render ms":>12}{"speedup":>10}{"parse ms":>12}{"speedup":>10}{"bytes":>10}')
+        for name, timings in results.items():
+            timings['render_speedup'] = baseline['render_ms'] / timings['render_ms']
+            timings['parse_speedup'] = baseline['parse_ms'] / timings['parse_ms']
+            self.stdout.write(f'{name:<10}{timings["render_ms"]:>12.2f}{timings["render_speedup"]:>9.1f}x'
+                              f'{timings["parse_ms"]:>12.2f}{timings["parse_speedup"]:>9.1f}x{timings["bytes"]:>10}')
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({'parameters': {key: options[key] for key in ('products', 'expand', 'rounds', 'seed')},
+                           'list_view_ms': view_ms, 'codecs': results}, file, indent=2, ensure_ascii=False)
+            self.stdout.write(f'Результаты записаны в {options["output"]}')
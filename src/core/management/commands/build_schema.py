@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core import schema
+
+
+class Command(BaseCommand):
+    help = ('Генерирует схему OpenAPI во всех форматах и сохраняет ее в OPENAPI_SCHEMA_CACHE_DIR. '
+            'Схема перегенерируется, только если изменился код.')
+
+    def handle(self, *args, **options):
+        schema.clear()
+        schema.warm_up()
+        self.stdout.write(self.style.SUCCESS(f'Схема OpenAPI готова (отпечаток кода {schema.source_fingerprint()})'))
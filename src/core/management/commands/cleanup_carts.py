@@ -0,0 +1,62 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from apps.orders.models import CartItem, GuestCartMerge
+from core.sharding import get_shards
+
+
+class Command(BaseCommand):
+    help = ('Удаляет брошенные корзины: элементы, добавленные раньше CART_RETENTION["DAYS"] дней назад. '
+            'Удаление идет небольшими пачками с паузой между ними на каждом шарде.')
+
+    def add_arguments(self, parser):
+        config = settings.CART_RETENTION
+        parser.add_argument('--days', type=int, default=config['DAYS'], help='Срок хранения элемента корзины.')
+        parser.add_argument('--batch-size', type=int, default=config['BATCH_SIZE'])
+        parser.add_argument('--pause', type=float, default=config['PAUSE'], help='Пауза между пачками в секундах.')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, что будет удалено.')
+
+    def handle(self, *args, **options):
+        if options['days'] <= 0 or options['batch_size'] <= 0:
+            raise CommandError('--days и --batch-size должны быть больше нуля.')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        self.stdout.write(f'Удаляются элементы корзин, добавленные до {cutoff:%Y-%m-%d %H:%M}')
+
+        total = 0
+        for alias in get_shards():
+            expired = CartItem.objects.using(alias).filter(added_at__lt=cutoff)
+            if options['dry_run']:
+                stats = expired.aggregate(items=Count('pk'), users=Count('user', distinct=True),
+                                          oldest=Min('added_at'), newest=Max('added_at'))
+                total += stats['items']
+                self.stdout.write(f'{alias}: {stats["items"]} элементов у {stats["users"]} пользователей'
+                                  + (f' (с {stats["oldest"]:%Y-%m-%d} по {stats["newest"]:%Y-%m-%d})'
+                                     if stats['items'] else ''))
+                continue
+
+            started = time.perf_counter()
+            removed = batches = 0
+            for deleted in CartItem.objects.using(alias).purge_expired(cutoff, options['batch_size']):
+                removed += deleted
+                batches += 1
+                if deleted == options['batch_size'] and options['pause']:
+                    time.sleep(options['pause'])  # дает место обычной нагрузке между пачками
+            total += removed
+            self.stdout.write(f'{alias}: удалено {removed} элементов, пачек: {batches}, '
+                              f'за {time.perf_counter() - started:.1f} с')
+
+        if not options['dry_run']:
+            # хэш перенесенного токена нужен, пока токен действует (CART_RETENTION["DAYS"]), даже при меньшем --days,
+            # иначе повторный вход с тем же токеном перенесет корзину второй раз
+            days = max(options['days'], settings.CART_RETENTION['DAYS'])
+            merged_before = timezone.now() - timedelta(days=days)
+            merges, _ = GuestCartMerge.objects.filter(merged_at__lt=merged_before).delete()
+            self.stdout.write(f'Удалено записей о перенесенных корзинах гостей: {merges}')
+
+        verb = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(f'{verb} элементов корзин: {total}'))
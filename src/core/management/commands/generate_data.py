@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.datagen import BulkWriter, DataGenerator
+
+
+class Command(BaseCommand):
+    help = ('Генерирует детерминированный синтетический набор данных: пользователи, магазины, '
+            'категории, продукты, корзины, заказы и отзывы. На PostgreSQL данные пишутся через COPY.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--shops', type=int, default=500)
+        parser.add_argument('--categories', type=int, default=300)
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--carts', type=int, default=2_000, help='Количество пользователей с корзиной.')
+        parser.add_argument('--orders', type=int, default=50_000)
+        parser.add_argument('--max-order-lines', type=int, default=6)
+        parser.add_argument('--reviews', type=int, default=50_000)
+        parser.add_argument('--seed', type=int, default=1, help='Зерно генератора случайных чисел.')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        if options['users'] <= 0 and any(options[key] > 0 for key in ('shops', 'carts', 'orders', 'reviews')):
+            raise CommandError('Для магазинов, корзин, заказов и отзывов нужны пользователи (--users).')
+        if options['products'] > 0 and options['shops'] <= 0:
+            raise CommandError('Для продуктов нужны магазины (--shops).')
+        if options['products'] <= 0 and any(options[key] > 0 for key in ('carts', 'orders', 'reviews')):
+            raise CommandError('Для корзин, заказов и отзывов нужны продукты (--products).')
+
+        writer = BulkWriter(options['batch_size'], using=options['database'])
+        generator = DataGenerator(writer, seed=options['seed'], log=self.stdout.write)
+        self.stdout.write(f'Запись через {"COPY" if writer.use_copy else "bulk_create"}, '
+                          f'пачками по {options["batch_size"]}')
+
+        started = time.perf_counter()
+        steps = (
+            ('пользователи', lambda: generator.users(options['users'])),
+            ('магазины', lambda: generator.shops(options['shops'])),
+            ('категории', lambda: generator.categories(options['categories'])),
+            ('продукты', lambda: generator.products(options['products'])),
+            ('корзины', lambda: generator.cart_items(options['carts'])),
+            ('элементы заказов', lambda: generator.orders(options['orders'], options['max_order_lines'])),
+            ('отзывы', lambda: generator.reviews(options['reviews'])),
+        )
+        for title, step in steps:
+            step_started = time.perf_counter()
+            written = step()
+            self.stdout.write(f'{title}: {written} за {time.perf_counter() - step_started:.1f} с')
+        generator.finish()
+
+        self.stdout.write(self.style.SUCCESS(f'Готово за {time.perf_counter() - started:.1f} с'))
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from gunicorn.app.base import BaseApplication
+
+from core import server
+
+
+class GunicornApplication(BaseApplication):
+    """
+    Приложение gunicorn с настройками из аргументов команды.
+
+    С `preload_app` приложение загружается и прогревается (`server.preload`) в главном
+    процессе один раз, а рабочие процессы получают его через fork и в хуке `post_fork`
+    выполняют запросы к `warmup_urls` до приема соединений.
+    """
+
+    def __init__(self, options: dict, warmup_urls):
+        self.options = options
+        self.warmup_urls = tuple(warmup_urls)
+        self.application = None
+        super().__init__()
+
+    def load_config(self):
+        for name, value in self.options.items():
+            self.cfg.set(name, value)
+        self.cfg.set('post_fork', self.post_fork)
+
+    def load(self):
+        if self.application is None:
+            self.application = get_wsgi_application()
+            server.preload()
+        return self.application
+
+    def post_fork(self, arbiter, worker) -> None:
+        server.warm_up_worker(self.load(), self.warmup_urls, worker.log.info)
+
+
+class Command(BaseCommand):
+    help = ('WSGI сервер gunicorn для продакшена: приложение загружается один раз (--preload), '
+            'рабочие процессы прогреваются после fork и перезапускаются после max-requests. '
+            'SIGHUP - плавный перезапуск, SIGTERM - плавная остановка.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='0.0.0.0:8000', help='Адрес в формате host:port.')
+        parser.add_argument('--workers', type=int, default=settings.WEB_CONCURRENCY,
+                            help='Количество рабочих процессов (по умолчанию WEB_CONCURRENCY).')
+        parser.add_argument('--max-requests', type=int, default=1000,
+                            help='Запросов до перезапуска рабочего процесса (0 - без ограничения).')
+        parser.add_argument('--max-requests-jitter', type=int, default=100,
+                            help='Случайная добавка к max-requests для каждого процесса.')
+        parser.add_argument('--graceful-timeout', type=int, default=30,
+                            help='Сколько секунд ждать завершения текущих запросов при остановке.')
+        parser.add_argument('--timeout', type=int, default=30,
+                            help='Через сколько секунд без ответа рабочий процесс перезапускается.')
+        parser.add_argument('--backlog', type=int, default=2048, help='Длина очереди входящих соединений.')
+        parser.add_argument('--warmup-url', action='append', dest='warmup_urls',
+                            help='URL для прогрева рабочего процесса (можно указать несколько).')
+        parser.add_argument('--access-log', action='store_true', help='Писать каждый запрос в лог.')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('Нужен хотя бы один рабочий процесс')
+        local_caches = server.get_local_cache_aliases()
+        if options['workers'] > 1 and local_caches:
+            raise CommandError(
+                f'Кэш {", ".join(local_caches)} хранится в памяти процесса и не будет общим для '
+                f'{options["workers"]} рабочих процессов. Задайте общий бэкенд (CACHE_BACKEND, '
+                f'например django.core.cache.backends.redis.RedisCache) или запустите один процесс (--workers 1).'
+            )
+        non_atomic_caches = server.get_non_atomic_cache_aliases()
+        if non_atomic_caches:
+            raise CommandError(
+                f'Кэш {", ".join(non_atomic_caches)} не выполняет add и incr атомарно: ограничение частоты '
+                f'пропустит лишние запросы, а повторы с одним ключом идемпотентности выполнятся дважды. '
+                f'Задайте Redis или Memcached (CACHE_BACKEND) или отключите их '
+                f'(THROTTLING_ENABLED=False, IDEMPOTENCY_ENABLED=False).'
+            )
+
+        GunicornApplication({
+            'bind': options['bind'],
+            'workers': options['workers'],
+            'max_requests': options['max_requests'],
+            'max_requests_jitter': options['max_requests_jitter'],
+            'graceful_timeout': options['graceful_timeout'],
+            'timeout': options['timeout'],
+            'backlog': options['backlog'],
+            'preload_app': True,
+            'accesslog': '-' if options['access_log'] else None,
+        }, options['warmup_urls'] or ['/api/v1/']).run()
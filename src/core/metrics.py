@@ -0,0 +1,208 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from django.db import connections
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+class Histogram:
+    """
+    Гистограмма в формате Prometheus.
+
+    Хранит счетчики по корзинам для каждого набора значений меток.
+    Данные живут в памяти процесса, поэтому при нескольких рабочих
+    процессах каждый из них отдает свою часть метрик.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Iterable[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, labels: Sequence[str], value: float) -> None:
+        """
+        Учитывает одно наблюдение.
+
+        :param labels: Значения меток в порядке `labelnames`.
+        :type labels: Sequence[str]
+        :param value: Наблюдаемое значение.
+        :type value: float
+
+        :return: None
+        :rtype: None
+        """
+        key = tuple(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [счетчики по корзинам, сумма, количество]
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self) -> List[str]:
+        """
+        Возвращает строки метрики в текстовом формате Prometheus.
+
+        :return: Список строк.
+        :rtype: List[str]
+        """
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self._lock:
+            snapshot = [(key, list(series[0]), series[1], series[2]) for key, series in self._series.items()]
+
+        bucket_labelnames = self.labelnames + ('le',)
+        for key, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(bucket_labelnames, key + (_format_value(bound),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Histogram] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str],
+                  buckets: Iterable[float] = DURATION_BUCKETS) -> Histogram:
+        """
+        Регистрирует гистограмму или возвращает уже зарегистрированную.
+
+        :return: Гистограмма.
+        :rtype: Histogram
+        """
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+        return self._metrics[name]
+
+    def collector(self, function: Callable[[], List[str]]) -> Callable[[], List[str]]:
+        """
+        Регистрирует функцию, возвращающую строки метрик на момент запроса `/metrics/`.
+
+        Используется как декоратор для значений, которые не накапливаются,
+        а считываются из состояния процесса (например, статистика пула соединений).
+        """
+        self._collectors.append(function)
+        return function
+
+    def render(self) -> str:
+        """
+        Возвращает все метрики в текстовом формате Prometheus.
+
+        :return: Текст для эндпоинта `/metrics/`.
+        :rtype: str
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+REQUEST_LABELS = ('route', 'view', 'action', 'method', 'status')
+
+request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Время обработки запроса.', REQUEST_LABELS)
+request_db_duration = registry.histogram(
+    'http_request_db_duration_seconds', 'Время, проведенное в базе данных за запрос.', REQUEST_LABELS)
+request_db_queries = registry.histogram(
+    'http_request_db_queries', 'Количество SQL запросов за запрос.', REQUEST_LABELS, QUERY_COUNT_BUCKETS)
+request_render_duration = registry.histogram(
+    'http_request_render_duration_seconds', 'Время сериализации (рендеринга) ответа.', REQUEST_LABELS)
+response_size = registry.histogram(
+    'http_response_size_bytes', 'Размер тела ответа.', REQUEST_LABELS, SIZE_BUCKETS)
+
+
+# (имя, тип, описание, значение из статистики psycopg_pool.ConnectionPool.get_stats())
+DB_POOL_METRICS = (
+    ('db_pool_connections', 'gauge', 'Открытых соединений в пуле.',
+     lambda stats: stats.get('pool_size', 0)),
+    ('db_pool_connections_in_use', 'gauge', 'Соединений, выданных запросам.',
+     lambda stats: stats.get('pool_size', 0) - stats.get('pool_available', 0)),
+    ('db_pool_max_connections', 'gauge', 'Максимальный размер пула.',
+     lambda stats: stats.get('pool_max', 0)),
+    ('db_pool_requests_waiting', 'gauge', 'Запросов, ожидающих свободное соединение.',
+     lambda stats: stats.get('requests_waiting', 0)),
+    ('db_pool_checkouts_total', 'counter', 'Выдано соединений из пула.',
+     lambda stats: stats.get('requests_num', 0)),
+    ('db_pool_checkout_wait_seconds_total', 'counter', 'Суммарное время ожидания соединения.',
+     lambda stats: stats.get('requests_wait_ms', 0) / 1000),
+    ('db_pool_checkout_errors_total', 'counter', 'Запросов, не дождавшихся соединения.',
+     lambda stats: stats.get('requests_errors', 0)),
+    ('db_pool_connections_opened_total', 'counter', 'Открыто новых соединений к базе данных.',
+     lambda stats: stats.get('connections_num', 0)),
+)
+
+
+def db_pool_lines(pool_stats: Mapping[str, Mapping[str, int]]) -> List[str]:
+    """
+    Форматирует статистику пулов соединений в текстовом формате Prometheus.
+
+    :param pool_stats: Статистика пула по псевдониму базы данных.
+    :type pool_stats: Mapping[str, Mapping[str, int]]
+
+    :return: Список строк.
+    :rtype: List[str]
+    """
+    lines = []
+    if not pool_stats:
+        return lines
+    for name, kind, documentation, value in DB_POOL_METRICS:
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} {kind}')
+        for alias, stats in sorted(pool_stats.items()):
+            lines.append(f'{name}{_format_labels(("alias",), (alias,))} {_format_value(value(stats))}')
+    return lines
+
+
+@registry.collector
+def collect_db_pools() -> List[str]:
+    """Статистика пулов соединений PostgreSQL текущего процесса."""
+    pool_stats = {}
+    for alias in connections:
+        if not connections.settings[alias].get('OPTIONS', {}).get('pool'):
+            continue
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None and not pool.closed:  # пул открывается при первом запросе к базе данных
+            pool_stats[alias] = pool.get_stats()
+    return db_pool_lines(pool_stats)
@@ -1,22 +1,164 @@
 import logging
 import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
 
 logger = logging.getLogger('my_middleware_logging')
 
 
+class QueryCounter:
+    """Обертка выполнения SQL, подсчитывающая количество запросов и время в базе данных"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+# счетчик текущего асинхронного запроса; контекст копируется в потоки sync_to_async
+current_counter: ContextVar[Optional[QueryCounter]] = ContextVar('current_counter', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    """Обертка выполнения SQL, передающая запрос счетчику из `current_counter`, если он задан"""
+    counter = current_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def install_query_counter(sender=None, connection=None, **kwargs) -> None:
+    """
+    Добавляет `count_query` в обертки соединения. Подключается к сигналу `connection_created`.
+
+    Обертка ставится первой, чтобы `connection.execute_wrapper` снимал при выходе свою, а не эту.
+
+    :param connection: Соединение с базой данных.
+
+    :return: None
+    :rtype: None
+    """
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_query)
+
+
 class LoggingMiddleware:
-    """Посредник"""
+    """
+    Посредник, собирающий метрики запроса.
+
+    Для каждого запроса учитывает маршрут, действие набора представлений,
+    статус, количество SQL запросов, время в базе данных, время рендеринга
+    и размер ответа. Значения пишутся в отладочный лог, в заголовок
+    `Server-Timing` и в гистограммы для эндпоинта `/metrics/`.
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self._get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         logger.debug('Обработка поступившего запроса в LoggingMiddleware')
-        time_start = time.time()
+        time_start = time.perf_counter()
+        counter = QueryCounter()
+        request.metrics = {'view': '', 'action': '', 'render': 0.0}
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self._get_response(request)
 
-        response = self._get_response(request)
+        return self._finish(request, response, time.perf_counter() - time_start, counter)
 
+    async def __acall__(self, request):
+        """
+        Асинхронная обработка запроса (ASGI).
+
+        Асинхронный ORM и синхронные представления выполняют запросы в других потоках
+        со своими соединениями, поэтому счетчик передается через `current_counter`:
+        контекст копируется в эти потоки, а `count_query` стоит на каждом соединении.
+        """
+        logger.debug('Обработка поступившего запроса в LoggingMiddleware')
+        time_start = time.perf_counter()
+        counter = QueryCounter()
+        request.metrics = {'view': '', 'action': '', 'render': 0.0}
+        token = current_counter.set(counter)
+        try:
+            response = await self._get_response(request)
+        finally:
+            current_counter.reset(token)
+        return self._finish(request, response, time.perf_counter() - time_start, counter)
+
+    def _finish(self, request, response, duration: float, counter: QueryCounter):
         logger.debug('Обработка ответа в LoggingMiddleware')
-        time_finish = time.time()
-        logger.debug(f'Время, затраченное на выполнение запроса: {time_finish - time_start}')
+        size = len(response.content) if not response.streaming else 0
+
+        labels = (
+            request.resolver_match.view_name if request.resolver_match else '',
+            request.metrics['view'],
+            request.metrics['action'],
+            request.method,
+            str(response.status_code),
+        )
+        metrics.request_duration.observe(labels, duration)
+        metrics.request_db_duration.observe(labels, counter.duration)
+        metrics.request_db_queries.observe(labels, counter.count)
+        metrics.request_render_duration.observe(labels, request.metrics['render'])
+        metrics.response_size.observe(labels, size)
+
+        if getattr(settings, 'SERVER_TIMING', True):
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={counter.duration * 1000:.2f};desc="{counter.count} queries"',
+                f'render;dur={request.metrics["render"] * 1000:.2f}',
+                f'total;dur={duration * 1000:.2f}',
+            ))
+
+        logger.debug(f'Время, затраченное на выполнение запроса: {duration} '
+                     f'(SQL запросов: {counter.count}, время в БД: {counter.duration}, размер ответа: {size})')
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Запоминает набор представлений и действие, которые обработают запрос."""
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        actions = getattr(view_func, 'actions', None) or {}
+        if hasattr(request, 'metrics'):
+            request.metrics['view'] = view_class.__name__ if view_class else view_func.__name__
+            request.metrics['action'] = actions.get(request.method.lower(), request.method.lower())
+        return None
+
+    def process_template_response(self, request, response):
+        """
+        Засекает время рендеринга ответа.
+
+        Ответы DRF рендерятся после этого вызова, а колбэки после рендеринга
+        вызываются сразу по его окончании.
+        """
+        if hasattr(request, 'metrics'):
+            render_start = time.perf_counter()
+
+            def finish_render(rendered_response):
+                request.metrics['render'] = time.perf_counter() - render_start
 
+            response.add_post_render_callback(finish_render)
         return response
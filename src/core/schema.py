@@ -0,0 +1,132 @@
+import gzip
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Sequence, Type
+
+import django
+import drf_spectacular
+import rest_framework
+from django.conf import settings
+from drf_spectacular.settings import spectacular_settings
+from rest_framework.renderers import BaseRenderer
+
+
+@dataclass(frozen=True)
+class SchemaDocument:
+    """Отрендеренная схема OpenAPI в одном формате"""
+
+    content: bytes
+    gzipped: bytes
+    etag: str
+
+
+_documents: Dict[str, SchemaDocument] = {}
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def source_fingerprint() -> str:
+    """
+    Возвращает отпечаток кода, от которого зависит схема.
+
+    Считается по содержимому всех модулей проекта, версиям Django, DRF
+    и drf-spectacular и настройкам SPECTACULAR_SETTINGS. Код процесса
+    не меняется, пока он работает, поэтому отпечаток считается один раз.
+
+    :return: Шестнадцатеричный хеш.
+    :rtype: str
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for version in (django.__version__, rest_framework.__version__, drf_spectacular.__version__):
+        digest.update(version.encode())
+    digest.update(repr(sorted(getattr(settings, 'SPECTACULAR_SETTINGS', {}).items())).encode())
+
+    base_dir = Path(settings.BASE_DIR)
+    cache_dir = Path(settings.OPENAPI_SCHEMA_CACHE_DIR).resolve()
+    for path in sorted(base_dir.rglob('*.py')):
+        if cache_dir in path.resolve().parents:
+            continue
+        digest.update(str(path.relative_to(base_dir)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def generate_schema() -> dict:
+    """
+    Генерирует схему так же, как `SpectacularAPIView`.
+
+    :return: Схема OpenAPI.
+    :rtype: dict
+    """
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+
+
+def get_document(renderer_class: Type[BaseRenderer]) -> SchemaDocument:
+    """
+    Возвращает схему из памяти, из файла кэша или генерирует ее.
+
+    Файл кэша называется по отпечатку кода, поэтому после изменения кода
+    схема генерируется заново, а без изменений переживает перезапуск процесса.
+
+    :param renderer_class: Класс рендерера (YAML или JSON).
+    :type renderer_class: Type[BaseRenderer]
+
+    :return: Схема в формате рендерера.
+    :rtype: SchemaDocument
+    """
+    return get_documents((renderer_class,))[renderer_class.media_type]
+
+
+def get_documents(renderer_classes: Sequence[Type[BaseRenderer]]) -> Dict[str, SchemaDocument]:
+    """
+    Возвращает схему в нескольких форматах, генерируя ее не больше одного раза.
+
+    :param renderer_classes: Классы рендереров.
+    :type renderer_classes: Sequence[Type[BaseRenderer]]
+
+    :return: Словарь {тип содержимого: схема}.
+    :rtype: Dict[str, SchemaDocument]
+    """
+    missing = [renderer_class for renderer_class in renderer_classes if renderer_class.media_type not in _documents]
+    if missing:
+        with _lock:
+            data = None
+            for renderer_class in missing:
+                key = renderer_class.media_type
+                if key in _documents:
+                    continue
+                name = hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()[:8]
+                path = Path(settings.OPENAPI_SCHEMA_CACHE_DIR) / f'{source_fingerprint()}-{name}.{renderer_class.format}'
+                if path.exists():
+                    content = path.read_bytes()
+                else:
+                    if data is None:
+                        data = generate_schema()
+                    renderer = renderer_class()
+                    content = renderer.render(data, renderer.media_type, {})
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    temporary = path.with_suffix(f'.{os.getpid()}.tmp')
+                    temporary.write_bytes(content)
+                    temporary.replace(path)
+                etag = '"{}"'.format(hashlib.blake2b(content, digest_size=16).hexdigest())
+                # mtime=0, чтобы сжатое тело не зависело от времени генерации
+                _documents[key] = SchemaDocument(content, gzip.compress(content, 9, mtime=0), etag)
+    return {renderer_class.media_type: _documents[renderer_class.media_type] for renderer_class in renderer_classes}
+
+
+def warm_up() -> None:
+    """Готовит схему во всех форматах `CachedSpectacularAPIView` (при старте сервера)."""
+    from .views import CachedSpectacularAPIView
+
+    get_documents(CachedSpectacularAPIView.renderer_classes)
+
+
+def clear() -> None:
+    """Сбрасывает схемы в памяти процесса."""
+    _documents.clear()
+    source_fingerprint.cache_clear()
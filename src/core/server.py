@@ -0,0 +1,162 @@
+import gc
+import io
+import os
+import sys
+from typing import Callable, Dict, List, Sequence
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, close_old_connections, connections
+from django.urls import get_resolver, get_urlconf
+from django.utils import translation
+
+from . import autocomplete, schema
+
+
+# настройки, кэш которых должен быть общим для всех рабочих процессов
+SHARED_CACHE_SETTINGS = ('RESPONSE_CACHE', 'THROTTLING', 'IDEMPOTENCY', 'AUTOCOMPLETE')
+
+
+def get_local_cache_aliases() -> List[str]:
+    """
+    Возвращает псевдонимы кэшей в памяти процесса (`LocMemCache`), которыми пользуются
+    кэш ответов, ограничение частоты, ключи идемпотентности и автодополнение.
+
+    С несколькими рабочими процессами у каждого из них такой кэш свой:
+    инвалидация не доходит до соседей, лимиты и ключи идемпотентности не общие.
+
+    :return: Список псевдонимов.
+    :rtype: List[str]
+    """
+    aliases = {getattr(settings, name)['ALIAS'] for name in SHARED_CACHE_SETTINGS}
+    return sorted(alias for alias in aliases
+                  if settings.CACHES[alias]['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache')
+
+
+# бэкенды кэша с атомарными add и incr; у остальных это get и set, и два процесса могут
+# одновременно занять один ключ идемпотентности или забрать один токен
+ATOMIC_CACHE_BACKENDS = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+# настройки, которым нужны атомарные add и incr
+ATOMIC_CACHE_SETTINGS = ('THROTTLING', 'IDEMPOTENCY')
+
+
+def get_non_atomic_cache_aliases() -> List[str]:
+    """
+    Возвращает псевдонимы кэшей без атомарных add и incr (в файлах, в базе данных),
+    которыми пользуются включенные ограничение частоты и ключи идемпотентности.
+
+    :return: Список псевдонимов.
+    :rtype: List[str]
+    """
+    configs = [getattr(settings, name) for name in ATOMIC_CACHE_SETTINGS]
+    aliases = {config['ALIAS'] for config in configs if config['ENABLED']}
+    return sorted(alias for alias in aliases if settings.CACHES[alias]['BACKEND'] not in ATOMIC_CACHE_BACKENDS)
+
+
+def preload() -> None:
+    """
+    Прогрев в главном процессе до создания рабочих процессов.
+
+    Все, что загружено здесь, рабочие процессы получают копированием
+    страниц при записи и не повторяют у себя: модули, разобранные
+    маршруты, поля сериализаторов, кэши `_meta` моделей, переводы,
+    схему OpenAPI и индекс автодополнения.
+    """
+    translation.activate(settings.LANGUAGE_CODE)
+    resolver = get_resolver(get_urlconf())
+    # заполняет словари для resolve() и reverse()
+    resolver.reverse_dict  # noqa: B018
+
+    for pattern_view in _iter_views(resolver.url_patterns):
+        serializer_class = getattr(pattern_view, 'serializer_class', None)
+        if serializer_class is not None:
+            serializer_class().fields  # noqa: B018
+
+    # схема OpenAPI: из файла кэша или генерируется один раз на все процессы
+    schema.warm_up()
+
+    # индекс автодополнения: строится один раз, процессы получают его копию
+    try:
+        autocomplete.index.build()
+    except DatabaseError:
+        pass  # база недоступна, индекс построится при первом запросе в процессе
+
+    close_database_connections()
+    # объекты, созданные до fork, не трогает сборщик мусора и они не копируются при его обходе
+    gc.collect()
+    gc.freeze()
+
+
+def _iter_views(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from _iter_views(pattern.url_patterns)
+            continue
+        callback = pattern.callback
+        view = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+        if view is not None:
+            yield view
+
+
+def close_database_connections() -> None:
+    """Закрывает соединения и пулы, чтобы рабочие процессы не унаследовали открытые сокеты."""
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        if connection.alias in getattr(connection, '_connection_pools', {}):
+            connection.close_pool()
+
+
+def make_environ(path: str, host: str) -> Dict:
+    return {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path.partition('?')[0], 'QUERY_STRING': path.partition('?')[2],
+        'SCRIPT_NAME': '', 'SERVER_NAME': host, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1', 'HTTP_HOST': host, 'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.multithread': False, 'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+
+def warm_up_worker(application, urls: Sequence[str], log: Callable[[str], None]) -> None:
+    """
+    Прогрев рабочего процесса перед приемом запросов.
+
+    Открывает соединения с базой данных и кэшем, загружает реестр отозванных
+    токенов и выполняет запросы к `urls` через само приложение, чтобы
+    первый настоящий запрос не платил за ленивую инициализацию.
+    Ошибки прогрева пишутся в лог и не мешают процессу стартовать.
+    """
+    from apps.profiles.revocation import registry
+
+    steps = [
+        ('база данных', lambda: [connection.ensure_connection() for connection in connections.all()]),
+        ('кэш', lambda: caches['default'].get('warm-up')),
+        ('отозванные токены', lambda: registry.sync(force=True)),
+    ]
+    host = next((host for host in settings.ALLOWED_HOSTS if host and '*' not in host), 'localhost').lstrip('.')
+    for url in urls:
+        steps.append((url, lambda url=url: _warm_up_request(application, url, host)))
+
+    for name, step in steps:
+        try:
+            step()
+        except Exception as error:
+            log(f'[{os.getpid()}] прогрев "{name}" не удался: {error!r}')
+    close_old_connections()
+
+
+def _warm_up_request(application, url: str, host: str) -> None:
+    statuses = []
+    body = application(make_environ(url, host), lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    if statuses and statuses[0][0] == '5':
+        raise RuntimeError(statuses[0])
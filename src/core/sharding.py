@@ -0,0 +1,213 @@
+import zlib
+from operator import attrgetter
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connections, models, router
+
+
+# каждой базе данных шарда выделен свой диапазон идентификаторов: id // ID_RANGE - номер шарда
+ID_RANGE = 1 << 40
+
+
+def get_shards() -> List[str]:
+    return list(settings.SHARDING['SHARDS'])
+
+
+def is_sharded(model) -> bool:
+    return model._meta.app_label in settings.SHARDING['APPS']
+
+
+def is_cross_database(model, related_model) -> bool:
+    """Могут ли записи двух моделей находиться в разных базах данных (JOIN между ними невозможен)."""
+    return len(settings.SHARDING['SHARDS']) > 1 and is_sharded(model) != is_sharded(related_model)
+
+
+def shard_for(customer_id) -> str:
+    """
+    Возвращает псевдоним базы данных шарда покупателя.
+
+    Номер шарда - crc32 от идентификатора покупателя по модулю количества шардов,
+    поэтому при изменении их количества данные нужно перераспределить.
+
+    :param customer_id: Идентификатор покупателя.
+
+    :return: Псевдоним базы данных.
+    :rtype: str
+    """
+    shards = settings.SHARDING['SHARDS']
+    if len(shards) == 1:
+        return shards[0]
+    return shards[zlib.crc32(str(customer_id).encode()) % len(shards)]
+
+
+def shard_for_pk(pk) -> Optional[str]:
+    """
+    Возвращает псевдоним базы данных шарда по идентификатору записи.
+
+    :param pk: Идентификатор заказа, элемента заказа или корзины.
+
+    :return: Псевдоним базы данных или None, если идентификатор не принадлежит ни одному шарду.
+    :rtype: Optional[str]
+    """
+    try:
+        index = int(pk) // ID_RANGE
+    except (TypeError, ValueError):
+        return None
+    aliases = settings.SHARDING['ALIASES']
+    if not 0 <= index < len(aliases) or aliases[index] not in settings.SHARDING['SHARDS']:
+        return None
+    return aliases[index]
+
+
+def group_by_shard(pks: Iterable) -> Dict[str, list]:
+    """
+    Группирует идентификаторы записей по шардам, пропуская чужие идентификаторы.
+
+    :param pks: Идентификаторы записей.
+    :type pks: Iterable
+
+    :return: Словарь {псевдоним базы данных: идентификаторы}.
+    :rtype: Dict[str, list]
+    """
+    groups = {}
+    for pk in pks:
+        alias = shard_for_pk(pk)
+        if alias is not None:
+            groups.setdefault(alias, []).append(pk)
+    return groups
+
+
+def get_shard_key(instance):
+    # shard_key модели - путь к идентификатору покупателя, например `order.customer_id`
+    try:
+        return attrgetter(type(instance).shard_key)(instance)
+    except AttributeError:
+        return None
+
+
+def fan_out(queryset: models.QuerySet) -> list:
+    """
+    Выполняет набор запросов на каждом шарде и объединяет результаты.
+
+    Результаты сортируются по `order_by` набора запросов (по умолчанию - по `pk`),
+    поэтому поддерживаются только сортировки по полям самой модели.
+
+    :param queryset: Набор запросов без выбранной базы данных.
+    :type queryset: QuerySet
+
+    :return: Список объектов со всех шардов.
+    :rtype: list
+    """
+    objects = [obj for alias in get_shards() for obj in queryset.using(alias)]
+    ordering = queryset.query.order_by or queryset.model._meta.ordering or ('pk',)
+    # устойчивая сортировка от последнего поля к первому дает сортировку по всем полям
+    for name in reversed(ordering):
+        descending = name.startswith('-')
+        objects.sort(key=attrgetter(name.lstrip('-')), reverse=descending)
+    return objects
+
+
+class ShardedQuerySet(models.QuerySet):
+    """
+    Набор запросов модели, записи которой распределены по шардам покупателей.
+
+    `for_customer` направляет запросы в шард покупателя. `create` и `bulk_create`
+    без явной базы данных выбирают шард по каждому объекту.
+    Наборы запросов без выбранного шарда выполняются в базе данных `default`,
+    для чтения со всех шардов используется `fan_out`.
+    """
+
+    def for_customer(self, customer_id) -> 'ShardedQuerySet':
+        return self.using(shard_for(customer_id))
+
+    def create(self, **kwargs):
+        if self._db is not None:
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        self._for_write = True
+        obj.save(force_insert=True, using=router.db_for_write(self.model, instance=obj))
+        return obj
+
+    def bulk_create(self, objs, *args, **kwargs):
+        if self._db is not None:
+            return super().bulk_create(objs, *args, **kwargs)
+        groups = {}
+        for obj in objs:
+            groups.setdefault(router.db_for_write(self.model, instance=obj), []).append(obj)
+        created = []
+        for alias, group in groups.items():
+            created += super(ShardedQuerySet, self.using(alias)).bulk_create(group, *args, **kwargs)
+        return created
+
+
+class ShardRouter:
+    """
+    Маршрутизатор баз данных для приложений из `SHARDING['APPS']`.
+
+    Запись попадает в шард своего покупателя (`shard_key` модели), связанные
+    записи читаются из шарда записи-владельца, а связанный менеджер пользователя
+    (`user.orders`) - из шарда этого пользователя. Остальные модели живут в `default`.
+    Таблицы шардируемых приложений создаются во всех базах данных, прочие - только в `default`.
+    """
+
+    def _route(self, model, hints) -> Optional[str]:
+        if not is_sharded(model):
+            # явно, иначе Django выберет базу данных записи из подсказки (например, шард корзины)
+            return 'default'
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        if is_sharded(type(instance)):
+            if instance._state.db is not None and not instance._state.adding:
+                return instance._state.db
+            customer_id = get_shard_key(instance)
+            return None if customer_id is None else shard_for(customer_id)
+        if isinstance(instance, models.Model) and instance._meta.label == settings.AUTH_USER_MODEL:
+            return shard_for(instance.pk)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # связи с пользователями и каталогом пересекают границы баз данных
+        if is_sharded(type(obj1)) or is_sharded(type(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == 'default':
+            return None
+        return app_label in settings.SHARDING['APPS']
+
+
+def configure_sequences(sender, using: str, **kwargs) -> None:
+    """
+    Сдвигает счетчики идентификаторов шардируемых таблиц в диапазон шарда.
+
+    Шард с номером N в `SHARDING['ALIASES']` выдает идентификаторы начиная
+    с `N * ID_RANGE + 1`, поэтому идентификаторы не пересекаются между шардами,
+    а шард записи определяется по ее идентификатору. Вызывается после миграций.
+    """
+    aliases = settings.SHARDING['ALIASES']
+    if sender.label not in settings.SHARDING['APPS'] or using not in aliases[1:]:
+        return
+    start = aliases.index(using) * ID_RANGE
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        for model in sender.get_models():
+            table, column = model._meta.db_table, model._meta.pk.column
+            cursor.execute(f'SELECT MAX({connection.ops.quote_name(column)}) '
+                           f'FROM {connection.ops.quote_name(table)}')
+            if (cursor.fetchone()[0] or 0) >= start:
+                continue
+            if connection.vendor == 'sqlite':
+                cursor.execute('DELETE FROM sqlite_sequence WHERE name = %s', [table])
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, start])
+            elif connection.vendor == 'postgresql':
+                cursor.execute('SELECT setval(pg_get_serial_sequence(%s, %s), %s, false)',
+                               [table, column, start + 1])
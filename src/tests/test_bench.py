@@ -0,0 +1,73 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from core.benchmark import compare, percentile
+
+
+class BenchCommandTest(TestCase):
+    """Тесты команды нагрузочного прогона bench"""
+
+    databases = {'default', 'orders_1'}
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.output = Path(self.tmp_dir.name) / 'bench.json'
+
+    def run_bench(self, *args):
+        call_command('bench', '--use-current-db', '--users=3', '--shops=2', '--categories=3',
+                     '--products=10', '--iterations=3', '--warmup=1', f'--output={self.output}',
+                     *args, stdout=io.StringIO())
+
+    def test_writes_results_for_every_scenario(self):
+        """Результаты содержат перцентили, пропускную способность и запросы для каждого сценария"""
+        self.run_bench()
+        report = json.loads(self.output.read_text(encoding='utf-8'))
+
+        self.assertEqual(set(report['scenarios']),
+                         {'browse_products', 'product_detail', 'search', 'add_to_cart', 'checkout', 'list_orders'})
+        for summary in report['scenarios'].values():
+            self.assertEqual(summary['requests'], 3)
+            self.assertGreater(summary['queries_per_request'], 0)
+
+    @override_settings(THROTTLING={**settings.THROTTLING, 'ENABLED': True})
+    def test_runs_with_throttling_enabled(self):
+        """Ограничение частоты (включенное вне тестов) не обрывает сценарии с одного адреса"""
+        self.run_bench('--scenario=add_to_cart', '--scenario=checkout', '--iterations=40')
+        report = json.loads(self.output.read_text(encoding='utf-8'))
+
+        self.assertEqual(report['scenarios']['checkout']['requests'], 40)
+
+    def test_regression_against_baseline(self):
+        """Ухудшение относительно базового прогона завершает команду с ошибкой"""
+        baseline = Path(self.tmp_dir.name) / 'baseline.json'
+        baseline.write_text(json.dumps({'scenarios': {'search': {'queries_per_request': 0.5}}}))
+
+        with self.assertRaises(CommandError):
+            self.run_bench('--scenario=search', f'--baseline={baseline}')
+
+
+class BenchHelpersTest(TestCase):
+    """Тесты вспомогательных функций прогона"""
+
+    def test_percentile(self):
+        """Перцентиль считается методом ближайшего ранга"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_compare_threshold(self):
+        """Отклонение в пределах порога регрессией не считается"""
+        baseline = {'search': {'p95_ms': 10.0, 'throughput_rps': 100.0}}
+        self.assertEqual(compare({'search': {'p50_ms': 1, 'p95_ms': 10.5, 'p99_ms': 1,
+                                             'queries_per_request': 1, 'throughput_rps': 95.0}}, baseline, 0.1), [])
+        self.assertEqual(len(compare({'search': {'p50_ms': 1, 'p95_ms': 12.0, 'p99_ms': 1,
+                                                 'queries_per_request': 1, 'throughput_rps': 80.0}}, baseline, 0.1)), 2)
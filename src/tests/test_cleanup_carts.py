@@ -0,0 +1,65 @@
+import io
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.orders import guest_cart
+from apps.orders.models import CartItem, GuestCartMerge
+from apps.products.models import Product
+from apps.shops.models import Shop
+
+
+class CleanupCartsCommandTest(TestCase):
+    """Тесты команды удаления брошенных корзин"""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [get_user_model().objects.create_user(email=f'user{index}@example.com', password='password')
+                 for index in range(3)]
+        shop = Shop.objects.create(name='Магазин', owner=users[0])
+        products = [Product.objects.create(name=f'Продукт {index}', price=10, shop=shop) for index in range(2)]
+        for user in users:
+            for product in products:
+                CartItem.objects.create(user=user, product=product)
+        # брошены корзина первого пользователя и один элемент второго
+        cls.user, cls.product = users[2], products[0]
+        cls.fresh = set(CartItem.objects.exclude(user=users[0]).order_by('pk').values_list('pk', flat=True)[1:])
+        CartItem.objects.exclude(pk__in=cls.fresh).update(
+            added_at=timezone.now() - timedelta(days=31))
+        for digest in ('old', 'new'):
+            GuestCartMerge.objects.create(digest=digest, user=users[0])
+        GuestCartMerge.objects.filter(digest='old').update(merged_at=timezone.now() - timedelta(days=31))
+
+    def cleanup(self, **options):
+        stdout = io.StringIO()
+        call_command('cleanup_carts', days=30, batch_size=2, pause=0, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_removes_expired_in_batches(self):
+        """Удаляются только просроченные элементы, пачками указанного размера"""
+        output = self.cleanup()
+
+        self.assertIn('удалено 3 элементов, пачек: 2', output)
+        self.assertEqual(set(CartItem.objects.values_list('pk', flat=True)), self.fresh)
+        self.assertEqual(list(GuestCartMerge.objects.values_list('digest', flat=True)), ['new'])
+
+    def test_short_days_keep_valid_tokens(self):
+        """Записи о переносе хранятся, пока действует токен, поэтому повтор токена после очистки не переносится"""
+        token = guest_cart.dump({self.product.pk: 2})
+        self.assertEqual(guest_cart.merge(self.user, guest_cart.load(token), token), 1)
+        GuestCartMerge.objects.exclude(digest__in=('old', 'new')).update(merged_at=timezone.now() - timedelta(days=2))
+
+        call_command('cleanup_carts', days=1, batch_size=2, pause=0, stdout=io.StringIO())
+
+        self.assertEqual(guest_cart.merge(self.user, guest_cart.load(token), token), 0)
+        self.assertEqual(CartItem.objects.get(user=self.user, product=self.product).quantity, 1 + 2)
+
+    def test_dry_run(self):
+        """Пробный запуск только сообщает, что будет удалено"""
+        output = self.cleanup(dry_run=True)
+
+        self.assertIn('3 элементов у 2 пользователей', output)
+        self.assertEqual(CartItem.objects.count(), 6)
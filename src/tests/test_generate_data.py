@@ -0,0 +1,89 @@
+import io
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.test import TestCase, override_settings
+
+from apps.orders.models import CartItem, Order, OrderItem
+from apps.products.models import Category, Product
+from apps.reviews.models import Review
+from apps.shops.models import Shop
+from core.datagen import BulkWriter, DataGenerator
+from core.sharding import ID_RANGE, shard_for, shard_for_pk
+
+
+class GenerateDataCommandTest(TestCase):
+    """Тесты команды генерации синтетических данных"""
+    databases = {'default', 'orders_1'}
+
+    def generate(self, **options):
+        defaults = {'users': 20, 'shops': 4, 'categories': 5, 'products': 50, 'carts': 5,
+                    'orders': 30, 'reviews': 40, 'batch_size': 7, 'stdout': io.StringIO()}
+        call_command('generate_data', **{**defaults, **options})
+
+    def test_creates_requested_amounts(self):
+        """Создается запрошенное количество объектов каждого типа"""
+        self.generate()
+
+        self.assertEqual(get_user_model().objects.count(), 20)
+        self.assertEqual(Shop.objects.count(), 4)
+        self.assertEqual(Category.objects.count(), 5)
+        for category in Category.objects.select_related('parent'):
+            self.assertEqual(category.path, category.get_path())
+        self.assertEqual(Product.objects.count(), 50)
+        self.assertEqual(Order.objects.count(), 30)
+        self.assertEqual(Review.objects.count(), 40)
+        self.assertEqual(CartItem.objects.values('user').distinct().count(), 5)
+        self.assertTrue(Product.categories.through.objects.exists())
+
+    def test_order_totals_match_items(self):
+        """Общая цена заказа равна сумме его элементов"""
+        self.generate()
+
+        orders = Order.objects.annotate(items_total=Sum('item__total_amount'), lines=Count('item'))
+        for order in orders:
+            self.assertGreater(order.lines, 0)
+            self.assertEqual(order.total_amount, order.items_total)
+        self.assertFalse(OrderItem.objects.filter(product_name='').exists())  # снимок продукта заполнен
+
+    @override_settings(SHARDING={**settings.SHARDING, 'SHARDS': ('default', 'orders_1')})
+    def test_orders_and_carts_in_customer_shards(self):
+        """Заказы и корзины пишутся в шарды покупателей с идентификаторами из диапазона шарда"""
+        self.generate()
+
+        for alias in ('default', 'orders_1'):
+            orders = list(Order.objects.using(alias).values_list('pk', 'customer_id'))
+            self.assertTrue(orders)
+            for pk, customer_id in orders:
+                self.assertEqual(shard_for(customer_id), alias)
+                self.assertEqual(shard_for_pk(pk), alias)
+            for user_id in CartItem.objects.using(alias).values_list('user_id', flat=True):
+                self.assertEqual(shard_for(user_id), alias)
+            self.assertFalse(OrderItem.objects.using(alias).filter(product_name='').exists())
+        self.assertGreater(Order.objects.using('orders_1').order_by('pk').first().pk, ID_RANGE)
+        self.assertEqual(Order.objects.using('default').count() + Order.objects.using('orders_1').count(), 30)
+
+    def test_is_deterministic(self):
+        """Одно и то же зерно дает одинаковые данные"""
+        class MemoryWriter(BulkWriter):
+            def write(self, model, fields, rows, using=None):
+                rows = list(rows)
+                self.rows.setdefault(model.__name__, []).extend(rows)
+                return len(rows)
+
+        def generate(seed):
+            writer = MemoryWriter(batch_size=10)
+            writer.rows = {}
+            generator = DataGenerator(writer, seed=seed)
+            generator.users(10)
+            generator.shops(3)
+            generator.categories(4)
+            generator.products(20)
+            generator.orders(15)
+            return writer.rows
+
+        first = generate(seed=7)
+        self.assertEqual(first, generate(seed=7))
+        self.assertNotEqual(first['OrderItem'], generate(seed=8)['OrderItem'])
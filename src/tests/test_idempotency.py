@@ -0,0 +1,106 @@
+import threading
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from apps.orders.models import CartItem, Order
+from apps.products.models import Product
+from apps.shops.models import Shop
+from base.idempotency import get_cache_key, get_fingerprint
+from tests.base_test import BaseAPITestCase
+
+
+class IdempotencyTest(BaseAPITestCase):
+    """
+    Тесты заголовка Idempotency-Key.
+
+    Этот класс тестирует повтор ответа, повторное использование ключа,
+    одновременные запросы и освобождение ключа после ошибки.
+    """
+    def setUp(self):
+        cache.clear()
+        self.shop = Shop.objects.create(name='Магазин', owner=self.auth_user1)
+        self.product = Product.objects.create(name='Продукт', price=10, shop=self.shop)
+        self.authenticate(self.auth_user1)
+
+    def checkout(self, key='checkout-1'):
+        return self.client.post(reverse('order-list'), HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_order(self):
+        """Повтор оформления заказа возвращает тот же заказ и не обращается к заказам и корзине"""
+        CartItem.objects.create(user=self.auth_user1, product=self.product, quantity=2)
+        first = self.checkout()
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(1):  # только загрузка пользователя при аутентификации
+            retry = self.checkout()
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+
+        # без ключа запрос выполняется как раньше: корзина уже пустая
+        self.assertEqual(self.client.post(reverse('order-list')).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_key_reused_with_other_body(self):
+        """Тот же ключ с другим телом запроса отклоняется, ключи пользователей не пересекаются"""
+        url = reverse('cart-item-list')
+        data = {'product': self.product.pk, 'quantity': 1}
+        self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='cart')
+        self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='cart')
+        self.assertEqual(CartItem.objects.get().quantity, 1)
+
+        response = self.client.post(url, {**data, 'quantity': 5}, format='json', HTTP_IDEMPOTENCY_KEY='cart')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        self.authenticate(self.auth_user2)
+        response = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='cart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+    def start_request(self, data):
+        """Занимает ключ 'shop' так, будто запрос с телом `data` еще выполняется, и возвращает ключ кэша"""
+        request = SimpleNamespace(user=self.auth_user1, method='POST', path=reverse('shop-list'), data=data)
+        cache_key = get_cache_key(request, 'shop')
+        cache.add(cache_key, {'fingerprint': get_fingerprint(request)}, 60)
+        return cache_key, get_fingerprint(request)
+
+    def post_shop(self, data):
+        return self.client.post(reverse('shop-list'), data, format='json', HTTP_IDEMPOTENCY_KEY='shop')
+
+    def test_concurrent_duplicate_waits_for_response(self):
+        """Повтор, пришедший во время первого запроса, дожидается и получает его ответ"""
+        cache_key, fingerprint = self.start_request({'name': 'Новый'})
+        entry = {'fingerprint': fingerprint, 'status': 201, 'data': {'id': 1, 'name': 'Новый'}, 'headers': {}}
+        finish = threading.Timer(0.2, cache.set, (cache_key, entry, 60))
+        finish.start()
+        self.addCleanup(finish.cancel)
+
+        response = self.post_shop({'name': 'Новый'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json(), {'id': 1, 'name': 'Новый'})
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertFalse(Shop.objects.filter(name='Новый').exists())
+
+    @override_settings(IDEMPOTENCY={**settings.IDEMPOTENCY, 'WAIT': 0.1})
+    def test_concurrent_request_conflict(self):
+        """Повтор получает 409, если первый запрос не ответил за WAIT или тело повтора другое"""
+        self.start_request({'name': 'Новый'})
+
+        self.assertEqual(self.post_shop({'name': 'Новый'}).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.post_shop({'name': 'Другой'}).status_code, status.HTTP_409_CONFLICT)
+
+    def test_failed_request_releases_key(self):
+        """Ошибка валидации не сохраняется: исправленный запрос с тем же ключом выполняется"""
+        url = reverse('product-list')
+        response = self.client.post(url, {'name': 'Новый'}, format='json', HTTP_IDEMPOTENCY_KEY='product')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(url, {'name': 'Новый', 'price': 5, 'shop': self.shop.pk}, format='json',
+                                    HTTP_IDEMPOTENCY_KEY='product')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Product.objects.filter(name='Новый').count(), 1)
@@ -0,0 +1,97 @@
+from django.test import AsyncClient, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from apps.shops.models import Shop
+from core.metrics import Histogram, db_pool_lines
+from tests.base_test import BaseAPITestCase
+
+
+class RequestMetricsTest(BaseAPITestCase):
+    """
+    Тесты метрик запросов.
+
+    Этот класс тестирует заголовок Server-Timing и эндпоинт /metrics/.
+    """
+    def setUp(self):
+        Shop.objects.create(name='Магазин', owner=self.auth_user1)
+
+    def test_server_timing_header(self):
+        """Ответ содержит время в БД, количество запросов и время рендеринга"""
+        response = self.client.get(reverse('shop-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+        self.assertIn('render;dur=', response['Server-Timing'])
+
+    async def test_server_timing_header_asgi(self):
+        """Под ASGI запросы считаются и в асинхронных, и в синхронных представлениях"""
+        client = AsyncClient()
+        for name in ('async-shop-list', 'shop-list'):
+            response = await client.get(reverse(name))
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_metrics_labelled_by_viewset_action(self):
+        """Гистограммы на /metrics/ размечены маршрутом и действием набора представлений"""
+        self.client.get(reverse('shop-list'))
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('route="shop-list",view="ShopViewSet",action="list",method="GET",status="200"', body)
+
+    @override_settings(METRICS={'ALLOWED_IPS': ('127.0.0.1',), 'TOKEN': 'secret'})
+    def test_metrics_access(self):
+        """Метрики отдаются разрешенным адресам, по токену и администраторам"""
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.1').status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(url, REMOTE_ADDR='10.0.0.1', HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.get(url, REMOTE_ADDR='10.0.0.1', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_login(self.admin_user)
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.1').status_code, status.HTTP_200_OK)
+
+
+class HistogramTest(BaseAPITestCase):
+    """Тесты гистограммы в формате Prometheus"""
+
+    def test_collect_cumulative_buckets(self):
+        """Счетчики корзин накапливаются, сумма и количество считаются"""
+        histogram = Histogram('test_seconds', 'Тест.', ('route',), (0.1, 1))
+        histogram.observe(('a',), 0.05)
+        histogram.observe(('a',), 0.5)
+        histogram.observe(('a',), 5)
+
+        lines = histogram.collect()
+        self.assertIn('test_seconds_bucket{route="a",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{route="a",le="1.0"} 2', lines)
+        self.assertIn('test_seconds_bucket{route="a",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_count{route="a"} 3', lines)
+
+
+class DbPoolMetricsTest(BaseAPITestCase):
+    """Тесты метрик пула соединений"""
+
+    def test_pool_stats_lines(self):
+        """Занятые соединения, ожидающие запросы и время ожидания берутся из статистики пула"""
+        lines = db_pool_lines({'default': {
+            'pool_size': 5, 'pool_available': 2, 'pool_max': 10,
+            'requests_waiting': 1, 'requests_num': 40, 'requests_wait_ms': 1500,
+        }})
+
+        self.assertIn('db_pool_connections_in_use{alias="default"} 3.0', lines)
+        self.assertIn('db_pool_requests_waiting{alias="default"} 1.0', lines)
+        self.assertIn('db_pool_checkout_wait_seconds_total{alias="default"} 1.5', lines)
+        self.assertIn('# TYPE db_pool_checkouts_total counter', lines)
+
+    def test_no_pool_no_lines(self):
+        """Без пула (SQLite) метрики пула не выводятся"""
+        response = self.client.get(reverse('metrics'))
+
+        self.assertNotIn('db_pool_', response.content.decode())
@@ -0,0 +1,212 @@
+from itertools import count
+
+from rest_framework.reverse import reverse
+from rest_framework.utils import json
+
+from apps.orders.models import CartItem, Order, OrderItem
+from apps.products.models import Category, Product
+from apps.shops.models import Shop
+from tests.base_test import BaseAPITestCase
+from tests.query_budget import QueryBudgetMixin
+
+
+class QueryBudgetAPITest(QueryBudgetMixin, BaseAPITestCase):
+    """
+    Тесты бюджета SQL запросов для эндпоинтов API.
+
+    Каждый эндпоинт вызывается на двух объемах данных, количество
+    запросов не должно расти и не должно превышать бюджет из query_budgets.json.
+    """
+    def setUp(self):
+        self.counter = count()
+        self.shop = Shop.objects.create(name='Магазин', owner=self.auth_user1)
+        self.category = Category.objects.create(name='Категория')
+
+    def create_products(self, size):
+        products = []
+        for _ in range(size):
+            product = Product.objects.create(name=f'Продукт {next(self.counter)}', price=10, shop=self.shop)
+            product.categories.add(self.category)
+            products.append(product)
+        return products
+
+    def create_orders(self, size):
+        products = self.create_products(size)
+        for _ in range(size):
+            order = Order.objects.create(customer=self.auth_user1)
+            for product in products:
+                OrderItem.objects.create(order=order, product=product, quantity=1)
+
+    def fill_cart(self, size):
+        for product in self.create_products(size):
+            CartItem.objects.create(user=self.auth_user1, product=product)
+
+    def test_categories_list(self):
+        """Список категорий"""
+        def seed(size):
+            for _ in range(size):
+                Category.objects.create(name=f'Категория {next(self.counter)}')
+        self.assertQueryBudget(seed, lambda: self.client.get(reverse('category-list')))
+
+    def test_categories_retrieve(self):
+        """Получение категории"""
+        url = reverse('category-detail', kwargs={'pk': self.category.pk})
+        self.assertQueryBudget(self.create_products, lambda: self.client.get(url))
+
+    def test_shops_list(self):
+        """Список магазинов"""
+        def seed(size):
+            for _ in range(size):
+                Shop.objects.create(name=f'Магазин {next(self.counter)}', owner=self.auth_user2)
+        self.assertQueryBudget(seed, lambda: self.client.get(reverse('shop-list')))
+
+    def test_shops_retrieve(self):
+        """Получение магазина"""
+        url = reverse('shop-detail', kwargs={'pk': self.shop.pk})
+        self.assertQueryBudget(self.create_products, lambda: self.client.get(url))
+
+    def test_shops_create(self):
+        """Создание магазина"""
+        self.authenticate(self.auth_user1)
+        self.assertQueryBudget(self.create_products, lambda: self.client.post(
+            path=reverse('shop-list'),
+            data=json.dumps({'name': f'Магазин {next(self.counter)}', 'address': 'Адрес'}),
+            content_type='application/json',
+        ))
+
+    def test_shops_update(self):
+        """Изменение магазина"""
+        self.authenticate(self.auth_user1)
+        url = reverse('shop-detail', kwargs={'pk': self.shop.pk})
+        self.assertQueryBudget(self.create_products, lambda: self.client.put(
+            path=url,
+            data=json.dumps({'name': f'Магазин {next(self.counter)}', 'address': 'Адрес'}),
+            content_type='application/json',
+        ))
+        self.assertQueryBudget(self.create_products, lambda: self.client.patch(
+            path=url,
+            data=json.dumps({'name': f'Магазин {next(self.counter)}'}),
+            content_type='application/json',
+        ))
+
+    def test_shops_destroy(self):
+        """Удаление магазина"""
+        self.authenticate(self.auth_user1)
+
+        def seed(size):
+            self.create_products(size)
+            self.target = Shop.objects.create(name=f'Магазин {next(self.counter)}', owner=self.auth_user1)
+        self.assertQueryBudget(seed, lambda: self.client.delete(reverse('shop-detail', kwargs={'pk': self.target.pk})))
+
+    def test_products_list(self):
+        """Список продуктов, в том числе с раскрытыми связями"""
+        url = reverse('product-list')
+        self.assertQueryBudget(self.create_products, lambda: self.client.get(url))
+        self.assertQueryBudget(self.create_products,
+                               lambda: self.client.get(url, {'expand': 'shop,categories'}))
+
+    def test_products_facets(self):
+        """Список продуктов со счетчиками для фильтров"""
+        self.assertQueryBudget(self.create_products, lambda: self.client.get(reverse('product-facets')))
+
+    def test_products_retrieve(self):
+        """Получение продукта"""
+        product = self.create_products(1)[0]
+        url = reverse('product-detail', kwargs={'pk': product.pk})
+
+        def seed(size):
+            for _ in range(size):
+                product.categories.add(Category.objects.create(name=f'Категория {next(self.counter)}'))
+        self.assertQueryBudget(seed, lambda: self.client.get(url))
+
+    def test_products_create(self):
+        """Создание продукта"""
+        self.authenticate(self.auth_user1)
+        self.assertQueryBudget(self.create_products, lambda: self.client.post(
+            path=reverse('product-list'),
+            data=json.dumps({'name': f'Продукт {next(self.counter)}', 'price': 10,
+                             'shop': self.shop.pk, 'categories': [self.category.pk]}),
+            content_type='application/json',
+        ))
+
+    def test_products_update(self):
+        """Изменение продукта"""
+        self.authenticate(self.auth_user1)
+        product = self.create_products(1)[0]
+        url = reverse('product-detail', kwargs={'pk': product.pk})
+        self.assertQueryBudget(self.create_products, lambda: self.client.put(
+            path=url,
+            data=json.dumps({'name': f'Продукт {next(self.counter)}', 'price': 20,
+                             'shop': self.shop.pk, 'categories': [self.category.pk]}),
+            content_type='application/json',
+        ))
+        self.assertQueryBudget(self.create_products, lambda: self.client.patch(
+            path=url,
+            data=json.dumps({'price': 30, 'shop': self.shop.pk}),
+            content_type='application/json',
+        ))
+
+    def test_products_destroy(self):
+        """Удаление продукта"""
+        self.authenticate(self.auth_user1)
+
+        def seed(size):
+            self.product = self.create_products(size)[0]
+        self.assertQueryBudget(seed, lambda: self.client.delete(
+            reverse('product-detail', kwargs={'pk': self.product.pk})))
+
+    def test_cart_list(self):
+        """Список элементов корзины"""
+        self.authenticate(self.auth_user1)
+        self.assertQueryBudget(self.fill_cart, lambda: self.client.get(reverse('cart-item-list')))
+
+    def test_cart_create(self):
+        """Добавление продукта в корзину"""
+        self.authenticate(self.auth_user1)
+        product = self.create_products(1)[0]
+        self.assertQueryBudget(self.fill_cart, lambda: self.client.post(
+            path=reverse('cart-item-list'),
+            data=json.dumps({'product': product.pk, 'quantity': 1}),
+            content_type='application/json',
+        ))
+
+    def test_cart_update(self):
+        """Изменение количества в корзине"""
+        self.authenticate(self.auth_user1)
+        item = CartItem.objects.create(user=self.auth_user1, product=self.create_products(1)[0])
+        self.assertQueryBudget(self.fill_cart, lambda: self.client.patch(
+            path=reverse('cart-item-detail', kwargs={'pk': item.pk}),
+            data=json.dumps({'quantity': 3}),
+            content_type='application/json',
+        ))
+
+    def test_cart_destroy(self):
+        """Удаление продукта из корзины"""
+        self.authenticate(self.auth_user1)
+
+        def seed(size):
+            self.fill_cart(size)
+            self.item = CartItem.objects.filter(user=self.auth_user1).first()
+        self.assertQueryBudget(seed, lambda: self.client.delete(
+            reverse('cart-item-detail', kwargs={'pk': self.item.pk})))
+
+    def test_orders_list(self):
+        """Список заказов"""
+        self.authenticate(self.auth_user1)
+        self.assertQueryBudget(self.create_orders, lambda: self.client.get(reverse('order-list')))
+
+    def test_orders_retrieve(self):
+        """Получение заказа"""
+        self.authenticate(self.auth_user1)
+        order = Order.objects.create(customer=self.auth_user1)
+        url = reverse('order-detail', kwargs={'pk': order.pk})
+
+        def seed(size):
+            for product in self.create_products(size):
+                OrderItem.objects.create(order=order, product=product, quantity=1)
+        self.assertQueryBudget(seed, lambda: self.client.get(url))
+
+    def test_orders_create(self):
+        """Оформление заказа из корзины"""
+        self.authenticate(self.auth_user1)
+        self.assertQueryBudget(self.fill_cart, lambda: self.client.post(reverse('order-list')))
@@ -0,0 +1,108 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+import msgpack
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.reverse import reverse
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from apps.products.models import Product
+from apps.shops.models import Shop
+from base.parsers import ORJSONParser
+from base.renderers import ORJSONRenderer
+from tests.base_test import BaseAPITestCase
+
+
+class ORJSONRendererTest(SimpleTestCase):
+    """
+    Тесты рендерера и парсера JSON на orjson.
+
+    Этот класс тестирует побайтное совпадение с JSONRenderer и JSONParser DRF.
+    """
+    def assertSameAsDRF(self, data, accepted_media_type=None, renderer_context=None):
+        self.assertEqual(ORJSONRenderer().render(data, accepted_media_type, renderer_context),
+                         JSONRenderer().render(data, accepted_media_type, renderer_context))
+
+    def test_special_types(self):
+        """Даты, время, Decimal, UUID и ленивые строки кодируются так же, как в DRF"""
+        moscow = datetime.timezone(datetime.timedelta(hours=3))
+        self.assertSameAsDRF(ReturnList([ReturnDict({
+            'name': 'Продукт "1"\n',
+            'price': Decimal('1999.90'),
+            'raw_price': '1999.90',
+            'utc': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'moscow': datetime.datetime(2024, 5, 1, 12, 30, tzinfo=moscow),
+            'naive': datetime.datetime(2024, 5, 1, 12, 30),
+            'now': timezone.now(),
+            'date': datetime.date(2024, 5, 1),
+            'time': datetime.time(9, 5, 0, 10),
+            'duration': datetime.timedelta(hours=1, microseconds=5),
+            'uuid': uuid.UUID(int=1),
+            'lazy': gettext_lazy('Not found.'),
+            'nested': {'tuple': (1, 2.5, None, True), 'set': []},
+            'separators': 'a\u2028b\u2029c',
+        }, serializer=None)], serializer=None))
+
+    def test_fallback_to_drf(self):
+        """Нестроковые ключи, большие целые числа и отступы обрабатывает DRF"""
+        self.assertSameAsDRF({1: 'a', None: 'b'})
+        self.assertSameAsDRF({'big': 2 ** 70})
+        self.assertSameAsDRF({'a': [1, 2]}, 'application/json; indent=4')
+        self.assertSameAsDRF({'a': [1, 2]}, renderer_context={'indent': 2})
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_parser(self):
+        """Парсер возвращает те же данные, а ошибку - как JSONParser"""
+        body = '{"name": "Продукт", "price": "10.50", "items": [1, 2.5, null, true], "big": 18446744073709551616}'
+        expected = JSONParser().parse(io.BytesIO(body.encode()))
+
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body.encode())), expected)
+        with self.assertRaisesMessage(ParseError, 'JSON parse error'):
+            ORJSONParser().parse(io.BytesIO(b'{"name": '))
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"price": NaN}'))
+
+
+class MessagePackAPITest(BaseAPITestCase):
+    """
+    Тесты MessagePack в API.
+
+    Этот класс тестирует ответы и тела запросов в формате MessagePack.
+    """
+    def setUp(self):
+        self.shop = Shop.objects.create(name='Магазин', owner=self.auth_user1)
+        Product.objects.create(name='Продукт', price=Decimal('99.90'), shop=self.shop)
+
+    def test_response_matches_json(self):
+        """Ответ в MessagePack содержит те же данные, что и ответ в JSON"""
+        url = reverse('product-list')
+        json_response = self.client.get(url, {'expand': 'shop'})
+        response = self.client.get(url, {'expand': 'shop'}, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json_response.json())
+
+    def test_request_body(self):
+        """Тело запроса в MessagePack разбирается как JSON"""
+        self.authenticate(self.auth_user2)
+        response = self.client.post(reverse('shop-list'), msgpack.packb({'name': 'Новый магазин'}),
+                                    content_type='application/msgpack')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Shop.objects.filter(name='Новый магазин', owner=self.auth_user2).exists())
+
+    def test_invalid_body(self):
+        """Некорректное тело в MessagePack возвращает 400"""
+        self.authenticate(self.auth_user2)
+        response = self.client.post(reverse('shop-list'), b'\xc1', content_type='application/msgpack')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from apps.products.models import Category, Product
+from apps.shops.models import Shop
+from tests.base_test import BaseAPITestCase
+
+
+@override_settings(RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': True})
+class ResponseCacheTest(BaseAPITestCase):
+    """
+    Тесты кэша ответов каталога.
+
+    Этот класс тестирует попадание в кэш и инвалидацию записей по тегам моделей.
+    """
+    def setUp(self):
+        cache.clear()
+        self.shop = Shop.objects.create(name='Магазин', owner=self.auth_user1)
+        self.category = Category.objects.create(name='Категория')
+        self.product1 = Product.objects.create(name='Продукт 1', price=100, shop=self.shop)
+        self.product2 = Product.objects.create(name='Продукт 2', price=200, shop=self.shop)
+        self.product1.categories.add(self.category)
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_repeated_request_served_from_cache(self):
+        """Повторный запрос отдается из кэша без запросов к БД и с тем же телом"""
+        url = reverse('product-list')
+        first = self.get(url)
+
+        with self.assertNumQueries(0):
+            second = self.get(url)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second['Vary'], first['Vary'])
+
+    def test_save_invalidates_only_affected_detail(self):
+        """Изменение продукта сбрасывает его детальное представление, но не соседнее"""
+        url1 = reverse('product-detail', kwargs={'pk': self.product1.pk})
+        url2 = reverse('product-detail', kwargs={'pk': self.product2.pk})
+        self.get(url1)
+        self.get(url2)
+
+        self.product1.name = 'Новое имя'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product1.save()
+
+        response = self.get(url1)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['name'], 'Новое имя')
+        self.assertEqual(self.get(url2)['X-Cache'], 'HIT')
+
+    def test_m2m_change_invalidates_product(self):
+        """Изменение категорий продукта сбрасывает его представления"""
+        detail_url = reverse('product-detail', kwargs={'pk': self.product2.pk})
+        self.get(detail_url)
+        self.get(reverse('product-list'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.categories.add(self.product2)  # обратная сторона связи
+
+        self.assertEqual(self.get(detail_url).json()['categories'], [self.category.pk])
+        self.assertEqual(self.get(reverse('product-list'))['X-Cache'], 'MISS')
+
+    def test_category_delete_invalidates_linked_products(self):
+        """Удаление категории сбрасывает продукты, в которых она была указана"""
+        url = reverse('product-detail', kwargs={'pk': self.product1.pk})
+        self.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+
+        self.assertEqual(self.get(url).json()['categories'], [])
+
+    def test_expanded_relation_invalidated_by_related_model(self):
+        """Раскрытый магазин в ответе продукта обновляется при изменении магазина"""
+        url = reverse('product-detail', kwargs={'pk': self.product1.pk})
+        self.get(url, expand='shop')
+        self.assertEqual(self.get(url)['X-Cache'], 'MISS')  # без expand - другая запись
+
+        self.shop.name = 'Другой магазин'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shop.save()
+
+        self.assertEqual(self.get(url, expand='shop').json()['shop']['name'], 'Другой магазин')
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+
+    def test_invalidated_after_commit(self):
+        """Теги сбрасываются только после фиксации транзакции, в которой изменилась запись"""
+        url = reverse('product-detail', kwargs={'pk': self.product1.pk})
+        self.get(url)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.product1.name = 'Новое имя'
+            self.product1.save()
+            self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get(url)['X-Cache'], 'MISS')
@@ -0,0 +1,59 @@
+import gzip
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.reverse import reverse
+from rest_framework.test import APIRequestFactory
+
+from core import schema
+
+
+class CachedSchemaTest(SimpleTestCase):
+    """
+    Тесты кэшированной схемы OpenAPI.
+
+    Этот класс тестирует совпадение со схемой drf-spectacular, ETag, gzip и файл кэша.
+    """
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        overrides = override_settings(OPENAPI_SCHEMA_CACHE_DIR=tmp_dir.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        schema.clear()
+        self.addCleanup(schema.clear)
+        self.url = reverse('schema')
+
+    def test_same_as_spectacular(self):
+        """Тело ответа совпадает со схемой, которую генерирует SpectacularAPIView"""
+        request = APIRequestFactory().get(self.url, {'format': 'json'})
+        expected = SpectacularAPIView.as_view()(request).render()
+
+        response = self.client.get(self.url, {'format': 'json'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response['Content-Type'], expected['Content-Type'])
+
+    def test_generated_once_and_reused_from_file(self):
+        """Схема генерируется один раз и после сброса памяти читается из файла"""
+        with mock.patch.object(schema, 'generate_schema', wraps=schema.generate_schema) as generate:
+            self.client.get(self.url)
+            self.client.get(self.url)
+            schema._documents.clear()
+            self.client.get(self.url)
+
+        self.assertEqual(generate.call_count, 1)
+
+    def test_etag_and_gzip(self):
+        """Повторный запрос с ETag получает 304, клиент с gzip получает сжатое тело"""
+        response = self.client.get(self.url)
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        gzipped = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(gzipped['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(gzipped.content), response.content)
+        self.assertNotEqual(gzipped['ETag'], response['ETag'])
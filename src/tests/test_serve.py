@@ -0,0 +1,68 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+
+
+class ServeCommandTest(SimpleTestCase):
+    """Тесты сервера serve"""
+
+    def test_refuses_local_memory_cache_with_several_workers(self):
+        """С кэшем в памяти процесса несколько рабочих процессов не запускаются"""
+        with self.assertRaisesMessage(CommandError, 'хранится в памяти процесса'):
+            call_command('serve', '--bind=127.0.0.1:0', '--workers=2')
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp'}},
+        THROTTLING={**settings.THROTTLING, 'ENABLED': False},
+        IDEMPOTENCY={**settings.IDEMPOTENCY, 'ENABLED': True},
+    )
+    def test_refuses_cache_without_atomic_operations(self):
+        """Ключи идемпотентности и ограничение частоты не запускаются на кэше без атомарных add и incr"""
+        with self.assertRaisesMessage(CommandError, 'не выполняет add и incr атомарно'):
+            call_command('serve', '--bind=127.0.0.1:0', '--workers=2')
+
+    def test_workers_restart_after_max_requests_and_stop_gracefully(self):
+        """Процессы заменяются после max-requests, запросы не теряются, SIGTERM завершает сервер"""
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        env = {**os.environ, 'SECRET_KEY': 'x', 'DEBUG': 'True', 'DB_NAME': str(Path(tmp_dir.name) / 'db.sqlite3'),
+               'CACHE_BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+               'CACHE_LOCATION': str(Path(tmp_dir.name) / 'cache'), 'THROTTLING_ENABLED': 'False',
+               'IDEMPOTENCY_ENABLED': 'False'}
+        process = subprocess.Popen(
+            [sys.executable, 'manage.py', 'serve', f'--bind=127.0.0.1:{port}', '--workers=2',
+             '--max-requests=2', '--max-requests-jitter=0', '--warmup-url=/metrics/'],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.addCleanup(process.kill)
+
+        url = f'http://127.0.0.1:{port}/metrics/'
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                urllib.request.urlopen(url, timeout=5).read()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    self.fail('Сервер не запустился')
+                time.sleep(0.2)
+
+        statuses = [urllib.request.urlopen(url, timeout=5).status for _ in range(8)]
+        self.assertEqual(statuses, [200] * 8)
+
+        process.send_signal(signal.SIGTERM)
+        self.assertEqual(process.wait(timeout=20), 0)
@@ -0,0 +1,203 @@
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.models import ProtectedError
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse as django_reverse
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from apps.orders.models import CartItem, Order, OrderItem
+from apps.products.models import Product
+from apps.shops.models import Shop
+from core.sharding import ID_RANGE, shard_for, shard_for_pk
+from tests.base_test import BaseAPITestCase
+
+
+@override_settings(SHARDING={**settings.SHARDING, 'SHARDS': ('default', 'orders_1')})
+class ShardingAPITest(BaseAPITestCase):
+    """
+    Тесты шардирования заказов и корзин.
+
+    Этот класс тестирует распределение покупателей по двум базам SQLite,
+    работу корзины и заказов внутри шарда и сбор списка со всех шардов для администратора.
+    """
+    databases = {'default', 'orders_1'}
+
+    def setUp(self):
+        self.shop = Shop.objects.create(name='Магазин', owner=self.admin_user)
+        self.product = Product.objects.create(name='Продукт', price=10, shop=self.shop)
+        # покупатели в разных шардах
+        self.customers = {}
+        index = 0
+        while len(self.customers) < 2:
+            user = get_user_model().objects.create_user(email=f'customer{index}@example.com', password='password')
+            self.customers.setdefault(shard_for(user.pk), user)
+            index += 1
+
+    def checkout(self, user):
+        self.authenticate(user)
+        self.client.post(reverse('cart-item-list'), {'product': self.product.pk, 'quantity': 2}, format='json')
+        return self.client.post(reverse('order-list'))
+
+    def test_checkout_in_customer_shard(self):
+        """Корзина и заказ покупателя хранятся в его шарде"""
+        for alias, user in self.customers.items():
+            response = self.checkout(user)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(shard_for_pk(response.data['id']), alias)
+            self.assertEqual(response.data['items'][0]['product_name'], 'Продукт')
+            self.assertTrue(Order.objects.using(alias).filter(customer=user).exists())
+            self.assertFalse(CartItem.objects.using(alias).exists())
+
+            # список покупателя читается только из его шарда
+            response = self.client.get(reverse('order-list'))
+            self.assertEqual([order['customer'] for order in response.data], [user.pk])
+
+        self.assertGreater(Order.objects.using('orders_1').get().pk, ID_RANGE)
+        self.assertEqual(OrderItem.objects.using('orders_1').count(), 1)
+
+    def test_cart_expand_product_across_databases(self):
+        """Продукт из каталога раскрывается в корзине из другого шарда отдельным запросом"""
+        user = self.customers['orders_1']
+        self.authenticate(user)
+        self.client.post(reverse('cart-item-list'), {'product': self.product.pk}, format='json')
+
+        response = self.client.get(reverse('cart-item-list'), {'expand': 'product'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['product']['name'], 'Продукт')
+
+    def test_staff_fan_out(self):
+        """Администратор видит заказы всех шардов, отдельный заказ ищется по идентификатору"""
+        ids = sorted(self.checkout(user).data['id'] for user in self.customers.values())
+
+        self.authenticate(self.admin_user)
+        response = self.client.get(reverse('order-list'))
+        self.assertEqual([order['id'] for order in response.data], ids)
+
+        response = self.client.get(reverse('order-detail', args=(ids[-1],)))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['items']), 1)
+
+        response = self.client.post(reverse('order-bulk-status'), {'ids': ids, 'status': 'processing'},
+                                    format='json')
+        self.assertEqual(response.data['updated'], 2)
+        for alias in self.customers:
+            self.assertEqual(Order.objects.using(alias).get().status, 'processing')
+
+    def test_delete_cleans_up_shards(self):
+        """Удаление продукта, магазина и пользователя доходит до корзин и заказов в других шардах"""
+        user = self.customers['orders_1']
+        order_id = self.checkout(user).data['id']
+        self.client.post(reverse('cart-item-list'), {'product': self.product.pk}, format='json')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.delete()
+        self.assertFalse(CartItem.objects.using('orders_1').exists())
+        item = OrderItem.objects.using('orders_1').get(order_id=order_id)
+        self.assertEqual((item.product_id, item.shop_id, item.product_name), (None, self.shop.pk, 'Продукт'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shop.delete()
+        self.assertIsNone(OrderItem.objects.using('orders_1').get(order_id=order_id).shop_id)
+
+        # заказы в шарде защищают покупателя, корзина удаляется вместе с ним
+        with self.assertRaises(ProtectedError), transaction.atomic():
+            user.delete()
+        buyer = next(buyer for buyer in (
+            get_user_model().objects.create_user(email=f'buyer{index}@example.com', password='password')
+            for index in range(100)
+        ) if shard_for(buyer.pk) == 'orders_1')
+        shop = Shop.objects.create(name='Другой', owner=self.admin_user)
+        CartItem.objects.create(user=buyer, product=Product.objects.create(name='Другой', price=10, shop=shop))
+        with self.captureOnCommitCallbacks(execute=True):
+            buyer.delete()
+        self.assertFalse(CartItem.objects.using('orders_1').exists())
+
+    def test_checkout_skips_deleted_products(self):
+        """Элементы корзины с продуктом, удаленным из каталога, в заказ не попадают"""
+        user = self.customers['orders_1']
+        self.authenticate(user)
+        other = Product.objects.create(name='Другой', price=20, shop=self.shop)
+        for product in (self.product, other):
+            self.client.post(reverse('cart-item-list'), {'product': product.pk}, format='json')
+        # очистка шарда выполняется после фиксации, а здесь ее нет
+        Product.objects.filter(pk=self.product.pk).delete()
+
+        response = self.client.post(reverse('order-list'))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['product_name'] for item in response.data['items']], ['Другой'])
+        self.assertFalse(CartItem.objects.using('orders_1').exists())
+
+        self.client.post(reverse('cart-item-list'), {'product': other.pk}, format='json')
+        Product.objects.filter(pk=other.pk).delete()
+        self.assertEqual(self.client.post(reverse('order-list')).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(SHARDING={**settings.SHARDING, 'SHARDS': ('default', 'orders_1')})
+class ShardedAdminTest(BaseAPITestCase):
+    """
+    Тесты админки шардируемых моделей.
+
+    Этот класс тестирует выбор шарда в списках, поиск по связям с основной базой,
+    действия над заказами другого шарда и страницу заказа по его идентификатору.
+    """
+    databases = {'default', 'orders_1'}
+
+    def setUp(self):
+        shop = Shop.objects.create(name='Магазин', owner=self.admin_user)
+        product = Product.objects.create(name='Продукт', price=10, shop=shop)
+        index = 0
+        while index == 0 or shard_for(self.customer.pk) != 'orders_1':
+            self.customer = get_user_model().objects.create_user(email=f'remote{index}@example.com',
+                                                                 password='password')
+            index += 1
+        self.order = Order.objects.create(customer=self.customer, status='paid')
+        OrderItem.objects.using('orders_1').create(order=self.order, product=product)
+        CartItem.objects.create(user=self.customer, product=product)
+        self.client.force_login(self.admin_user)
+
+    def test_changelists_per_shard(self):
+        """Списки показывают записи выбранного шарда, поиск по email покупателя работает в шарде"""
+        url = django_reverse('admin:orders_order_changelist')
+        change_url = django_reverse('admin:orders_order_change', args=(self.order.pk,))
+        self.assertNotContains(self.client.get(url), change_url)
+        response = self.client.get(url, {'shard': 'orders_1', 'q': self.customer.email})
+        self.assertContains(response, change_url)
+        self.assertContains(response, 'shard=default">default</a>')
+        self.assertEqual(self.client.get(url, {'shard': 'orders_1', '_facets': 'True'}).status_code, 200)
+
+        for model in ('orderitem', 'cartitem'):
+            response = self.client.get(django_reverse(f'admin:orders_{model}_changelist'), {'shard': 'orders_1'})
+            self.assertContains(response, self.customer.email if model == 'cartitem' else 'Продукт')
+
+    def test_transition_and_change_in_other_shard(self):
+        """Действие меняет статус заказов выбранного шарда, страница заказа открывается по его id"""
+        response = self.client.post(django_reverse('admin:orders_order_changelist') + '?shard=orders_1', {
+            'action': 'transition_to_shipped',
+            admin.helpers.ACTION_CHECKBOX_NAME: [self.order.pk],
+        }, follow=True)
+
+        self.assertContains(response, 'заказов: 1')
+        self.assertEqual(Order.objects.using('orders_1').get().status, 'shipped')
+        response = self.client.get(django_reverse('admin:orders_order_change', args=(self.order.pk,)))
+        self.assertContains(response, self.customer.email)
+
+
+class ShardMigrationsTest(SimpleTestCase):
+    """Тесты миграций базы данных шарда"""
+
+    def test_no_foreign_keys_to_other_databases(self):
+        """Новая база данных создается итоговой миграцией без внешних ключей на таблицы других приложений"""
+        # без соединения загрузчик считает, что ни одна миграция не применена
+        loader = MigrationLoader(None)
+        plan = [key for key in loader.graph.forwards_plan(('orders', '0001_squashed_0009_orderitem_fulfilment'))
+                if key[0] == 'orders']
+        self.assertEqual(plan, [('orders', '0001_squashed_0009_orderitem_fulfilment')])
+
+        migration = loader.graph.nodes[plan[0]]
+        foreign_keys = [field for operation in migration.operations for _, field in getattr(operation, 'fields', ())
+                        if field.is_relation]
+        self.assertEqual({field.remote_field.model for field in foreign_keys if field.db_constraint}, {'orders.order'})
@@ -0,0 +1,88 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from apps.products.models import Product
+from apps.shops.models import Shop
+from base.throttling import consume, get_key_timeout, parse_rate
+from tests.base_test import BaseAPITestCase
+
+
+class TokenBucketTest(SimpleTestCase):
+    """
+    Тесты корзины токенов.
+
+    Этот класс тестирует разбор ограничений, емкость и пополнение корзины.
+    """
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        """Интервал пополнения и емкость по умолчанию"""
+        self.assertEqual(parse_rate('60/min'), (1000, 60))
+        self.assertEqual(parse_rate('10/s:3'), (100, 3))
+        self.assertEqual(parse_rate('24/day:1'), (3_600_000, 1))
+
+    def test_burst_and_refill(self):
+        """Подряд проходит емкость корзины, затем по токену за интервал"""
+        now = 1_000_000
+        self.assertEqual([consume('bucket', 1000, 3, now) for _ in range(3)], [0, 0, 0])
+        self.assertEqual(consume('bucket', 1000, 3, now), 1.0)
+        self.assertEqual(consume('bucket', 1000, 3, now + 500), 0.5)  # отказ не расходует токен
+        self.assertEqual(consume('bucket', 1000, 3, now + 1000), 0)
+        self.assertEqual(consume('bucket', 1000, 3, now + 1000), 1.0)
+
+    def test_key_outlives_bucket(self):
+        """Ключ живет, пока корзина не наполнится, в том числе для ограничений в сутки"""
+        self.assertEqual(get_key_timeout(*parse_rate('24/day:2')), 2 * 60 * 60 + 1)
+        self.assertEqual(get_key_timeout(*parse_rate('10/s:3')), 2)
+
+        consume('bucket', 3_600_000, 24, 0)
+        self.assertLess(time.time() + 24 * 60 * 60, cache._expire_info[cache.make_and_validate_key('bucket')])
+
+    def test_idle_bucket_is_full(self):
+        """После простоя корзина снова полная, но не больше емкости"""
+        consume('bucket', 1000, 2, 0)
+        later = 60_000
+        self.assertEqual([consume('bucket', 1000, 2, later) for _ in range(3)], [0, 0, 1.0])
+
+
+@override_settings(THROTTLING={**settings.THROTTLING, 'ENABLED': True, 'RATES': {
+    'cart': {'user': '2/min', 'ip': '3/min'},
+}})
+class ThrottlingAPITest(BaseAPITestCase):
+    """
+    Тесты ограничения частоты запросов в API.
+
+    Этот класс тестирует ограничения на пользователя и на IP адрес и заголовок Retry-After.
+    """
+    def setUp(self):
+        cache.clear()
+        shop = Shop.objects.create(name='Магазин', owner=self.auth_user1)
+        self.product = Product.objects.create(name='Продукт', price=10, shop=shop)
+        self.url = reverse('cart-item-list')
+
+    def add_to_cart(self, user):
+        self.authenticate(user)
+        return self.client.post(self.url, {'product': self.product.pk, 'quantity': 1}, format='json')
+
+    def test_user_limit(self):
+        """Третий запрос пользователя за минуту отклоняется с Retry-After"""
+        self.add_to_cart(self.auth_user1)
+        self.add_to_cart(self.auth_user1)
+        response = self.add_to_cart(self.auth_user1)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)  # чтение без ограничения
+
+    def test_ip_limit(self):
+        """Ограничение на IP адрес общее для разных пользователей"""
+        self.add_to_cart(self.auth_user1)
+        self.add_to_cart(self.auth_user1)
+        self.assertEqual(self.add_to_cart(self.auth_user2).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.add_to_cart(self.auth_user2).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+from django.test import override_settings
+from rest_framework import serializers, status
+from rest_framework.reverse import reverse
+
+from apps.products.models import Category, Product
+from apps.products.serializers import CategorySerializer, ProductSerializer
+from apps.shops.models import Shop
+from base.serializers import ValuesReader
+from tests.base_test import BaseAPITestCase
+
+
+class ValuesListTest(BaseAPITestCase):
+    """
+    Тесты чтения списков через values_list.
+
+    Этот класс тестирует, что ответ совпадает с ответом сериализатора побайтно.
+    """
+    def setUp(self):
+        shop1 = Shop.objects.create(name='Магазин 1', owner=self.auth_user1, avatar='shops/avatars/1.png')
+        shop2 = Shop.objects.create(name='Магазин 2', owner=self.auth_user2, description='Описание')
+        category1 = Category.objects.create(name='Категория 1')
+        category2 = Category.objects.create(name='Категория 2', description='Описание')
+        Product.objects.create(name='Телефон', price=Decimal('1999.9'), shop=shop1, image='products/1.png',
+                               discount=15).categories.set([category1, category2])
+        Product.objects.create(name='Книга', price=Decimal('10'), shop=shop2, description='Описание'
+                               ).categories.set([category2])
+        Product.objects.create(name='Лампа', price=Decimal('0.01'), shop=shop2)
+
+    def assertSameAsSerializer(self, url, params=None):
+        response = self.client.get(url, params or {})
+        with override_settings(VALUES_LIST_ENABLED=False):
+            expected = self.client.get(url, params or {})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, expected.content)
+
+    def test_products(self):
+        """Список продуктов совпадает при разных полях, раскрытиях, поиске и сортировке"""
+        url = reverse('product-list')
+        for params in ({}, {'fields': 'id,name,price'}, {'expand': 'shop'}, {'expand': 'categories'},
+                       {'expand': 'shop,categories', 'fields': 'name,image'}, {'search': 'Книга'},
+                       {'ordering': '-price'}, {'ordering': 'shop__name,name'}):
+            with self.subTest(params=params):
+                self.assertSameAsSerializer(url, params)
+
+    def test_categories_and_shops(self):
+        """Списки категорий и магазинов совпадают"""
+        self.assertSameAsSerializer(reverse('category-list'))
+        self.assertSameAsSerializer(reverse('shop-list'))
+        self.assertSameAsSerializer(reverse('shop-list'), {'fields': 'avatar,owner'})
+
+    def test_query_count(self):
+        """Раскрытые категории загружаются одним запросом, как при prefetch_related"""
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('product-list'), {'expand': 'shop,categories'})
+
+        self.assertEqual(response.json()[0]['categories'][1]['name'], 'Категория 2')
+        self.assertEqual(response.json()[2]['categories'], [])
+
+    def test_unsupported_serializer(self):
+        """Сериализатор с полем, которого нет среди столбцов, читается обычным способом"""
+        class CategoryWithMethodSerializer(CategorySerializer):
+            title = serializers.SerializerMethodField()
+
+            class Meta(CategorySerializer.Meta):
+                fields = ('id', 'title')
+
+            def get_title(self, obj):
+                return obj.name.upper()
+
+        self.assertIsNone(ValuesReader.compile(CategoryWithMethodSerializer()))
+        self.assertIsNotNone(ValuesReader.compile(ProductSerializer(expand={'shop', 'categories'})))
+        with override_settings(VALUES_LIST_ENABLED=False):
+            self.assertIsNone(ValuesReader.compile(ProductSerializer()))